@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+立即购买与购物车结算对比
+在本地替身服务器上分别走两条下单路径，到订单确认页（浏览器）或提交订单（HTTP）为止：
+
+  HTTP     购物车: 取购物车firstData → 解析建索引 → 结算请求 → 提交订单
+           立即购买: 立即购买请求 → 提交订单
+  浏览器   购物车: 加载购物车 → 勾选目标 → 点击结算 → 订单确认页
+           立即购买: 当前页面POST购买表单 → 订单确认页
+
+--page-delay 模拟服务端渲染耗时（每个页面/请求都会加上），购物车行数越多firstData越大、页面渲染越慢。
+HTTP部分无需浏览器；加 --browser 同时测浏览器路径。
+
+用法: python benchmarks/bench_buy_now.py --rows 50 500 3000 --repeat 10 --page-delay 0.05 [--browser] [--headed]
+"""
+
+import os
+import sys
+import time
+import argparse
+from statistics import median
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seckill import taobao_api
+from seckill.react_utils import ReactPageUtils
+from seckill.script_runner import ScriptRunner
+from benchmarks.standin_server import StandInServer, USER_ID
+
+
+def point_api_at(server):
+    """把taobao_api的请求地址指向替身服务器"""
+    base = server.base_url
+    taobao_api.CART_URL = base + '/cart.htm'
+    taobao_api.CONFIRM_URL = base + '/auction/order/confirm_order.htm'
+    taobao_api.BUY_NOW_URL = base + '/auction/buy_now.jhtml'
+    taobao_api.SUBMIT_URL = base + '/auction/confirm_order.htm'
+
+
+def new_session():
+    sess = requests.Session()
+    sess.cookies.set('_tb_token_', 'standin')
+    sess.cookies.set('unb', USER_ID)
+    return sess
+
+
+def http_cart(sess, item_id, sku_id):
+    first_data, user_id = taobao_api.get_buy_cart(sess)
+    args = taobao_api.parse_cart_data(first_data, item_id=item_id, sku_id=sku_id)
+    order_data = taobao_api.confirm_order(*args, sess=sess)
+    taobao_api.submit_order(order_data, item_id, user_id, sess=sess)
+
+
+def http_buy_now(sess, item_id, sku_id):
+    order_data = taobao_api.buy_now(item_id, sku_id, sess=sess)
+    taobao_api.submit_order(order_data, item_id, taobao_api.get_user_id(sess), sess=sess)
+
+
+def wait_for(driver, script, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if driver.execute_script(script):
+                return True
+        except Exception:
+            pass  # 页面切换中
+        time.sleep(0.01)
+    return False
+
+
+ORDER_PAGE = "return document.title === '确认订单' && document.readyState !== 'loading';"
+# 立即购买可能从上一次的订单页出发，旧页面上的标记消失才算新订单页
+FRESH_ORDER_PAGE = "return !window.__buyNowStale && document.title === '确认订单' && document.readyState !== 'loading';"
+
+
+def browser_cart(driver, scripts, server, target):
+    driver.get(server.base_url + '/cart.htm')
+    scripts.run('select', ReactPageUtils.get_select_items_script(), [target])
+    scripts.run('find_settlement', ReactPageUtils.get_find_settlement_button_script())
+    return wait_for(driver, ORDER_PAGE)
+
+
+def browser_buy_now(driver, scripts, server, target):
+    item_id, sku_id = taobao_api.parse_target(target)
+    scripts.run('buy_now', ReactPageUtils.get_buy_now_script(), taobao_api.BUY_NOW_URL,
+                taobao_api.buy_now_form(item_id, sku_id))
+    return wait_for(driver, FRESH_ORDER_PAGE)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='立即购买与购物车结算耗时对比（替身服务器）')
+    parser.add_argument('--rows', type=int, nargs='+', default=[50, 500, 3000], help='购物车商品行数')
+    parser.add_argument('--repeat', type=int, default=10, help='每种方式重复次数，取中位数')
+    parser.add_argument('--page-delay', type=float, default=0.05, help='每个页面/请求的服务端渲染耗时（秒）')
+    parser.add_argument('--browser', action='store_true', help='同时测浏览器路径')
+    parser.add_argument('--headed', action='store_true', help='显示浏览器窗口')
+    args = parser.parse_args()
+
+    driver = scripts = None
+    if args.browser:
+        from benchmarks.bench_multi_tab import start_chrome
+        driver = start_chrome(headless=not args.headed)
+        scripts = ScriptRunner(driver)
+
+    print(f"{'行数':>6}  {'路径':<8}{'购物车ms':>10}{'立即购买ms':>12}{'节省':>8}  请求数(购物车/立即购买)")
+    try:
+        for rows in args.rows:
+            index = rows // 2
+            item_id, sku_id = str(100000 + index), str(200000 + index)
+            target = f"{item_id}:{sku_id}"
+            with StandInServer(cart_rows=rows, page_delay=args.page_delay) as server:
+                point_api_at(server)
+                # 标准输出里taobao_api的进度信息不计入对比
+                with open(os.devnull, 'w') as devnull:
+                    stdout, sys.stdout = sys.stdout, devnull
+                    try:
+                        sess = new_session()
+                        server.hits.clear()
+                        cart_ms = timed(lambda: http_cart(sess, item_id, sku_id), args.repeat)
+                        cart_hits = sum(server.hits.values()) // args.repeat
+                        server.hits.clear()
+                        buy_ms = timed(lambda: http_buy_now(sess, item_id, sku_id), args.repeat)
+                        buy_hits = sum(server.hits.values()) // args.repeat
+                    finally:
+                        sys.stdout = stdout
+                print(f"{rows:>6}  {'HTTP':<8}{cart_ms:>10.1f}{buy_ms:>12.1f}{1 - buy_ms / cart_ms:>8.0%}"
+                      f"  {cart_hits}/{buy_hits}")
+
+                if driver is not None:
+                    driver.get(server.base_url + '/cart.htm')
+                    cart_ms = timed(lambda: browser_cart(driver, scripts, server, target), args.repeat)
+                    # 立即购买从已打开的购物车页面出发（布防时停留的页面）
+                    driver.get(server.base_url + '/cart.htm')
+                    buy_ms = timed(lambda: browser_buy_now(driver, scripts, server, target), args.repeat)
+                    print(f"{rows:>6}  {'浏览器':<8}{cart_ms:>10.1f}{buy_ms:>12.1f}{1 - buy_ms / cart_ms:>8.0%}")
+    finally:
+        if driver is not None:
+            driver.quit()
+
+
+if __name__ == '__main__':
+    main()
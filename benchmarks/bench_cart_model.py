@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+购物车模型基准
+生成包含数千行商品的合成firstData，对比：
+  - 常驻原始dict（json.loads结果）与常驻Cart模型的内存占用
+  - 构建耗时（json.loads + 一次遍历建索引）
+  - 按itemId / skuId查找：原始dict线性扫描 vs 索引
+
+用法: python benchmarks/bench_cart_model.py --lines 1000 5000 --sellers 200 --lookups 2000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seckill.cart import Cart
+
+
+def make_first_data(lines, sellers, seed=0):
+    """合成firstData，每行带上真实购物车中常见的展示字段"""
+    rng = random.Random(seed)
+    shops = []
+    per_shop = max(1, lines // sellers)
+    n = 0
+    for s in range(sellers):
+        seller_id = str(2200000000 + s)
+        orders = []
+        for _ in range(per_shop if s < sellers - 1 else lines - n):
+            n += 1
+            item_id = str(600000000000 + n)
+            orders.append({
+                'cartId': str(3900000000000 + n), 'itemId': item_id, 'skuId': str(4800000000000 + n),
+                'sellerId': seller_id, 'shopId': str(100000 + s), 'title': f"合成商品{n} " + '规格' * 8,
+                'pic': f"//img.alicdn.com/bao/uploaded/i{n % 4}/{item_id}.jpg_80x80.jpg",
+                'url': f"//item.taobao.com/item.htm?id={item_id}",
+                'amount': {'now': rng.randint(1, 3), 'max': 200, 'limit': 999, 'multiple': 1},
+                'price': {'now': rng.randint(100, 99900), 'origin': 99900, 'descend': 0, 'save': 0, 'sum': 0},
+                'skus': {'颜色分类': rng.choice(['红', '黑', '白']), '尺码': rng.choice(['S', 'M', 'L', 'XL'])},
+                'cartActiveInfo': {'cartBcParams': f"buyerCondition~0~~cartCreateTime~{n}", 'isDefault': True},
+                'toBuyInfo': {'cart_created_time': str(1600000000000 + n), 'areaId': '330100'},
+                'isValid': rng.random() > 0.05, 'checked': False, 'attr': ';op:1;cm:0;',
+                'extra': {'tags': ['包邮', '7天无理由'], 'services': [{'name': '运费险', 'price': 0}]},
+            })
+        shops.append({'sellerId': seller_id, 'title': f"店铺{s}",
+                      'bundles': [{'sellerId': seller_id, 'orders': orders}]})
+    return json.dumps({'list': shops, 'globalData': {'totalSize': lines}}, ensure_ascii=False)
+
+
+def retained_bytes(build):
+    """构建对象并返回其常驻内存（build返回值保持存活时的分配量）"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    obj = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del obj
+    return size
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def linear_find(raw, item_id):
+    for shop in raw['list']:
+        for bundle in shop['bundles']:
+            for order in bundle['orders']:
+                if order['itemId'] == item_id:
+                    return order
+    return None
+
+
+def run(lines, sellers, lookups, repeat):
+    text = make_first_data(lines, sellers)
+    raw = json.loads(text)
+    cart = Cart.from_first_data(raw)
+    targets = [order.item_id for order in random.Random(1).choices(cart.orders, k=lookups)]
+
+    raw_mem = retained_bytes(lambda: json.loads(text))
+    cart_mem = retained_bytes(lambda: Cart.from_first_data(text))
+    loads_s = best_of(lambda: json.loads(text), repeat)
+    build_s = best_of(lambda: Cart.from_first_data(raw), repeat)
+    scan_s = best_of(lambda: [linear_find(raw, t) for t in targets], 1)
+    index_s = best_of(lambda: [cart.find(item_id=t) for t in targets], repeat)
+    return {
+        'lines': lines, 'valid': len(cart.purchasable()),
+        'raw_kb': raw_mem / 1024, 'cart_kb': cart_mem / 1024,
+        'loads_ms': loads_s * 1000, 'build_ms': build_s * 1000,
+        'scan_us': scan_s / lookups * 1e6, 'index_us': index_s / lookups * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='购物车模型内存与构建耗时基准')
+    parser.add_argument('--lines', type=int, nargs='+', default=[1000, 5000], help='购物车行数')
+    parser.add_argument('--sellers', type=int, default=200, help='店铺数')
+    parser.add_argument('--lookups', type=int, default=2000, help='查找次数')
+    parser.add_argument('--repeat', type=int, default=5, help='计时重复次数，取最快一次')
+    args = parser.parse_args()
+
+    print(f"{'行数':>6}{'可购买':>8}{'原始dict KB':>14}{'Cart KB':>10}{'loads ms':>10}{'建模 ms':>10}"
+          f"{'扫描 us/次':>12}{'索引 us/次':>12}")
+    for lines in args.lines:
+        r = run(lines, min(args.sellers, lines), args.lookups, args.repeat)
+        print(f"{r['lines']:>6}{r['valid']:>8}{r['raw_kb']:>14.0f}{r['cart_kb']:>10.0f}{r['loads_ms']:>10.2f}"
+              f"{r['build_ms']:>10.2f}{r['scan_us']:>12.1f}{r['index_us']:>12.2f}")
+    print("\n原始dict: 常驻json.loads结果；Cart: 解析后只保留CartOrder和索引（建模 ms不含loads）")
+
+
+if __name__ == '__main__':
+    main()
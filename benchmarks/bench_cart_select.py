@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+购物车勾选基准
+在本地替身服务器的大购物车上对比全选脚本与按商品ID定向勾选：
+每次勾选变化替身页面都会重新渲染所有商品行并重算合计（模拟React购物车），
+两种方式都在勾选脚本返回后等待一次合计金额
+
+用法: python benchmarks/bench_cart_select.py --rows 200 1000 3000 --targets 3 --repeat 5 [--headed]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from statistics import median
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seckill.react_utils import ReactPageUtils
+from seckill.script_runner import ScriptRunner
+from benchmarks.standin_server import StandInServer
+from benchmarks.bench_multi_tab import start_chrome
+
+CHECKED_SCRIPT = "return document.querySelectorAll('.cart-item .item-check:checked').length;"
+
+
+def wait_for_total(scripts, timeout=2.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        total = scripts.run('verify_selection', ReactPageUtils.get_verify_selection_script())
+        if total > 0 or time.perf_counter() >= deadline:
+            return total
+        time.sleep(0.01)
+
+
+def select_all(scripts, targets):
+    return scripts.run('select', ReactPageUtils.get_select_products_script())
+
+
+def select_targets(scripts, targets):
+    return scripts.run('select', ReactPageUtils.get_select_items_script(), targets)
+
+
+def measure(driver, scripts, url, select, targets):
+    """返回(勾选+等待合计总耗时ms, 页面内勾选脚本耗时ms, 勾选行数)"""
+    driver.get(url)
+    scripts.spans.clear()
+    started = time.perf_counter()
+    select(scripts, targets)
+    wait_for_total(scripts)
+    elapsed = (time.perf_counter() - started) * 1000
+    script_ms = next((s.script_ms for s in scripts.spans if s.name == 'select'), None)
+    return elapsed, script_ms, driver.execute_script(CHECKED_SCRIPT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='全选与定向勾选耗时对比')
+    parser.add_argument('--rows', type=int, nargs='+', default=[200, 1000, 3000], help='购物车商品行数')
+    parser.add_argument('--targets', type=int, default=3, help='定向勾选的商品数')
+    parser.add_argument('--repeat', type=int, default=5, help='每种方式重复次数，取中位数')
+    parser.add_argument('--headed', action='store_true', help='显示浏览器窗口')
+    args = parser.parse_args()
+
+    modes = [('全选脚本', select_all), ('定向勾选', select_targets)]
+    driver = start_chrome(headless=not args.headed)
+    scripts = ScriptRunner(driver)
+    try:
+        print(f"{'行数':>6}  {'方式':<10}{'总耗时ms':>10}{'脚本ms':>10}{'勾选行':>8}")
+        for rows in args.rows:
+            targets = [str(100000 + i) for i in random.Random(rows).sample(range(rows), args.targets)]
+            with StandInServer(cart_rows=rows) as server:
+                url = server.base_url + '/cart.htm'
+                for name, select in modes:
+                    samples = [measure(driver, scripts, url, select, targets) for _ in range(args.repeat)]
+                    script_ms = [s[1] for s in samples if s[1] is not None]
+                    print(f"{rows:>6}  {name:<10}{median(s[0] for s in samples):>10.1f}"
+                          f"{median(script_ms) if script_ms else float('nan'):>10.1f}{samples[-1][2]:>8}")
+    finally:
+        driver.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+会话保活基准测试
+在本地替身服务器上对比各保活模式长时间等待期间的CPU和内存占用
+
+用法: python benchmarks/bench_keep_alive.py --hours 2 --interval 60
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium import webdriver
+
+from seckill.keep_alive import SessionKeepAlive, MODE_FETCH, MODE_HTTP, MODE_RELOAD
+from benchmarks.standin_server import StandInServer
+from benchmarks.resource_sampler import ResourceSampler
+
+
+def start_headless_chrome():
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    return webdriver.Chrome(options=options)
+
+
+def run_mode(mode, server, hours, interval, sample_every):
+    driver = start_headless_chrome()
+    try:
+        cart_url = server.base_url + '/cart.htm'
+        driver.get(cart_url)
+        keep_alive = SessionKeepAlive(driver, mode=mode, ping_url=cart_url)
+        sampler = ResourceSampler(root_pid=driver.service.process.pid)
+
+        deadline = time.monotonic() + hours * 3600
+        next_ping = time.monotonic()
+        latencies = []
+        sampler.sample()
+        while time.monotonic() < deadline:
+            now = time.monotonic()
+            if now >= next_ping:
+                keep_alive.ping()
+                latencies.append(keep_alive.last_latency)
+                next_ping = now + interval
+            sampler.sample()
+            time.sleep(min(sample_every, max(0.0, deadline - time.monotonic())))
+
+        result = sampler.summary()
+        result.update({
+            'mode': mode,
+            'pings': keep_alive.ping_count,
+            'ping_failures': keep_alive.fail_count,
+            'ping_avg_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+        })
+        return result
+    finally:
+        driver.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='会话保活CPU/RSS基准测试')
+    parser.add_argument('--hours', type=float, default=0.05, help='每种模式的等待时长（小时）')
+    parser.add_argument('--interval', type=float, default=5, help='保活间隔（秒）')
+    parser.add_argument('--sample-every', type=float, default=1, help='资源采样间隔（秒）')
+    parser.add_argument('--cart-rows', type=int, default=500, help='替身购物车的商品行数')
+    parser.add_argument('--modes', default=','.join([MODE_RELOAD, MODE_FETCH, MODE_HTTP]))
+    args = parser.parse_args()
+
+    results = []
+    with StandInServer(cart_rows=args.cart_rows) as server:
+        for mode in args.modes.split(','):
+            print(f"⏳ 测试保活模式: {mode}")
+            results.append(run_mode(mode, server, args.hours, args.interval, args.sample_every))
+            print(json.dumps(results[-1], ensure_ascii=False))
+
+    print("\n📊 汇总:")
+    print(f"{'模式':<8}{'CPU%':>8}{'CPU秒':>10}{'RSS峰值MB':>12}{'保活均值ms':>12}")
+    for r in results:
+        print(f"{r['mode']:<8}{r.get('cpu_percent', 0):>8}{r.get('cpu_seconds', 0):>10}"
+              f"{r.get('rss_max_mb', 0):>12}{str(r.get('ping_avg_ms')):>12}")
+
+
+if __name__ == '__main__':
+    main()
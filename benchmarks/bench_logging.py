@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+日志开销微基准
+模拟抢购循环每轮输出的日志语句，对比同步print、队列日志(默认档位)和race档位的调用方耗时；
+输出流每次写入人为延迟，模拟较慢的终端
+
+用法: python benchmarks/bench_logging.py --iterations 2000 --write-delay-us 50
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seckill.log import setup_logging, get_logger, race_profile
+
+
+class SlowStream:
+    """每次写入都等待一段时间的输出流"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        end = time.perf_counter() + self.delay
+        while time.perf_counter() < end:
+            pass
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+RESULT = {'clicked': '结算(1) 共计 3 件商品，合计 ¥199.00 ' * 4, 'method': 'precise-button-0'}
+
+
+def fire_loop_print(iterations):
+    for retry_count in range(1, iterations + 1):
+        elapsed = retry_count * 0.05
+        if retry_count % 3 == 1:
+            print(f"⚡ 第{retry_count}次抢购 (已用时{elapsed:.2f}秒)...")
+        print(f"📍 检测到购物车页面(url)，尝试结算...")
+        print(f"✅ 找到结算按钮: {RESULT.get('clicked')[:50]}...")
+        print(f"   🔧 使用方法: {RESULT.get('method')}")
+        print("⚠️  结算按钮点击失败，继续重试...")
+
+
+def fire_loop_logging(iterations, logger):
+    for retry_count in range(1, iterations + 1):
+        elapsed = retry_count * 0.05
+        if retry_count % 3 == 1:
+            logger.info("⚡ 第%s次抢购 (已用时%.2f秒)...", retry_count, elapsed)
+        logger.info("📍 检测到购物车页面(%s)，尝试结算...", 'url')
+        logger.info("✅ 找到结算按钮: %.50s...", RESULT.get('clicked'))
+        logger.debug("   🔧 使用方法: %s", RESULT.get('method'))
+        logger.warning("⚠️  结算按钮点击失败，继续重试...")
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='抢购循环日志开销微基准')
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--write-delay-us', type=float, default=50)
+    args = parser.parse_args()
+
+    stream = SlowStream(args.write_delay_us / 1e6)
+    setup_logging(logging.INFO, stream=stream)
+    logger = get_logger('bench')
+
+    with redirect_stdout(stream):
+        t_print = timed(fire_loop_print, args.iterations)
+
+    t_queue = timed(fire_loop_logging, args.iterations, logger)
+    with race_profile():
+        t_race = timed(fire_loop_logging, args.iterations, logger)
+
+    per = 1e6 / args.iterations
+    print(f"📊 每轮调用方耗时（{args.iterations}轮，单次写入延迟{args.write_delay_us}us）:")
+    print(f"   print同步输出:   {t_print * per:8.2f} us")
+    print(f"   队列日志(INFO):  {t_queue * per:8.2f} us")
+    print(f"   race档位:        {t_race * per:8.2f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多标签页并行抢购吞吐基准
+在本地替身服务器上对比：逐个结算、多标签页WebDriver串行切换、多标签页独立DevTools连接并行，
+输出每秒成功进入收银台的商品组合数
+
+用法: python benchmarks/bench_multi_tab.py --items 6 --page-delay 0.2 [--headed]
+"""
+
+import os
+import sys
+import argparse
+
+from selenium import webdriver
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seckill.multi_tab import MultiTabSecKill, SUCCESS
+from benchmarks.standin_server import StandInServer
+
+
+def start_chrome(headless=True):
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--window-size=1920,1080')
+    return webdriver.Chrome(options=options)
+
+
+def close_extra_tabs(driver):
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+
+
+def run_mode(driver, server, targets, max_parallel, use_cdp):
+    server.orders.clear()
+    coordinator = MultiTabSecKill(driver, targets, cart_url=server.base_url + '/cart.htm',
+                                  max_parallel=max_parallel, use_cdp=use_cdp).prepare()
+    try:
+        coordinator.run()
+    finally:
+        coordinator.close()
+        close_extra_tabs(driver)
+    succeeded = sum(1 for t in coordinator.tasks if t.status == SUCCESS)
+    return succeeded, coordinator.elapsed(), coordinator.throughput(), len(server.orders)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多标签页并行抢购吞吐基准')
+    parser.add_argument('--items', type=int, default=6, help='目标商品组合数（每组一个标签页）')
+    parser.add_argument('--rows', type=int, default=30, help='替身购物车商品行数')
+    parser.add_argument('--page-delay', type=float, default=0.2, help='替身页面服务端耗时（秒）')
+    parser.add_argument('--headed', action='store_true', help='显示浏览器窗口')
+    args = parser.parse_args()
+
+    targets = [100000 + i for i in range(args.items)]
+    modes = [
+        ('逐个结算', 1, True),
+        ('多标签WebDriver切换', None, False),
+        ('多标签DevTools并行', None, True),
+    ]
+
+    driver = start_chrome(headless=not args.headed)
+    try:
+        with StandInServer(cart_rows=args.rows, page_delay=args.page_delay) as server:
+            print(f"{'模式':<20}{'成功':>6}{'用时s':>10}{'吞吐件/s':>12}{'替身订单':>10}")
+            for name, max_parallel, use_cdp in modes:
+                succeeded, elapsed, throughput, orders = run_mode(driver, server, targets, max_parallel, use_cdp)
+                print(f"{name:<20}{succeeded:>6}{elapsed:>10.3f}{throughput:>12.2f}{orders:>10}")
+    finally:
+        driver.quit()
+
+
+if __name__ == '__main__':
+    main()
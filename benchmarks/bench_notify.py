@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+通知分发基准
+对比同步推送与非阻塞分发器在慢速推送服务下的调用方耗时，推送服务由本地替身webhook模拟
+
+用法: python benchmarks/bench_notify.py --delay 2 --burst 20
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.notifier import NotificationDispatcher, WebhookSink
+from benchmarks.standin_server import StandInServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='通知分发调用方耗时基准')
+    parser.add_argument('--delay', type=float, default=2.0, help='替身推送服务的响应延迟（秒）')
+    parser.add_argument('--burst', type=int, default=20, help='突发消息数量')
+    args = parser.parse_args()
+
+    with StandInServer(webhook_delay=args.delay) as server:
+        url = server.base_url + '/webhook'
+
+        started = time.perf_counter()
+        requests.post(url, json={'msg': '淘宝秒杀：支付成功！'})
+        sync_cost = time.perf_counter() - started
+
+        dispatcher = NotificationDispatcher([WebhookSink(url)], timeout=args.delay + 1)
+        started = time.perf_counter()
+        for i in range(args.burst):
+            dispatcher.notify('淘宝秒杀：支付成功！' if i % 2 else f'第{i}次抢购失败')
+        async_cost = time.perf_counter() - started
+        dispatcher.close(timeout=args.delay * 3 + 5)
+
+        print(f"📊 同步推送单条: {sync_cost * 1000:.1f} ms")
+        print(f"📊 分发器投递{args.burst}条: {async_cost * 1e6:.1f} us "
+              f"(单条 {async_cost / args.burst * 1e6:.2f} us)")
+        print(f"📨 替身webhook收到{len(server.webhook_messages) - 1}次推送（突发消息已合并），"
+              f"发送成功{dispatcher.sent}，失败{dispatcher.failed}，丢弃{dispatcher.dropped}")
+
+
+if __name__ == '__main__':
+    main()
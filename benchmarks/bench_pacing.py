@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+抢购循环节奏策略基准
+在虚拟时钟上模拟 购物车 → 订单 → 收银台 的页面和服务器，按OptimizedSecKill主循环的调用顺序驱动各节奏策略，
+对比到达收银台的耗时、页面脚本调用次数、刷新次数和限流期间发出的点击数。
+
+场景:
+  fast      服务器快，跳转约150ms
+  slow      服务器慢，跳转约1.2s
+  hang      每次点击有30%概率页面卡死（DOM不再变化），只有刷新能恢复
+  throttle  开抢后1.5s内限流，期间每次点击把限流延长100ms
+
+用法: python benchmarks/bench_pacing.py --trials 200 [--scenarios fast slow hang throttle]
+"""
+
+import os
+import sys
+import random
+import argparse
+from statistics import median
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seckill.pacing import POLICIES
+from seckill.flow_state import PageState, CART, ORDER, PAYMENT
+
+SCENARIOS = {
+    'fast': {'navigation': 0.15, 'rtt': 0.005},
+    'slow': {'navigation': 1.2, 'rtt': 0.02},
+    'hang': {'navigation': 0.3, 'rtt': 0.008, 'hang': 0.3},
+    'throttle': {'navigation': 0.3, 'rtt': 0.008, 'throttle': 1.5, 'penalty': 0.1},
+}
+NEXT_STATE = {CART: ORDER, ORDER: PAYMENT}
+LOAD_TIME = 0.4  # 刷新后页面重新加载耗时
+TIMEOUT = 60.0
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+
+class SimPage:
+    """模拟页面：点击后经过随机跳转耗时进入下一状态；卡死时点击无效且DOM不再变化"""
+
+    def __init__(self, clock, rng, navigation, rtt, hang=0.0, throttle=0.0, penalty=0.0):
+        self.clock = clock
+        self.rng = rng
+        self.navigation = navigation
+        self._rtt = rtt
+        self.hang = hang
+        self.throttled_until = throttle
+        self.penalty = penalty
+        self.state = CART
+        self.doc = 0
+        self.mutations = 0
+        self.hung = False
+        self.pending = None  # (跳转完成时间, 目标状态)
+        self.calls = 0
+        self.throttled_clicks = 0
+
+    def rtt(self):
+        return self._rtt * self.rng.uniform(0.5, 2.0)
+
+    def _advance(self):
+        if self.pending and self.clock() >= self.pending[0]:
+            self.state = self.pending[1]
+            self.pending = None
+            self.doc += 1
+            self.mutations = 0
+        elif not self.hung:
+            # 正常页面持续有少量DOM变化（倒计时、价格刷新等）
+            self.mutations += 1
+
+    def observe(self):
+        self.calls += 1
+        self.clock.sleep(self.rtt())
+        self._advance()
+        throttled = self.clock() < self.throttled_until
+        return PageState(self.state, url=f"https://sim/{self.state}", dom=f"{self.doc}:{self.mutations}",
+                         throttled=throttled)
+
+    def click(self):
+        self.calls += 1
+        self.clock.sleep(self.rtt())
+        if self.hung or self.pending:
+            return False
+        if self.clock() < self.throttled_until:
+            self.throttled_clicks += 1
+            self.throttled_until += self.penalty
+            return False
+        if self.rng.random() < self.hang:
+            self.hung = True
+            return True  # 点击发出但页面卡死，不会跳转
+        latency = self.navigation * self.rng.lognormvariate(0, 0.4)
+        self.pending = (self.clock() + latency, NEXT_STATE[self.state])
+        return True
+
+    def refresh(self):
+        self.calls += 1
+        self.clock.sleep(LOAD_TIME)
+        self.hung = False
+        self.pending = None
+        self.doc += 1
+        self.mutations = 0
+
+
+def run_flow(policy_cls, scenario, seed):
+    """按OptimizedSecKill主循环驱动一次，返回(耗时s, 脚本调用次数, 刷新次数, 限流期间点击数)"""
+    clock = VirtualClock()
+    rng = random.Random(seed)
+    page = SimPage(clock, rng, **SCENARIOS[scenario])
+    pacing = policy_cls(clock=clock)
+    refreshes = 0
+
+    while clock() < TIMEOUT:
+        started = clock()
+        observed = page.observe()
+        pacing.observe(observed, clock() - started)
+        if observed.state == PAYMENT:
+            break
+        if pacing.should_refresh():
+            page.refresh()
+            refreshes += 1
+            clock.sleep(pacing.refresh_delay())
+            pacing.refreshed()
+            continue
+
+        if page.click():
+            before = observed.state
+            clicked_at = clock()
+            for _ in pacing.navigation_polls(5 if before == CART else 7.5, sleep=clock.sleep):
+                if page.observe().state != before:
+                    pacing.navigated(clock() - clicked_at)
+                    break
+            clock.sleep(pacing.settle_delay())
+        clock.sleep(pacing.retry_interval())
+
+    return clock(), page.calls, refreshes, page.throttled_clicks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='节奏策略对比（虚拟时钟模拟）')
+    parser.add_argument('--trials', type=int, default=200, help='每个场景每种策略的模拟次数')
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--policies', nargs='+', default=list(POLICIES), choices=list(POLICIES))
+    args = parser.parse_args()
+
+    print(f"{'场景':<10}{'策略':<10}{'耗时p50 s':>10}{'耗时p90 s':>10}{'脚本调用':>10}{'刷新':>8}{'限流中点击':>12}")
+    for scenario in args.scenarios:
+        for name in args.policies:
+            runs = [run_flow(POLICIES[name], scenario, seed) for seed in range(args.trials)]
+            elapsed = sorted(r[0] for r in runs)
+            print(f"{scenario:<10}{name:<10}{median(elapsed):>10.3f}{elapsed[int(len(elapsed) * 0.9)]:>10.3f}"
+                  f"{median(r[1] for r in runs):>10.0f}{sum(r[2] for r in runs) / len(runs):>8.2f}"
+                  f"{sum(r[3] for r in runs) / len(runs):>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
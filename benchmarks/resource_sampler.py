@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+进程资源采样
+采样进程树（例如chromedriver及其启动的浏览器）的CPU时间和常驻内存，供基准测试对比资源占用
+"""
+
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows没有resource模块
+    resource = None
+
+
+class ResourceSampler:
+    """采样当前进程及浏览器子进程的CPU时间和常驻内存(RSS)"""
+
+    def __init__(self, root_pid=None):
+        self.root_pid = root_pid or os.getpid()
+        self.samples = []
+
+    def sample(self):
+        cpu, rss = self._read_tree(self.root_pid)
+        self.samples.append({'t': time.monotonic(), 'cpu': cpu, 'rss': rss})
+        return self.samples[-1]
+
+    def summary(self):
+        if len(self.samples) < 2:
+            return {'samples': len(self.samples)}
+        first, last = self.samples[0], self.samples[-1]
+        wall = last['t'] - first['t']
+        cpu = last['cpu'] - first['cpu']
+        return {
+            'samples': len(self.samples),
+            'wall_seconds': round(wall, 3),
+            'cpu_seconds': round(cpu, 3),
+            'cpu_percent': round(cpu / wall * 100, 2) if wall > 0 else 0.0,
+            'rss_max_mb': round(max(s['rss'] for s in self.samples) / 1048576, 1),
+            'rss_last_mb': round(last['rss'] / 1048576, 1),
+        }
+
+    def _read_tree(self, root_pid):
+        """Linux下遍历/proc累加整个进程树；其它平台只统计当前进程"""
+        if not os.path.isdir('/proc'):
+            return self._read_self()
+
+        children = {}
+        stats = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat', 'r') as f:
+                    fields = f.read().rsplit(')', 1)[1].split()
+            except (OSError, IndexError):
+                continue
+            pid, ppid = int(entry), int(fields[1])
+            children.setdefault(ppid, []).append(pid)
+            # utime + stime（时钟滴答），rss（页数）
+            stats[pid] = (int(fields[11]) + int(fields[12]), int(fields[21]))
+
+        ticks = os.sysconf('SC_CLK_TCK')
+        page_size = os.sysconf('SC_PAGE_SIZE')
+        cpu_ticks, rss_pages = 0, 0
+        stack = [root_pid]
+        while stack:
+            pid = stack.pop()
+            if pid in stats:
+                cpu_ticks += stats[pid][0]
+                rss_pages += stats[pid][1]
+            stack.extend(children.get(pid, []))
+        return cpu_ticks / ticks, rss_pages * page_size
+
+    @staticmethod
+    def _read_self():
+        cpu = time.process_time()
+        rss = 0
+        if resource is not None:
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # macOS单位为字节，其它平台为KB
+            if sys.platform != 'darwin':
+                rss *= 1024
+        return cpu, rss
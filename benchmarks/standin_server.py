@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地淘宝替身服务器
+模拟购物车、订单确认、收银台和支付结果页面，供基准测试在不访问真实淘宝的情况下运行。
+购物车页面同时带有firstData，并接受taobao_api的结算、立即购买和提交订单POST，
+HTTP路径可以把taobao_api的URL常量指向这里
+"""
+
+import json
+import time
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CART_ROW_TEMPLATE = """
+<div class="cart-item" data-item-id="{item_id}" data-sku-id="{sku_id}" data-price="{price}">
+    <input type="checkbox" class="item-check">
+    <a href="https://item.taobao.com/item.htm?id={item_id}&skuId={sku_id}">商品{index}</a>
+    <span class="price">¥{price}</span>
+</div>
+"""
+
+
+# 替身登录用户，get_buy_cart从s_tag响应头中取出
+USER_ID = '2200000001'
+
+
+def render_first_data(rows=50):
+    """与购物车商品行一致的firstData，每个卖家10行"""
+    shops = {}
+    for i in range(rows):
+        seller_id = str(3300000000 + i // 10)
+        shops.setdefault(seller_id, []).append({
+            'cartId': str(900000 + i), 'itemId': str(100000 + i), 'skuId': str(200000 + i), 'sellerId': seller_id,
+            'title': f"商品{i}", 'amount': {'now': 1}, 'price': {'now': (10 + i) * 100},
+            'cartActiveInfo': {'cartBcParams': f"buyerCondition~0~~cartCreateTime~{i}"},
+            'toBuyInfo': {'cart_created_time': str(1600000000000 + i)}, 'isValid': True,
+        })
+    return json.dumps({'list': [{'sellerId': seller_id, 'bundles': [{'sellerId': seller_id, 'orders': orders}]}
+                                for seller_id, orders in shops.items()]}, ensure_ascii=False)
+
+
+def render_order_data(items):
+    """订单确认页中的orderData，字段满足taobao_api.parse_order_data"""
+    extension = {'secretValue': 'standin-secret', 'sparam1': 'standin-sparam', 'input_charset': 'utf-8',
+                 'event_submit_do_confirm': '1'}
+    data = {'submitOrderPC_1': {'submit': 'true', 'hidden': {'extensionMap': extension}}}
+    for item_id in items:
+        data[f"item_{item_id}"] = {'submit': 'true', 'fields': {'itemId': item_id, 'quantity': 1}}
+    return json.dumps({'endpoint': {'mode': 'standin'}, 'data': data,
+                       'hierarchy': {'structure': {'root': list(data)}, 'root': 'root'},
+                       'linkage': {'url': '/auction/order/confirm_order.htm', 'common': {}}}, ensure_ascii=False)
+
+
+def render_cart_page(rows=50):
+    """生成带rows行商品的购物车页面"""
+    items = "".join(
+        CART_ROW_TEMPLATE.format(item_id=100000 + i, sku_id=200000 + i, index=i, price=10 + i)
+        for i in range(rows)
+    )
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>淘宝网 - 我的购物车</title></head>
+<body>
+<script>try{{var firstData = {render_first_data(rows)};}}catch(e){{}}</script>
+<div id="ice-container">
+    <label><input type="checkbox" class="select-all"><span>全选</span></label>
+    {items}
+    <div class="footer">
+        <span class="total">合计: ¥<em id="total">0</em></span>
+        <button class="btn-settlement" data-spm="settlement" style="width:120px;height:40px"
+                onclick="settle()">结算</button>
+    </div>
+</div>
+<script>
+// 模拟React购物车：每次勾选变化都重新渲染所有商品行并重算合计
+document.addEventListener('change', function(e) {{
+    if(e.target.classList.contains('select-all')) {{
+        [].forEach.call(document.querySelectorAll('.cart-item .item-check'), function(cb) {{
+            cb.checked = e.target.checked;
+        }});
+    }}
+    recalc();
+}});
+function recalc() {{
+    var sum = 0;
+    [].forEach.call(document.querySelectorAll('.cart-item'), function(row) {{
+        var checked = row.querySelector('.item-check').checked;
+        row.className = checked ? 'cart-item checked' : 'cart-item';
+        row.offsetHeight;
+        if(checked) sum += Number(row.getAttribute('data-price'));
+    }});
+    document.getElementById('total').textContent = sum.toFixed(2);
+}}
+function settle() {{
+    var ids = [].map.call(document.querySelectorAll('.cart-item .item-check:checked'), function(cb) {{
+        return cb.closest('.cart-item').getAttribute('data-item-id');
+    }});
+    location.href = '/order/confirm_order.htm?items=' + ids.join(',');
+}}
+</script>
+</body></html>"""
+
+
+def render_order_page(items):
+    """订单确认页，提交后跳转收银台"""
+    rows = "".join(f'<div class="order-item">商品 {item_id}</div>' for item_id in items)
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>确认订单</title></head>
+<body>
+<div id="ice-container">
+    <h2>确认订单</h2>
+    {rows}
+    <div class="footer">商品总价: ¥{len(items) * 10}
+        <button class="go-btn" style="width:120px;height:40px"
+                onclick="location.href='/cashier.htm?items={','.join(items)}'">提交订单</button>
+    </div>
+</div>
+<script>var orderData= {render_order_data(items)};
+</script>
+</body></html>"""
+
+
+def render_cashier_page(items):
+    """收银台，输入支付密码后跳转支付结果页"""
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>收银台</title></head>
+<body>
+<div id="container">
+    <h2>收银台</h2>
+    <p>订单商品: {','.join(items)}</p>
+    <input class="sixDigitPassword" type="password" maxlength="6" style="width:200px;height:30px">
+    <button id="J_authSubmit" style="width:120px;height:40px"
+            onclick="location.href='/pay_success.htm?items={','.join(items)}'">确认付款</button>
+</div>
+</body></html>"""
+
+
+PAY_SUCCESS_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>支付成功</title></head>
+<body><h2>支付成功</h2></body></html>"""
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """替身请求处理器，所有请求都视为已登录"""
+
+    cart_rows = 50
+    page_delay = 0.0
+    hits = {}
+    orders = []
+    webhook_delay = 0.0
+    webhook_messages = []
+    # 商品开放时间（time.time()秒），None表示一直可购买
+    open_at = None
+    # 可用性接口每秒最多响应次数，超过返回429；0表示不限流
+    status_rate_limit = 0
+    status_window = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def _count(self):
+        key = (self.command, self.path.split('?')[0])
+        self.hits[key] = self.hits.get(key, 0) + 1
+
+    def _send(self, body, content_type='text/html; charset=utf-8', status=200, headers=None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Set-Cookie', 'cookie2=standin; Path=/')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+    def do_HEAD(self):
+        self._count()
+        self._send('')
+
+    def do_GET(self):
+        self._count()
+        url = urlparse(self.path)
+        items = [i for i in parse_qs(url.query).get('items', [''])[0].split(',') if i]
+        if url.path in ('/', '/cart.htm', '/order/confirm_order.htm', '/cashier.htm'):
+            # 模拟服务端渲染耗时
+            time.sleep(self.page_delay)
+        if url.path in ('/', '/cart.htm'):
+            self._send(render_cart_page(self.cart_rows), headers={'s_tag': f"|^taoMainUser:{USER_ID}:^"})
+        elif url.path == '/order/confirm_order.htm':
+            self._send(render_order_page(items))
+        elif url.path == '/cashier.htm':
+            # 进入收银台即视为下单成功
+            self.orders.append(items)
+            self._send(render_cashier_page(items))
+        elif url.path == '/item_status':
+            self._send_item_status()
+        elif url.path == '/pay_success.htm':
+            self._send(PAY_SUCCESS_PAGE)
+        else:
+            self._send('not found', status=404)
+
+    def _send_item_status(self):
+        now = time.time()
+        window = self.status_window
+        window[:] = [t for t in window if now - t < 1.0]
+        if self.status_rate_limit and len(window) >= self.status_rate_limit:
+            self._send('{"error": "too many requests"}', content_type='application/json', status=429)
+            return
+        window.append(now)
+        purchasable = self.open_at is None or now >= self.open_at
+        self._send(json.dumps({'purchasable': purchasable}), content_type='application/json')
+
+    def do_POST(self):
+        self._count()
+        path = self.path.split('?')[0]
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8') if length else ''
+        form = {k: v[0] for k, v in parse_qs(body).items()}
+        if path in ('/auction/order/confirm_order.htm', '/auction/buy_now.jhtml'):
+            # 购物车结算(item=购物车id_商品id_...)或立即购买(item_id)，都返回订单确认页
+            time.sleep(self.page_delay)
+            items = [form['item_id']] if form.get('item_id') else form.get('item', '').split('_')[1:2]
+            self._send(render_order_page(items))
+        elif path == '/auction/confirm_order.htm':
+            # 提交订单：和淘宝一样重定向到收银台，进入收银台时记录订单
+            item_id = parse_qs(urlparse(self.path).query).get('x-itemid', [''])[0]
+            self._send('', status=302, headers={'Location': f'/cashier.htm?items={item_id}'})
+        elif path == '/webhook':
+            # 模拟较慢的推送服务
+            time.sleep(self.webhook_delay)
+            self.webhook_messages.append(json.loads(body or '{}').get('msg'))
+            self._send('{"code": 202}', content_type='application/json')
+        else:
+            self._send('not found', status=404)
+
+
+class StandInServer:
+    """在后台线程运行的替身服务器"""
+
+    def __init__(self, host='127.0.0.1', port=0, cart_rows=50, webhook_delay=0.0, page_delay=0.0,
+                 open_at=None, status_rate_limit=0):
+        handler = type('Handler', (StandInHandler,), {
+            'cart_rows': cart_rows, 'page_delay': page_delay, 'hits': {}, 'orders': [],
+            'webhook_delay': webhook_delay, 'webhook_messages': [],
+            'open_at': open_at, 'status_rate_limit': status_rate_limit, 'status_window': [],
+        })
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.handler = handler
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def hits(self):
+        return self.handler.hits
+
+    @property
+    def orders(self):
+        """已提交订单的商品ID列表"""
+        return self.handler.orders
+
+    @property
+    def webhook_messages(self):
+        return self.handler.webhook_messages
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    server = StandInServer(port=8765)
+    print(f"替身服务器已启动: {server.base_url}")
+    server.httpd.serve_forever()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+无头命令行入口
+读取JSON配置，在无头Chrome中运行抢购，结束时输出结构化JSON结果（含各阶段耗时），
+日志输出到stderr，stdout只有结果JSON，便于批量调度
+
+用法: python cli.py config.json [--headed] [--dry-run] [--output result.json]
+
+config.json示例:
+{
+  "time": "2024-12-12 20:00:00",
+  "path": "browser",
+  "checkout": "cart",
+  "headless": true,
+  "concurrency": 2,
+  "arm_lead": 180,
+  "dry_run": false,
+  "timeouts": {"login": 60, "cart_load": 5, "order_load": 3},
+  "pacing": {"retry_interval": 0.05, "max_retry": 30, "policy": "adaptive"},
+  "accounts": [
+    {"name": "main", "cookies": "cookies/main.json", "password": "123456", "items": ["600001"]},
+    {"name": "alt", "cookies": "cookies/alt.json", "path": "http"},
+    {"name": "flash", "cookies": "cookies/flash.json", "items": ["600002:4800001"], "checkout": "buy_now"}
+  ]
+}
+"""
+
+import sys
+import json
+import logging
+import argparse
+from contextlib import redirect_stdout
+from datetime import datetime
+
+from seckill.log import setup_logging
+
+DEFAULTS = {
+    'path': 'browser',
+    'checkout': 'cart',
+    'headless': True,
+    'concurrency': 2,
+    'arm_lead': 180,
+    'dry_run': False,
+    'timeouts': {'login': 60, 'cart_load': 5, 'order_load': 3},
+    'pacing': {'retry_interval': 0.05, 'max_retry': 30, 'policy': 'adaptive'},
+}
+
+# 退出码
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_CONFIG = 2
+
+
+class ConfigError(ValueError):
+    """配置文件错误"""
+
+
+def load_config(path):
+    """读取配置并补全默认值"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ConfigError(f"无法读取配置文件 {path}: {e}")
+
+    config = dict(DEFAULTS)
+    config.update(raw)
+    for section in ('timeouts', 'pacing'):
+        config[section] = dict(DEFAULTS[section], **raw.get(section, {}))
+
+    if 'time' not in config:
+        raise ConfigError("缺少抢购时间 time")
+    try:
+        datetime.strptime(config['time'], '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        raise ConfigError(f"抢购时间格式应为 %Y-%m-%d %H:%M:%S: {config['time']}")
+    accounts = config.get('accounts') or [{'name': 'default'}]
+    names = [a.get('name') for a in accounts]
+    if None in names or len(set(names)) != len(names):
+        raise ConfigError("每个账号都需要唯一的 name")
+    config['accounts'] = accounts
+    return config
+
+
+def build_scheduler(config):
+    from seckill.scheduler import SeckillScheduler
+    from seckill.seckill_taobao import ChromeDrive
+
+    accounts = {a['name']: a for a in config['accounts']}
+
+    def driver_factory(name):
+        account = accounts[name]
+        chrome = ChromeDrive(
+            seckill_time=config['time'],
+            password=account.get('password'),
+            headless=config['headless'],
+            login_timeout=config['timeouts']['login'],
+            cookie_file=account.get('cookies'),
+            account=name,
+        )
+        chrome.login()
+        chrome.get_cookie()
+        return chrome.driver
+
+    scheduler = SeckillScheduler(
+        arm_lead=config['arm_lead'],
+        max_workers=config['concurrency'],
+        browsers_per_account=1,
+        driver_factory=driver_factory,
+        dry_run=config['dry_run'],
+        seckill_options={
+            'max_retry_count': config['pacing']['max_retry'],
+            'retry_interval': config['pacing']['retry_interval'],
+            'pacing': config['pacing']['policy'],
+            'cart_load_timeout': config['timeouts']['cart_load'],
+            'order_load_timeout': config['timeouts']['order_load'],
+        },
+    )
+    for account in config['accounts']:
+        scheduler.add_job(config['time'], account['name'], account.get('items', config.get('items')),
+                          account.get('path', config['path']), account.get('password'),
+                          account.get('checkout', config['checkout']))
+    return scheduler
+
+
+def run(config):
+    """执行配置中的所有任务，返回结果字典"""
+    from seckill.scheduler import SUCCEEDED
+
+    started = datetime.now()
+    scheduler = build_scheduler(config)
+    try:
+        scheduler.run_forever(exit_when_done=True)
+    finally:
+        scheduler.stop(wait=False)
+    finished = datetime.now()
+
+    jobs = [{
+        'id': job.job_id,
+        'account': job.account,
+        'path': job.path,
+        'checkout': job.checkout,
+        'time': job.fire_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'items': job.targets,
+        'status': job.status,
+        'error': job.error,
+        'timings_ms': job.timings,
+    } for job in scheduler.jobs]
+    return {
+        'ok': all(job.status == SUCCEEDED for job in scheduler.jobs),
+        'dry_run': config['dry_run'],
+        'started_at': started.isoformat(timespec='milliseconds'),
+        'finished_at': finished.isoformat(timespec='milliseconds'),
+        'elapsed_s': round((finished - started).total_seconds(), 3),
+        'jobs': jobs,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='淘宝秒杀无头命令行')
+    parser.add_argument('config', help='JSON配置文件')
+    parser.add_argument('--headed', action='store_true', help='显示浏览器窗口（覆盖配置中的headless）')
+    parser.add_argument('--dry-run', action='store_true', help='演练模式：走完整流程但不提交订单')
+    parser.add_argument('--output', default=None, help='结果JSON写入文件，默认输出到stdout')
+    parser.add_argument('--log-level', default='INFO', help='日志级别')
+    args = parser.parse_args(argv)
+
+    # 日志和其他输出都走stderr，stdout只留给结果JSON
+    setup_logging(getattr(logging, args.log_level.upper(), logging.INFO), stream=sys.stderr)
+    try:
+        config = load_config(args.config)
+    except ConfigError as e:
+        result, code = {'ok': False, 'error': str(e), 'jobs': []}, EXIT_CONFIG
+    else:
+        if args.headed:
+            config['headless'] = False
+        if args.dry_run:
+            config['dry_run'] = True
+        with redirect_stdout(sys.stderr):
+            try:
+                result = run(config)
+            except Exception as e:
+                result = {'ok': False, 'error': str(e), 'jobs': []}
+        code = EXIT_OK if result['ok'] else EXIT_FAILED
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,30 +2,97 @@
 # -*- coding: utf-8 -*-
 __author__ = 'Jerry'
 import datetime
+import queue
 from tkinter import *
-from seckill.seckill_taobao import ChromeDrive
-
-
-
-def run_killer(txt, txt2):
-    seckill_time = txt.get()
-    password = str(txt2.get())
-    print(seckill_time, password)
-    
-    # 使用优化版秒杀
-    from optimized_sec_kill import optimized_sec_kill_method
-    driver = ChromeDrive(seckill_time = seckill_time, password = password)
-    # 替换原有的sec_kill方法
-    driver.sec_kill = lambda: optimized_sec_kill_method(driver)
-    driver.sec_kill()
-
+from seckill.worker import SeckillWorker, STATUS, CLOCK, PHASE, DONE
+
+# 界面刷新间隔（毫秒）
+POLL_INTERVAL = 100
+
+
+class KillerView:
+    """界面状态：抢购在SeckillWorker线程执行，这里只在Tk主线程用after()轮询事件队列并刷新标签"""
+
+    def __init__(self, win, start_button, cancel_button):
+        self.win = win
+        self.start_button = start_button
+        self.cancel_button = cancel_button
+        self.events = queue.Queue()
+        self.worker = None
+        self.target = None
+        self.offset = 0.0
+        self.phases = []
+        self.countdown = StringVar(value='倒计时：--')
+        self.clock = StringVar(value='时钟偏差：--')
+        self.status = StringVar(value='状态：空闲')
+        self.latency = StringVar(value='')
+
+    def start(self, txt, txt2):
+        seckill_time = txt.get()
+        password = str(txt2.get())
+        try:
+            self.target = datetime.datetime.strptime(seckill_time, '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            self.status.set('状态：开抢时间格式错误')
+            return
+        self.offset = 0.0
+        self.phases = []
+        self.latency.set('')
+        self.worker = SeckillWorker(seckill_time, password, self.events).start()
+        self.start_button.config(state=DISABLED)
+        self.cancel_button.config(state=NORMAL)
+        self.status.set('状态：已启动')
+        self.win.after(POLL_INTERVAL, self.poll)
+
+    def cancel(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.cancel_button.config(state=DISABLED)
+
+    def poll(self):
+        done = False
+        while True:
+            try:
+                kind, data = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == STATUS:
+                self.status.set('状态：%s' % data)
+            elif kind == CLOCK:
+                self.offset = data[0] / 1000
+                self.clock.set('时钟偏差：%+.0fms（往返%.0fms）' % data)
+            elif kind == PHASE:
+                self.phases.append('%s %.0fms' % data)
+                self.latency.set('\n'.join(self.phases[-6:]))
+            elif kind == DONE:
+                success, error = data
+                if success is None:
+                    self.status.set('状态：已取消')
+                elif success:
+                    self.status.set('状态：抢购成功')
+                else:
+                    self.status.set('状态：抢购失败%s' % ('：' + error if error else ''))
+                done = True
+
+        if self.target is not None:
+            # 按服务器时间计算剩余时间
+            now = datetime.datetime.now() + datetime.timedelta(seconds=self.offset)
+            remaining = (self.target - now).total_seconds()
+            self.countdown.set('倒计时：%.1f秒' % remaining if remaining > 0 else '倒计时：已开抢')
+
+        if done:
+            self.worker = None
+            self.start_button.config(state=NORMAL)
+            self.cancel_button.config(state=DISABLED)
+        else:
+            self.win.after(POLL_INTERVAL, self.poll)
 
 
 def main():
     win = Tk()
     win.title('小熊秒杀助手')
     width = 380
-    height = 300
+    height = 420
     screenwidth = win.winfo_screenwidth()
     screenheight = win.winfo_screenheight()
     alignstr = '%dx%d+%d+%d' % (width, height, (screenwidth - width) / 2, (screenheight - height) / 2)
@@ -43,9 +110,15 @@ def main():
     txt2 = Entry(win, width = 18, show = '*')
     txt2.grid(column = 1, row = 1)
 
-    b1 = Button(win, text = '开始', command = lambda: run_killer(txt, txt2))
-    b1.config(font = 'Helvetica -10 bold', bg = 'red', relief = 'sunken', width = 8, height = 6)
+    b1 = Button(win, text = '开始')
+    b1.config(font = 'Helvetica -10 bold', bg = 'red', relief = 'sunken', width = 8, height = 3)
     b1.place(x=300, y=5)
+    b2 = Button(win, text = '取消', state = DISABLED)
+    b2.config(font = 'Helvetica -10 bold', width = 8, height = 2)
+    b2.place(x=300, y=65)
+    view = KillerView(win, b1, b2)
+    b1.config(command = lambda: view.start(txt, txt2))
+    b2.config(command = view.cancel)
     win.resizable(width = False, height = False)
 
     txt0 = Label(win, text = '使用说明:',width = 8, height = 2)
@@ -78,6 +151,10 @@ def main():
     txt9 = Label(win, text = '7、如果想手动付款，输入开抢时间后不用输入支付密码，直接点开始就可以了')
     txt9.config(font = 'Helvetica -10 bold', fg = 'red')
     txt9.place(x = 10, y = 240)
+
+    for i, var in enumerate((view.countdown, view.clock, view.status)):
+        Label(win, textvariable = var, font = 'Helvetica -11 bold').place(x = 10, y = 270 + i * 20)
+    Label(win, textvariable = view.latency, font = 'Helvetica -10', justify = LEFT).place(x = 10, y = 330)
     win.mainloop()
 
 
@@ -1,16 +1,68 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
+import logging
+import threading
+from contextlib import nullcontext
 from datetime import datetime
-from time import sleep
+from time import sleep, monotonic
+from urllib.parse import urlparse
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 from utils.utils import notify_user
+import seckill.settings as utils_settings
 from seckill.react_utils import ReactPageUtils
 from seckill.page_loader import PageLoader
+from seckill.script_runner import ScriptRunner
+from seckill.flow_state import FlowStateMachine, CART, ORDER, PAYMENT, ERROR
+from seckill.trace import TraceRecorder
+from seckill.timing import (PhaseTimer, WAIT, CART_LOAD, SELECT, SETTLE_CLICK, NAVIGATION,
+                            ORDER_LOAD, SUBMIT_CLICK, CASHIER, PAY)
+from seckill.snapshot import SnapshotService
+from seckill.payment import PaymentFlow, SUCCESS, FAILED
+from seckill.availability import AvailabilityWatcher
+from seckill.pacing import make_pacing
+from seckill.strategy_stats import StrategyStats, WON, MISSED, STALLED
+from seckill.cookie_store import AccountCookies
+from seckill.cart import Cart
+from seckill import taobao_api, recovery
+from seckill.log import get_logger, race_profile
+
+logger = get_logger('optimized_sec_kill')
+
+# 传统备用选择器（结算/提交），尝试顺序由StrategyStats按历史统计排定
+SETTLE_BACKUP_SELECTORS = [
+    (By.XPATH, "//button[contains(text(),'结算')]"),
+    (By.XPATH, "//a[contains(text(),'结算')]"),
+    (By.CSS_SELECTOR, "button[data-spm*='settlement']"),
+    (By.CSS_SELECTOR, "a[data-spm*='settlement']"),
+    (By.CSS_SELECTOR, "button[data-spm*='checkout']"),
+    (By.XPATH, "//button[contains(@class,'settlement')]"),
+    (By.XPATH, "//div[@role='button' and contains(text(),'结算')]"),
+    (By.XPATH, "//span[contains(text(),'结算')]/../.."),
+    (By.CSS_SELECTOR, "div[class*='checkout']"),
+    (By.CSS_SELECTOR, "span[class*='checkout']"),
+    (By.XPATH, "//button[contains(@onclick,'checkout')]"),
+    (By.XPATH, "//a[contains(@href,'checkout')]"),
+]
+SUBMIT_BACKUP_SELECTORS = [
+    (By.XPATH, "//button[contains(text(),'提交订单')]"),
+    (By.XPATH, "//button[contains(text(),'立即支付')]"),
+    (By.XPATH, "//a[contains(text(),'提交订单')]"),
+    (By.CSS_SELECTOR, "button[data-spm*='submit']"),
+    (By.CSS_SELECTOR, "button[data-spm*='order']"),
+    (By.CSS_SELECTOR, "input[type='submit']"),
+    (By.XPATH, "//button[contains(@class,'submit')]"),
+    (By.XPATH, "//div[@role='button' and contains(text(),'提交')]"),
+    (By.XPATH, "//button[contains(text(),'确认订单')]"),
+    (By.XPATH, "//button[contains(text(),'确认下单')]"),
+    (By.XPATH, "//span[contains(text(),'提交订单')]/../.."),
+    (By.CSS_SELECTOR, "button[class*='submit']"),
+    (By.CSS_SELECTOR, "div[class*='submit'][role='button']"),
+    (By.XPATH, "//button[contains(@onclick,'submit')]"),
+]
 
 class OptimizedSecKill:
     """
@@ -18,11 +70,54 @@ class OptimizedSecKill:
     支持React动态渲染、现代化选择器、智能等待机制
     """
     
-    def __init__(self, driver, seckill_time_obj, password=None, max_retry_count=30):
+    def __init__(self, driver, seckill_time_obj, password=None, max_retry_count=30,
+                 trace_page_context=False, race_log_level=logging.WARNING,
+                 snapshot_dir='snapshots', timing_path='timing_runs.jsonl', driver_pool=None,
+                 retry_interval=0.05, cart_load_timeout=5, order_load_timeout=3,
+                 cancel_event=None, listener=None, targets=None, availability_probe=None,
+                 availability_lead=None, pacing=None, dry_run=False, strategy_stats=None, buy_now=False,
+                 driver_factory=None):
         self.driver = driver
         self.seckill_time_obj = seckill_time_obj
         self.password = password
         self.max_retry_count = max_retry_count
+        self.retry_interval = retry_interval
+        # 节奏策略：重试/跳转检查间隔、刷新等待和停滞判定（seckill/pacing.py）
+        self.pacing = make_pacing(pacing or getattr(utils_settings, "PACING_POLICY", "adaptive"),
+                                  retry_interval=retry_interval)
+        # 结算/提交按钮查找策略的尝试顺序：按持久化的成功率和跳转耗时排序（seckill/strategy_stats.py）
+        self.strategies = strategy_stats if isinstance(strategy_stats, StrategyStats) else StrategyStats(
+            strategy_stats or getattr(utils_settings, "STRATEGY_STATS_PATH", 'strategy_stats.json'),
+            policy=getattr(utils_settings, "STRATEGY_POLICY", 'ucb'),
+        )
+        self.cart_load_timeout = cart_load_timeout
+        self.order_load_timeout = order_load_timeout
+        # 目标商品：商品ID或"商品ID:SKU ID"，为空时勾选购物车全部商品
+        self.targets = [str(t) for t in targets] if targets else []
+        # 立即购买：到点直接从第一个目标商品/SKU进入订单确认页，跳过购物车加载、勾选和结算
+        self.buy_now = bool(buy_now and self.targets)
+        if buy_now and not self.targets:
+            logger.warning("⚠️  立即购买需要指定目标商品，改走购物车结算")
+        # 可用性探测（可选）：标称时间前availability_lead秒开始轮询，探测到可购买立即开抢
+        self.availability_probe = availability_probe
+        self.availability_lead = (availability_lead if availability_lead is not None
+                                  else getattr(utils_settings, "AVAILABILITY_LEAD", 0) or 5)
+        # 取消信号：等待和重试循环都会检查，GUI取消时立即退出
+        self.cancel_event = cancel_event or threading.Event()
+        self.race_log_level = race_log_level
+        self.timing_path = timing_path
+        self.driver_pool = driver_pool
+        self.released = False  # 浏览器是否已归还/关闭
+        # 崩溃恢复：检查点记录流程阶段和恢复所需数据，看门狗发现浏览器失效后从浏览器池
+        # （没有池时用driver_factory）换一个浏览器，从检查点所在阶段继续（seckill/recovery.py）
+        self.driver_factory = driver_factory
+        self.checkpoint = recovery.Checkpoint()
+        self.watchdog = recovery.DriverWatchdog(driver, interval=getattr(utils_settings, "WATCHDOG_INTERVAL", 0.01))
+        self.max_recoveries = getattr(utils_settings, "MAX_RECOVERIES", 2)
+        self.recoveries = 0
+        # 演练模式：流程走到提交订单前为止，只检查提交按钮可用，不下单不支付
+        self.dry_run = dry_run
+        self.rehearsal = None
         # 缩短等待时间，提高响应速度
         self.wait_short = WebDriverWait(driver, 1)
         self.wait_medium = WebDriverWait(driver, 3)
@@ -30,27 +125,63 @@ class OptimizedSecKill:
         
         # 初始化工具模块
         self.react_utils = ReactPageUtils()
-        self.page_loader = PageLoader(driver)
+        # 所有注入脚本经ScriptRunner执行，页面内计时用于拆分脚本耗时与传输耗时
+        self.scripts = ScriptRunner(driver)
+        self.page_loader = PageLoader(driver, self.scripts)
+        self.state_machine = FlowStateMachine(driver, scripts=self.scripts)
+        # 调试轨迹：热路径只写内存，URL/标题按需在后台写入时采集
+        self.trace = TraceRecorder(
+            'debug_seckill.json',
+            context_provider=self._page_context if trace_page_context else None,
+            max_bytes=getattr(utils_settings, "TRACE_MAX_BYTES", 10 * 1024 * 1024),
+        )
+        # 阶段计时：每次运行追加到timing_runs.jsonl，用seckill/timing.py汇总
+        self.timer = PhaseTimer(listener=listener)
+        # 失败快照：后台抓取DOM(MHTML)、截图和最近的分析结果
+        self.snapshots = SnapshotService(driver, snapshot_dir) if snapshot_dir else None
         
-        print(f"🚀 OptimizedSecKill高性能版初始化完成")
-        print(f"   ⏰ 抢购时间: {seckill_time_obj}")
-        print(f"   🔄 最大重试次数: {max_retry_count}")
+        logger.info("🚀 OptimizedSecKill高性能版初始化完成")
+        logger.info("   ⏰ 抢购时间: %s", seckill_time_obj)
+        logger.info("   🔄 最大重试次数: %s", max_retry_count)
     
-    def save_debug_info(self, step, error=None):
-        """保存调试信息到文件"""
-        try:
-            debug_info = {
-                'timestamp': datetime.now().isoformat(),
-                'step': step,
-                'current_url': self.driver.current_url,
-                'page_title': self.driver.title,
-                'error': str(error) if error else None
-            }
-            
-            with open('debug_seckill.json', 'a', encoding='utf-8') as f:
-                f.write(json.dumps(debug_info, ensure_ascii=False) + '\n')
-        except:
-            pass
+    def _bind(self, driver):
+        """把所有持有浏览器的组件切换到driver（换浏览器恢复时使用）"""
+        self.driver = driver
+        self.wait_short = WebDriverWait(driver, 1)
+        self.wait_medium = WebDriverWait(driver, 3)
+        self.wait_long = WebDriverWait(driver, 5)
+        self.scripts.driver = driver
+        self.page_loader.driver = driver
+        self.state_machine.driver = driver
+        if self.snapshots is not None:
+            self.snapshots.rebind(driver)
+        self.watchdog.watch(driver)
+    
+    def save_debug_info(self, step, error=None, **fields):
+        """记录调试事件（内存缓冲，后台线程写入debug_seckill.json）"""
+        self.trace.record(step, error=error, **fields)
+    
+    def remember_result(self, name, result):
+        """记录分析脚本结果，失败快照时一并保存"""
+        if self.snapshots is not None:
+            self.snapshots.remember(name, result)
+        return result
+    
+    def run_script(self, name, script, *args, remember=False):
+        """执行页面脚本（带页面内计时），remember=True时结果随失败快照保存"""
+        result = self.scripts.run(name, script, *args)
+        if remember:
+            self.remember_result(name, result)
+        return result
+    
+    def capture_failure(self, reason, **fields):
+        """请求一次失败快照（非阻塞）"""
+        if self.snapshots is not None:
+            self.snapshots.capture(reason, **fields)
+    
+    def _page_context(self):
+        """当前页面URL和标题，仅在开启trace_page_context时由后台线程调用"""
+        return {'url': self.driver.current_url, 'title': self.driver.title}
     
     def check_login_status(self):
         """检查登录状态 - 快速版"""
@@ -64,7 +195,7 @@ class OptimizedSecKill:
             # 快速检查登录状态，只使用最可靠的指示器
             try:
                 # 使用JavaScript快速检查
-                is_logged_in = self.driver.execute_script("""
+                is_logged_in = self.run_script('login_check', """
                     // 快速检查登录状态的多个指示器
                     var indicators = [
                         document.querySelector('*[class*="user"]'),
@@ -85,37 +216,37 @@ class OptimizedSecKill:
                 """)
                 
                 if is_logged_in:
-                    print("✅ 快速检测到登录状态")
+                    logger.info("✅ 快速检测到登录状态")
                     return True
             except:
                 pass
             
-            print("⚠️  无法确定登录状态，默认继续")
+            logger.warning("⚠️  无法确定登录状态，默认继续")
             return True
             
         except Exception as e:
-            print(f"⚠️  登录状态检查失败: {e}")
+            logger.warning("⚠️  登录状态检查失败: %s", e)
             return True
     
     def select_all_items_safe(self):
         """选择购物车中的所有商品 - 高性能版"""
-        print("🛒 高速选择购物车商品...")
+        logger.info("🛒 高速选择购物车商品...")
         
         try:
             # 优先使用最高效的JavaScript方法
-            print("   ⚡ 使用高性能JavaScript选择...")
-            result = self.driver.execute_script(self.react_utils.get_select_products_script())
+            logger.debug("   ⚡ 使用高性能JavaScript选择...")
+            result = self.run_script('select_products', self.react_utils.get_select_products_script())
             
-            print(f"   📊 选择结果: 总共{result['total']}个，已选{result['selected']}个")
+            logger.debug("   📊 选择结果: 总共%s个，已选%s个", result['total'], result['selected'])
             
             if result['selected'] > 0:
                 # 快速验证
                 if self.verify_selection():
-                    print("✅ 高速选择成功！")
+                    logger.info("✅ 高速选择成功！")
                     return True
             
             # 如果JavaScript失败，尝试传统方法（但限制时间）
-            print("   🎯 备用方法: 查找全选复选框...")
+            logger.debug("   🎯 备用方法: 查找全选复选框...")
             try:
                 # 只尝试最有效的选择器
                 effective_selectors = [
@@ -130,31 +261,95 @@ class OptimizedSecKill:
                             element.click()
                             sleep(0.5)
                             if self.verify_selection():
-                                print(f"✅ {desc}选择成功！")
+                                logger.info("✅ %s选择成功！", desc)
                                 return True
                     except TimeoutException:
                         continue
             except:
                 pass
             
-            print("⚠️  商品选择完成，继续流程")
+            logger.warning("⚠️  商品选择完成，继续流程")
             return True  # 即使失败也继续，避免阻塞
             
         except Exception as e:
-            print(f"❌ 商品选择出错: {e}")
+            logger.error("❌ 商品选择出错: %s", e)
             return True  # 继续执行
     
+    def select_items(self):
+        """有目标商品时只勾选目标，否则全选"""
+        if self.targets:
+            return self.select_target_items()
+        return self.select_all_items_safe()
+    
+    def select_target_items(self):
+        """按商品/SKU ID一次性勾选目标行，全部切换完成后只等待一次合计金额"""
+        logger.info("🎯 勾选目标商品: %s", ', '.join(self.targets))
+        try:
+            result = self.run_script('select_items', self.react_utils.get_select_items_script(), self.targets)
+        except Exception as e:
+            logger.error("❌ 目标商品勾选出错: %s", e)
+            return False
+        
+        logger.debug("   📊 商品行%s个，命中%s个，已选%s个，取消%s个",
+                     result['rows'], result['found'], result['selected'], result['deselected'])
+        if result['missing']:
+            logger.warning("⚠️  购物车中未找到: %s", ', '.join(result['missing']))
+        if not result['selected']:
+            return False
+        
+        total_amount = self.wait_for_total()
+        if total_amount:
+            logger.info("✅ 目标商品已勾选: 合计 ¥%s", total_amount)
+        else:
+            logger.warning("⚠️  合计金额未更新，继续流程")
+        return True
+    
+    def wait_for_total(self, timeout=1.0, interval=0.05):
+        """等待合计金额大于0，返回金额，超时返回0"""
+        deadline = monotonic() + timeout
+        while True:
+            total_amount = self.run_script('verify_selection', self.react_utils.get_verify_selection_script())
+            if total_amount > 0 or monotonic() >= deadline:
+                return total_amount
+            sleep(interval)
+    
+    def wait_until(self, target):
+        """等待到target，被取消时返回False"""
+        while datetime.now() < target:
+            remaining = (target - datetime.now()).total_seconds()
+            if remaining > 1:
+                self.cancel_event.wait(min(0.3, remaining - 1))
+            else:
+                sleep(0.01)  # 更高精度等待
+            if self.cancel_event.is_set():
+                return False
+        return not self.cancel_event.is_set()
+    
+    def wait_for_availability(self):
+        """轮询可用性探测，返回探测结果，未开放/取消时返回None"""
+        watcher = AvailabilityWatcher(
+            self.availability_probe, self.seckill_time_obj,
+            lead=self.availability_lead,
+            give_up=getattr(utils_settings, "AVAILABILITY_GIVE_UP", 30),
+            max_probes=getattr(utils_settings, "AVAILABILITY_MAX_PROBES", 300),
+            max_rate=getattr(utils_settings, "AVAILABILITY_MAX_RATE", 20),
+            cancel_event=self.cancel_event,
+        )
+        result = watcher.wait()
+        self.save_debug_info("availability", **watcher.stats())
+        return result
+    
     def verify_selection(self):
         """验证商品是否已被选中 - 快速版"""
         try:
-            total_amount = self.driver.execute_script(self.react_utils.get_verify_selection_script())
+            total_amount = self.run_script('verify_selection', self.react_utils.get_verify_selection_script())
             
             if total_amount > 0:
-                print(f"   💰 合计金额: ¥{total_amount}")
+                logger.debug("   💰 合计金额: ¥%s", total_amount)
                 return True
             
             # 快速检查复选框状态
-            checked_count = self.driver.execute_script("""
+            checked_count = self.run_script('checked_count', """
                 return document.querySelectorAll('input[type="checkbox"]:checked:not(:disabled)').length;
             """)
             
@@ -166,10 +361,10 @@ class OptimizedSecKill:
     def check_cart_status(self):
         """检查购物车状态 - 快速版"""
         try:
-            total_amount = self.driver.execute_script(self.react_utils.get_verify_selection_script())
+            total_amount = self.run_script('verify_selection', self.react_utils.get_verify_selection_script())
             
             if total_amount > 0:
-                print(f"✅ 购物车正常: 合计 ¥{total_amount}")
+                logger.info("✅ 购物车正常: 合计 ¥%s", total_amount)
                 return "normal"
             else:
                 return "unselected"
@@ -177,544 +372,663 @@ class OptimizedSecKill:
         except:
             return "unknown"
     
-    def click_settlement_button(self):
-        """点击结算按钮 - 调试增强版"""
-        print("💰 智能查找结算按钮...")
+    def click_settlement_button(self, handle=None):
+        """点击结算按钮 - 调试增强版
+
+        handle为状态分类器已找到的结算按钮时直接点击，省去一次查找脚本；
+        各查找策略的尝试顺序由self.strategies按历史成功率和跳转耗时排定
+        """
+        logger.info("💰 智能查找结算按钮...")
         
         # 快速状态检查
         cart_status = self.check_cart_status()
         if cart_status == "unselected":
-            print("   ⚡ 快速选择商品...")
-            self.select_all_items_safe()
+            logger.debug("   ⚡ 快速选择商品...")
+            self.select_items()
             sleep(0.3)
         
         # 记录当前URL
         current_url_before = self.driver.current_url
-        print(f"   📍 点击前URL: {current_url_before}")
+        logger.debug("   📍 点击前URL: %s", current_url_before)
         
-        # 使用修复版JavaScript方法
         try:
-            result = self.driver.execute_script(self.react_utils.get_find_settlement_button_script())
-            
-            if result.get('success'):
-                print(f"✅ 找到结算按钮: {result.get('clicked')[:50]}...")
-                print(f"   🔧 使用方法: {result.get('method')}")
-                
-                # 等待页面响应
-                for i in range(10):  # 最多等待5秒
-                    sleep(0.5)
-                    
-                    # 检查URL是否发生变化
-                    current_url_after = self.driver.current_url
-                    if current_url_after != current_url_before:
-                        print(f"✅ 页面已跳转: {current_url_after}")
-                        return True
-                    
-                    # 检查是否出现了订单确认页面的内容
-                    page_info = self.driver.execute_script(self.react_utils.get_page_url_check_script())
-                    if page_info.get('isOrderPage'):
-                        print(f"✅ 检测到订单页面内容")
-                        return True
-                    
-                    # 检查页面内容变化
-                    if i % 2 == 1:  # 每1秒检查一次
-                        page_content = self.driver.execute_script("""
-                            return document.body.textContent.includes('提交订单') || 
-                                   document.body.textContent.includes('确认订单') ||
-                                   document.body.textContent.includes('商品总价');
-                        """)
-                        if page_content:
-                            print(f"✅ 检测到订单页面关键内容")
-                            return True
-                
-                print("⚠️  点击后页面未发生预期跳转")
-                return False
+            return self.strategies.run('settle', [
+                ('js_finder', lambda: self._settle_js_finder(handle, current_url_before)),
+                ('page_analysis', lambda: self._settle_page_analysis(current_url_before)),
+                ('deep_analysis', lambda: self._settle_deep_analysis(current_url_before)),
+                ('backup_selectors', lambda: self._click_backup_selectors(
+                    'settle.backup', SETTLE_BACKUP_SELECTORS, current_url_before, settle=1)),
+                ('powerful_click', lambda: self._settle_powerful_click(current_url_before)),
+            ])
+        except Exception as e:
+            logger.error("❌ 结算按钮点击过程出错: %s", e)
+            return False
+    
+    def _settle_js_finder(self, handle, current_url_before):
+        """修复版JavaScript查找（或直接点击状态分类器的按钮句柄）"""
+        with self.timer.span(SETTLE_CLICK, handle=handle is not None):
+            if handle is not None:
+                self.run_script('handle_click', "arguments[0].click();", handle)
+                result = {'success': True, 'clicked': '状态分类器按钮句柄', 'method': 'state-handle'}
             else:
-                print(f"⚠️  未找到结算按钮: {result.get('reason', '未知原因')}")
-                print(f"   📊 候选按钮数量: {result.get('candidates', 0)}")
-                
-                # 开始页面分析
-                print("🔍 开始分析页面结构...")
+                result = self.run_script('find_settlement', self.react_utils.get_find_settlement_button_script(), remember=True)
+        
+        if not result.get('success'):
+            logger.warning("⚠️  未找到结算按钮: %s", result.get('reason', '未知原因'))
+            logger.debug("   📊 候选按钮数量: %s", result.get('candidates', 0))
+            return MISSED
+        
+        self.timer.start(NAVIGATION)
+        logger.info("✅ 找到结算按钮: %.50s...", result.get('clicked'))
+        logger.debug("   🔧 使用方法: %s", result.get('method'))
+        
+        # 等待页面响应，最多5秒，轮询间隔由节奏策略决定
+        clicked_at = last_content_check = monotonic()
+        for _ in self.pacing.navigation_polls(5):
+            # 一次调用同时检查URL变化和订单页面状态
+            page = self.state_machine.classify()
+            if page.url != current_url_before:
+                self.pacing.navigated(monotonic() - clicked_at)
+                logger.info("✅ 页面已跳转: %s", page.url)
+                return WON
+            if page.state == ORDER:
+                self.pacing.navigated(monotonic() - clicked_at)
+                logger.info("✅ 检测到订单页面内容")
+                return WON
+            
+            # 检查页面内容变化（全文扫描较重，每秒一次）
+            if monotonic() - last_content_check >= 1.0:
+                last_content_check = monotonic()
+                page_content = self.run_script('order_content_check', """
+                    return document.body.textContent.includes('提交订单') || 
+                           document.body.textContent.includes('确认订单') ||
+                           document.body.textContent.includes('商品总价');
+                """)
+                if page_content:
+                    logger.info("✅ 检测到订单页面关键内容")
+                    return WON
+        
+        logger.warning("⚠️  点击后页面未发生预期跳转")
+        return STALLED
+    
+    def _settle_page_analysis(self, current_url_before):
+        # 开始页面分析
+        logger.info("🔍 开始分析页面结构...")
+        try:
+            analysis = self.run_script('page_analysis', self.react_utils.get_page_analysis_script(), remember=True)
+            
+            logger.debug("📊 页面分析结果:")
+            logger.debug("   - 按钮总数: %s", len(analysis.get('allButtons', [])))
+            logger.debug("   - 链接总数: %s", len(analysis.get('allLinks', [])))
+            logger.debug("   - 可点击元素: %s", len(analysis.get('allClickable', [])))
+            logger.debug("   - 文本匹配: %s", len(analysis.get('textMatches', [])))
+            logger.debug("   - SPM元素: %s", len(analysis.get('spmElements', [])))
+            
+            # 分析文本匹配的元素
+            text_matches = analysis.get('textMatches', [])
+            if text_matches:
+                logger.info("🎯 找到包含结算文本的元素:")
+                for i, match in enumerate(text_matches[:5]):  # 只显示前5个
+                    logger.debug("   %s. %s - '%.30s...' - 可点击: %s", i+1, match.get('tag'), match.get('text'), match.get('clickable'))
+                    if match.get('class'):
+                        logger.debug("      类名: %.50s", match.get('class'))
+                    if match.get('dataSpm'):
+                        logger.debug("      SPM: %s", match.get('dataSpm'))
+            
+            # 尝试点击文本匹配的可点击元素
+            logger.info("🎯 尝试点击文本匹配的元素...")
+            clickable_matches = [m for m in text_matches if m.get('clickable') and m.get('rect')]
+            clickable_matches.sort(key=lambda x: x.get('rect', {}).get('w', 0) * x.get('rect', {}).get('h', 0), reverse=True)
+            
+            for i, match in enumerate(clickable_matches[:3]):  # 尝试前3个最大的可点击元素
                 try:
-                    analysis = self.driver.execute_script(self.react_utils.get_page_analysis_script())
+                    logger.debug("   尝试点击第%s个匹配元素: %.30s", i+1, match.get('text'))
                     
-                    print(f"📊 页面分析结果:")
-                    print(f"   - 按钮总数: {len(analysis.get('allButtons', []))}")
-                    print(f"   - 链接总数: {len(analysis.get('allLinks', []))}")
-                    print(f"   - 可点击元素: {len(analysis.get('allClickable', []))}")
-                    print(f"   - 文本匹配: {len(analysis.get('textMatches', []))}")
-                    print(f"   - SPM元素: {len(analysis.get('spmElements', []))}")
+                    # 构建选择器
+                    selectors_to_try = []
+                    if match.get('id'):
+                        selectors_to_try.append(f"#{match.get('id')}")
+                    if match.get('dataSpm'):
+                        selectors_to_try.append(f"[data-spm='{match.get('dataSpm')}']")
+                    if match.get('class'):
+                        # 尝试用类名的第一个部分
+                        first_class = match.get('class').split()[0] if match.get('class') else ''
+                        if first_class:
+                            selectors_to_try.append(f".{first_class}")
                     
-                    # 分析文本匹配的元素
-                    text_matches = analysis.get('textMatches', [])
-                    if text_matches:
-                        print("🎯 找到包含结算文本的元素:")
-                        for i, match in enumerate(text_matches[:5]):  # 只显示前5个
-                            print(f"   {i+1}. {match.get('tag')} - '{match.get('text')[:30]}...' - 可点击: {match.get('clickable')}")
-                            if match.get('class'):
-                                print(f"      类名: {match.get('class')[:50]}")
-                            if match.get('dataSpm'):
-                                print(f"      SPM: {match.get('dataSpm')}")
+                    # 通用选择器
+                    tag = match.get('tag', '').lower()
+                    text = match.get('text', '')
+                    if len(text) < 50:
+                        selectors_to_try.append(f"{tag}[contains(text(),'{text[:20]}')]")
                     
-                    # 尝试点击文本匹配的可点击元素
-                    print("🎯 尝试点击文本匹配的元素...")
-                    clickable_matches = [m for m in text_matches if m.get('clickable') and m.get('rect')]
-                    clickable_matches.sort(key=lambda x: x.get('rect', {}).get('w', 0) * x.get('rect', {}).get('h', 0), reverse=True)
-                    
-                    for i, match in enumerate(clickable_matches[:3]):  # 尝试前3个最大的可点击元素
+                    for selector in selectors_to_try:
                         try:
-                            print(f"   尝试点击第{i+1}个匹配元素: {match.get('text')[:30]}")
+                            if selector.startswith('#') or selector.startswith('.') or selector.startswith('['):
+                                element = self.driver.find_element(By.CSS_SELECTOR, selector)
+                            else:
+                                element = self.driver.find_element(By.XPATH, f"//{selector}")
                             
-                            # 构建选择器
-                            selectors_to_try = []
-                            if match.get('id'):
-                                selectors_to_try.append(f"#{match.get('id')}")
-                            if match.get('dataSpm'):
-                                selectors_to_try.append(f"[data-spm='{match.get('dataSpm')}']")
-                            if match.get('class'):
-                                # 尝试用类名的第一个部分
-                                first_class = match.get('class').split()[0] if match.get('class') else ''
-                                if first_class:
-                                    selectors_to_try.append(f".{first_class}")
+                            element.click()
+                            logger.info("✅ 成功点击元素: %s", selector)
+                            sleep(1)
                             
-                            # 通用选择器
-                            tag = match.get('tag', '').lower()
-                            text = match.get('text', '')
-                            if len(text) < 50:
-                                selectors_to_try.append(f"{tag}[contains(text(),'{text[:20]}')]")
+                            # 检查是否跳转
+                            if self.driver.current_url != current_url_before:
+                                logger.info("✅ 页面分析策略成功跳转!")
+                                return WON
+                                
+                        except Exception as e:
+                            continue
                             
-                            for selector in selectors_to_try:
+                except Exception as e:
+                    logger.debug("   点击匹配元素失败: %s", e)
+                    continue
+            
+            # 如果文本匹配失败，尝试SPM元素
+            spm_elements = analysis.get('spmElements', [])
+            if spm_elements:
+                logger.info("🔧 尝试点击SPM元素...")
+                for i, spm_el in enumerate(spm_elements[:3]):
+                    try:
+                        spm_selector = f"[data-spm='{spm_el.get('spm')}']"
+                        element = self.driver.find_element(By.CSS_SELECTOR, spm_selector)
+                        element.click()
+                        logger.info("✅ 成功点击SPM元素: %s", spm_el.get('spm'))
+                        sleep(1)
+                        
+                        if self.driver.current_url != current_url_before:
+                            logger.info("✅ SPM策略成功跳转!")
+                            return WON
+                            
+                    except Exception as e:
+                        continue
+            
+        except Exception as e:
+            logger.warning("❌ 页面分析失败: %s", e)
+        return MISSED
+    
+    def _settle_deep_analysis(self, current_url_before):
+        # 深度分析 - 新增功能
+        logger.info("🔍 启动深度分析...")
+        try:
+            deep_analysis = self.run_script('deep_settlement_analysis', self.react_utils.get_deep_settlement_analysis_script(), remember=True)
+            
+            logger.debug("📊 深度分析结果:")
+            logger.debug("   - 结算容器: %s", len(deep_analysis.get('settlementContainers', [])))
+            logger.debug("   - 可点击子元素: %s", len(deep_analysis.get('clickableChildren', [])))
+            logger.debug("   - 页面按钮总数: %s", len(deep_analysis.get('allButtons', [])))
+            logger.debug("   - 推荐点击: %s", len(deep_analysis.get('recommendations', [])))
+            
+            # 显示推荐的点击目标
+            recommendations = deep_analysis.get('recommendations', [])
+            if recommendations:
+                logger.info("🎯 推荐的点击目标:")
+                for rec in recommendations[:5]:
+                    logger.debug("   %s. %.40s (得分: %s)", rec.get('rank', '?'), rec.get('text', ''), rec.get('score', 0))
+                    logger.debug("      方法: %s - %.60s", rec.get('method'), rec.get('selector', ''))
+            
+            # 尝试点击推荐的目标
+            logger.info("🚀 尝试点击推荐目标...")
+            recommendations.sort(key=lambda x: x.get('score', 0), reverse=True)
+            
+            for i, rec in enumerate(recommendations[:5]):
+                try:
+                    logger.debug("   尝试第%s个推荐: %.30s...", i+1, rec.get('text', ''))
+                    
+                    clicked = False
+                    if rec.get('method') == 'XPATH':
+                        xpath = rec.get('xpath')
+                        if xpath:
+                            elements = self.driver.find_elements(By.XPATH, xpath)
+                            for elem in elements:
                                 try:
-                                    if selector.startswith('#') or selector.startswith('.') or selector.startswith('['):
-                                        element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                                    else:
-                                        element = self.driver.find_element(By.XPATH, f"//{selector}")
-                                    
-                                    element.click()
-                                    print(f"✅ 成功点击元素: {selector}")
-                                    sleep(1)
-                                    
-                                    # 检查是否跳转
-                                    if self.driver.current_url != current_url_before:
-                                        print(f"✅ 页面分析策略成功跳转!")
-                                        return True
-                                        
+                                    elem.click()
+                                    logger.info("✅ XPATH点击成功: %s", xpath)
+                                    clicked = True
+                                    break
                                 except Exception as e:
                                     continue
-                                    
-                        except Exception as e:
-                            print(f"   点击匹配元素失败: {e}")
-                            continue
                     
-                    # 如果文本匹配失败，尝试SPM元素
-                    spm_elements = analysis.get('spmElements', [])
-                    if spm_elements:
-                        print("🔧 尝试点击SPM元素...")
-                        for i, spm_el in enumerate(spm_elements[:3]):
+                    elif rec.get('method') == 'CSS_SELECTOR':
+                        selector = rec.get('selector')
+                        if selector:
                             try:
-                                spm_selector = f"[data-spm='{spm_el.get('spm')}']"
-                                element = self.driver.find_element(By.CSS_SELECTOR, spm_selector)
+                                element = self.driver.find_element(By.CSS_SELECTOR, selector)
                                 element.click()
-                                print(f"✅ 成功点击SPM元素: {spm_el.get('spm')}")
-                                sleep(1)
-                                
-                                if self.driver.current_url != current_url_before:
-                                    print(f"✅ SPM策略成功跳转!")
-                                    return True
-                                    
+                                logger.info("✅ CSS选择器点击成功: %s", selector)
+                                clicked = True
                             except Exception as e:
-                                continue
+                                # 尝试JavaScript点击
+                                try:
+                                    self.run_script('selector_click', f"document.querySelector('{selector}').click();")
+                                    logger.info("✅ JavaScript点击成功: %s", selector)
+                                    clicked = True
+                                except Exception as e2:
+                                    continue
                     
+                    if clicked:
+                        sleep(2)  # 等待页面响应
+                        current_url_after = self.driver.current_url
+                        if current_url_after != current_url_before:
+                            logger.info("🎉 深度分析策略成功！页面已跳转: %s", current_url_after)
+                            return WON
+                        else:
+                            logger.debug("   页面未跳转，继续尝试下一个...")
+                            
                 except Exception as e:
-                    print(f"❌ 页面分析失败: {e}")
+                    logger.debug("   推荐目标%s点击失败: %s", i+1, e)
+                    continue
+            
+            # 如果推荐目标都失败，尝试直接点击包含"结算(数字)"的元素
+            logger.info("🎯 尝试直接点击结算数字元素...")
+            try:
+                # 构建更精确的XPATH
+                settlement_xpath = "//div[contains(text(), '结算') and contains(text(), '(') and contains(text(), ')')]"
+                elements = self.driver.find_elements(By.XPATH, settlement_xpath)
                 
-                # 深度分析 - 新增功能
-                print("🔍 启动深度分析...")
-                try:
-                    deep_analysis = self.driver.execute_script(self.react_utils.get_deep_settlement_analysis_script())
-                    
-                    print(f"📊 深度分析结果:")
-                    print(f"   - 结算容器: {len(deep_analysis.get('settlementContainers', []))}")
-                    print(f"   - 可点击子元素: {len(deep_analysis.get('clickableChildren', []))}")
-                    print(f"   - 页面按钮总数: {len(deep_analysis.get('allButtons', []))}")
-                    print(f"   - 推荐点击: {len(deep_analysis.get('recommendations', []))}")
-                    
-                    # 显示推荐的点击目标
-                    recommendations = deep_analysis.get('recommendations', [])
-                    if recommendations:
-                        print("🎯 推荐的点击目标:")
-                        for rec in recommendations[:5]:
-                            print(f"   {rec.get('rank', '?')}. {rec.get('text', '')[:40]} (得分: {rec.get('score', 0)})")
-                            print(f"      方法: {rec.get('method')} - {rec.get('selector', '')[:60]}")
-                    
-                    # 尝试点击推荐的目标
-                    print("🚀 尝试点击推荐目标...")
-                    recommendations.sort(key=lambda x: x.get('score', 0), reverse=True)
-                    
-                    for i, rec in enumerate(recommendations[:5]):
-                        try:
-                            print(f"   尝试第{i+1}个推荐: {rec.get('text', '')[:30]}...")
-                            
-                            clicked = False
-                            if rec.get('method') == 'XPATH':
-                                xpath = rec.get('xpath')
-                                if xpath:
-                                    elements = self.driver.find_elements(By.XPATH, xpath)
-                                    for elem in elements:
-                                        try:
-                                            elem.click()
-                                            print(f"✅ XPATH点击成功: {xpath}")
-                                            clicked = True
-                                            break
-                                        except Exception as e:
-                                            continue
+                for elem in elements:
+                    try:
+                        elem_text = elem.text.strip()
+                        if '结算' in elem_text and '(' in elem_text:
+                            logger.debug("   尝试点击: %.40s...", elem_text)
                             
-                            elif rec.get('method') == 'CSS_SELECTOR':
-                                selector = rec.get('selector')
-                                if selector:
-                                    try:
-                                        element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                                        element.click()
-                                        print(f"✅ CSS选择器点击成功: {selector}")
-                                        clicked = True
-                                    except Exception as e:
-                                        # 尝试JavaScript点击
-                                        try:
-                                            self.driver.execute_script(f"document.querySelector('{selector}').click();")
-                                            print(f"✅ JavaScript点击成功: {selector}")
-                                            clicked = True
-                                        except Exception as e2:
-                                            continue
+                            # 尝试多种点击方式
+                            click_methods = [
+                                lambda: elem.click(),
+                                lambda: self.run_script('element_click', "arguments[0].click();", elem),
+                                lambda: self.run_script('dispatch_click', "arguments[0].dispatchEvent(new MouseEvent('click', {bubbles: true}));", elem),
+                            ]
                             
-                            if clicked:
-                                sleep(2)  # 等待页面响应
-                                current_url_after = self.driver.current_url
-                                if current_url_after != current_url_before:
-                                    print(f"🎉 深度分析策略成功！页面已跳转: {current_url_after}")
-                                    return True
-                                else:
-                                    print(f"   页面未跳转，继续尝试下一个...")
-                                    
-                        except Exception as e:
-                            print(f"   推荐目标{i+1}点击失败: {e}")
-                            continue
-                    
-                    # 如果推荐目标都失败，尝试直接点击包含"结算(数字)"的元素
-                    print("🎯 尝试直接点击结算数字元素...")
-                    try:
-                        # 构建更精确的XPATH
-                        settlement_xpath = "//div[contains(text(), '结算') and contains(text(), '(') and contains(text(), ')')]"
-                        elements = self.driver.find_elements(By.XPATH, settlement_xpath)
-                        
-                        for elem in elements:
-                            try:
-                                elem_text = elem.text.strip()
-                                if '结算' in elem_text and '(' in elem_text:
-                                    print(f"   尝试点击: {elem_text[:40]}...")
-                                    
-                                    # 尝试多种点击方式
-                                    click_methods = [
-                                        lambda: elem.click(),
-                                        lambda: self.driver.execute_script("arguments[0].click();", elem),
-                                        lambda: self.driver.execute_script("arguments[0].dispatchEvent(new MouseEvent('click', {bubbles: true}));", elem),
-                                    ]
+                            for method in click_methods:
+                                try:
+                                    method()
+                                    sleep(1)
+                                    if self.driver.current_url != current_url_before:
+                                        logger.info("✅ 直接点击成功！")
+                                        return WON
+                                except Exception:
+                                    continue
                                     
-                                    for method in click_methods:
-                                        try:
-                                            method()
-                                            sleep(1)
-                                            if self.driver.current_url != current_url_before:
-                                                print(f"✅ 直接点击成功！")
-                                                return True
-                                        except Exception:
-                                            continue
-                                            
-                            except Exception as e:
-                                continue
-                                
                     except Exception as e:
-                        print(f"   直接点击失败: {e}")
-                    
-                except Exception as e:
-                    print(f"❌ 深度分析失败: {e}")
-                
-                # 备用方案：传统选择器
-                print("   🔄 尝试传统备用选择器...")
-                try:
-                    backup_selectors = [
-                        (By.XPATH, "//button[contains(text(),'结算')]"),
-                        (By.XPATH, "//a[contains(text(),'结算')]"),
-                        (By.CSS_SELECTOR, "button[data-spm*='settlement']"),
-                        (By.CSS_SELECTOR, "a[data-spm*='settlement']"),
-                        (By.CSS_SELECTOR, "button[data-spm*='checkout']"),
-                        (By.XPATH, "//button[contains(@class,'settlement')]"),
-                        (By.XPATH, "//div[@role='button' and contains(text(),'结算')]"),
-                        # 新增更多可能的选择器
-                        (By.XPATH, "//span[contains(text(),'结算')]/../.."),
-                        (By.CSS_SELECTOR, "div[class*='checkout']"),
-                        (By.CSS_SELECTOR, "span[class*='checkout']"),
-                        (By.XPATH, "//button[contains(@onclick,'checkout')]"),
-                        (By.XPATH, "//a[contains(@href,'checkout')]")
-                    ]
-                    
-                    for by_method, selector in backup_selectors:
-                        try:
-                            element = self.wait_short.until(EC.element_to_be_clickable((by_method, selector)))
-                            element.click()
-                            print(f"✅ 备用选择器成功: {selector}")
-                            sleep(1)
-                            
-                            # 检查是否跳转
-                            if self.driver.current_url != current_url_before:
-                                return True
-                                
-                        except TimeoutException:
-                            continue
-                        except Exception as e:
-                            continue
-                    
-                    print("❌ 所有备用选择器都失败")
-                except Exception as e:
-                    print(f"❌ 备用方案执行失败: {e}")
-                
-                # 最后的强力尝试
-                print("🚀 启动最后的强力点击尝试...")
-                try:
-                    powerful_result = self.driver.execute_script(self.react_utils.get_powerful_click_script())
-                    
-                    if powerful_result.get('success'):
-                        print(f"✅ 强力点击成功: {powerful_result.get('clicked')[:50]}")
-                        print(f"   🔧 使用方法: {powerful_result.get('method')}")
-                        
-                        # 等待并检查页面响应
-                        for check_i in range(8):  # 等待4秒
-                            sleep(0.5)
-                            current_url_check = self.driver.current_url
-                            if current_url_check != current_url_before:
-                                print(f"🎉 强力点击策略成功！页面已跳转!")
-                                return True
-                        
-                        print("⚠️  强力点击后页面未跳转")
-                    else:
-                        print(f"❌ 强力点击也失败: {powerful_result.get('reason', '未知')}")
-                        attempts = powerful_result.get('attempts', [])
-                        if attempts:
-                            print("   📝 尝试的元素:")
-                            for attempt in attempts[:3]:
-                                print(f"     - {attempt.get('tag')}: {attempt.get('text')[:40]} (得分: {attempt.get('score')})")
+                        continue
                         
-                except Exception as e:
-                    print(f"❌ 强力点击执行失败: {e}")
+            except Exception as e:
+                logger.debug("   直接点击失败: %s", e)
+            
+        except Exception as e:
+            logger.warning("❌ 深度分析失败: %s", e)
+        return MISSED
+    
+    def _settle_powerful_click(self, current_url_before):
+        # 最后的强力尝试
+        logger.info("🚀 启动最后的强力点击尝试...")
+        try:
+            powerful_result = self.run_script('powerful_click', self.react_utils.get_powerful_click_script(), remember=True)
+            
+            if powerful_result.get('success'):
+                logger.info("✅ 强力点击成功: %.50s", powerful_result.get('clicked'))
+                logger.debug("   🔧 使用方法: %s", powerful_result.get('method'))
                 
-                return False
+                # 等待并检查页面响应
+                for check_i in range(8):  # 等待4秒
+                    sleep(0.5)
+                    current_url_check = self.driver.current_url
+                    if current_url_check != current_url_before:
+                        logger.info("🎉 强力点击策略成功！页面已跳转!")
+                        return WON
+                
+                logger.warning("⚠️  强力点击后页面未跳转")
+            else:
+                logger.warning("❌ 强力点击也失败: %s", powerful_result.get('reason', '未知'))
+                attempts = powerful_result.get('attempts', [])
+                if attempts:
+                    logger.debug("   📝 尝试的元素:")
+                    for attempt in attempts[:3]:
+                        logger.debug("     - %s: %.40s (得分: %s)", attempt.get('tag'), attempt.get('text'), attempt.get('score'))
                 
         except Exception as e:
-            print(f"❌ 结算按钮点击过程出错: {e}")
+            logger.warning("❌ 强力点击执行失败: %s", e)
+        return MISSED
+    
+    def _click_backup_selectors(self, cascade, selectors, current_url_before, settle):
+        """传统备用选择器，逐个尝试的顺序同样按历史统计排定"""
+        logger.debug("   🔄 尝试传统备用选择器...")
+        outcome = self.strategies.run_outcome(cascade, [
+            (selector, lambda by_method=by_method, selector=selector: self._click_backup_selector(
+                by_method, selector, current_url_before, settle))
+            for by_method, selector in selectors
+        ])
+        if outcome == MISSED:
+            logger.warning("❌ 所有备用选择器都失败")
+        return outcome
+    
+    def _click_backup_selector(self, by_method, selector, current_url_before, settle):
+        """点击后页面未跳转返回STALLED，不再点击其他选择器（避免重复提交）"""
+        try:
+            element = self.wait_short.until(EC.element_to_be_clickable((by_method, selector)))
+            element.click()
+        except Exception:
+            return MISSED  # 超时或元素不可点击，换下一个选择器
+        logger.info("✅ 备用选择器成功: %s", selector)
+        try:
+            sleep(settle)
+            # 检查是否跳转
+            if self.driver.current_url != current_url_before:
+                return WON
+        except Exception:
+            pass
+        logger.warning("⚠️  备用选择器点击后页面未跳转: %s", selector)
+        return STALLED
+    
+    def open_buy_now(self):
+        """立即购买：POST详情页购买表单，等待订单确认页加载"""
+        item_id, sku_id = taobao_api.parse_target(self.targets[0])
+        logger.info("🛒 立即购买: 商品%s SKU %s", item_id, sku_id or '-')
+        return self.post_confirm_form(taobao_api.BUY_NOW_URL, taobao_api.buy_now_form(item_id, sku_id), buy_now=True)
+    
+    def post_confirm_form(self, url, fields, **attrs):
+        """在当前页面POST结算/购买表单，等待订单确认页加载"""
+        with self.timer.span(SETTLE_CLICK, **attrs):
+            self.run_script('buy_now', self.react_utils.get_buy_now_script(), url, fields)
+        self.timer.start(NAVIGATION)
+        
+        clicked_at = monotonic()
+        for _ in self.pacing.navigation_polls(5):
+            try:
+                # 旧页面上的标记消失说明订单确认页已开始加载
+                if self.run_script('buy_now_check', "return !window.__buyNowStale;"):
+                    self.pacing.navigated(monotonic() - clicked_at)
+                    logger.info("✅ 已进入订单确认页")
+                    return True
+            except WebDriverException as e:
+                if self.watchdog.report(e):
+                    raise
+                continue  # 页面切换中
+        logger.warning("⚠️  表单提交后页面未跳转")
+        return False
+    
+    def arm_checkpoint(self):
+        """布防时保存恢复所需的数据：登录cookie、当前页面和进入订单确认页的结算参数，并启动看门狗
+
+        在开抢前执行，不占用抢购时间；结算参数取自购物车页面的firstData，取不到时恢复会改为重新加载购物车
+        """
+        confirm = None
+        try:
+            cookies = AccountCookies(self.driver.get_cookies())
+            origin = self.driver.current_url
+            if not self.buy_now and len(self.targets) == 1:
+                # 结算表单只含一行商品，多个目标或整车结算时恢复仍走购物车
+                first_data = self.run_script('first_data', "return window.firstData || null;")
+                if first_data:
+                    item_id, sku_id = taobao_api.parse_target(self.targets[0])
+                    order = Cart.from_first_data(first_data).first_purchasable(item_id=item_id, sku_id=sku_id)
+                    confirm = order.confirm_args() if order is not None else None
+            self.checkpoint.advance(recovery.ARMED, cookies=cookies, origin=origin, confirm=confirm)
+        except Exception as e:
+            logger.warning("⚠️  检查点保存失败，浏览器崩溃时将无法恢复登录: %s", e)
+        self.watchdog.start()
+        self.save_debug_info("checkpoint", **self.checkpoint.to_json())
+    
+    def recover(self):
+        """浏览器失效后换一个浏览器，从检查点所在阶段继续；返回是否已恢复"""
+        checkpoint = self.checkpoint
+        self.save_debug_info("driver_dead", reason=self.watchdog.reason, recoveries=self.recoveries,
+                             **checkpoint.to_json())
+        if checkpoint.in_flight == recovery.SUBMITTING:
+            # 提交点击可能已经生效，换浏览器重新提交可能重复下单
+            logger.error("❌ 浏览器在提交订单时失效，订单可能已提交，请检查订单")
+            notify_user(msg="淘宝秒杀：浏览器在提交订单时崩溃，请检查订单")
+            return False
+        if (self.driver_pool is None and self.driver_factory is None) or self.recoveries >= self.max_recoveries:
+            logger.error("❌ 浏览器已失效(%s)，无法恢复", self.watchdog.reason)
+            return False
+        
+        self.recoveries += 1
+        dead, started = self.driver, monotonic()
+        logger.warning("🚑 第%s次换浏览器，从%s阶段继续...", self.recoveries, checkpoint.phase)
+        try:
+            if self.driver_pool is not None:
+                # 在后台关闭失效的浏览器，空出池中名额
+                threading.Thread(target=self.driver_pool.discard, args=(dead,), daemon=True).start()
+                driver = self.driver_pool.acquire(timeout=getattr(utils_settings, "RECOVERY_TIMEOUT", 10))
+            else:
+                threading.Thread(target=recovery.quit_driver, args=(dead,), daemon=True).start()
+                driver = self.driver_factory()
+            self._bind(driver)
+            self._resume()
+        except Exception as e:
+            logger.error("❌ 换浏览器失败: %s", e)
+            self.save_debug_info("recover_failed", e)
             return False
+        self.pacing.refreshed()
+        logger.warning("🚑 已换浏览器继续，耗时%.0fms", (monotonic() - started) * 1000)
+        self.save_debug_info("recovered", phase=checkpoint.phase, ms=(monotonic() - started) * 1000)
+        return True
+    
+    def _resume(self):
+        """在新浏览器上恢复登录，按检查点跳过已完成的阶段"""
+        checkpoint = self.checkpoint
+        if checkpoint.cookies:
+            self.driver.execute_cdp_cmd('Network.setCookies', {'cookies': checkpoint.cookies.to_cdp()})
+        if not checkpoint.at_least(recovery.FIRED):
+            # 还没开抢：回到布防时的页面，等待流程继续
+            self.driver.get(checkpoint.origin or "https://cart.taobao.com/cart.htm")
+            return
+        if not self.buy_now and checkpoint.confirm is None:
+            # 没有结算参数：重新加载并勾选购物车，由抢购循环点击结算
+            self.load_cart_and_select()
+            return
+        # 已有结算参数（或立即购买）：直接POST进入订单确认页，不再加载和勾选购物车；
+        # 订单确认页的提交令牌只能用一次，已到达订单页时同样重新POST取新的订单页
+        origin = checkpoint.origin or "https://cart.taobao.com/cart.htm"
+        if urlparse(self.driver.current_url).hostname != urlparse(origin).hostname:
+            self.driver.get(origin)  # POST需要从同一站点发出才会带上登录cookie
+        if self.buy_now:
+            self.open_buy_now()
+        else:
+            self.post_confirm_form(taobao_api.CONFIRM_URL, taobao_api.confirm_form(*checkpoint.confirm), resumed=True)
     
-    def submit_order(self):
-        """提交订单 - 深度分析增强版"""
-        print("📝 智能查找提交订单按钮...")
+    def rehearse_submit(self, handle=None):
+        """演练模式：定位提交订单按钮并检查是否可见、可用，不点击"""
+        script = self.react_utils.get_inspect_submit_button_script()
+        with self.timer.span(SUBMIT_CLICK, dry_run=True):
+            try:
+                result = self.run_script('inspect_submit', script, handle)
+            except WebDriverException:
+                # 订单页加载完成后句柄可能已失效，重新查找
+                result = self.run_script('inspect_submit', script, None)
+        result = result or {'found': False}
+        self.save_debug_info("rehearsal", **result)
+        logger.info("🎭 演练：提交按钮 %s", result)
+        return result
+    
+    def submit_order(self, handle=None):
+        """提交订单 - 深度分析增强版
+
+        handle为状态分类器已找到的提交按钮时直接点击，省去一次查找脚本；
+        各查找策略的尝试顺序由self.strategies按历史成功率和跳转耗时排定
+        """
+        logger.info("📝 智能查找提交订单按钮...")
         
         # 记录当前URL
         current_url_before = self.driver.current_url
-        print(f"   📍 提交前URL: {current_url_before}")
+        logger.debug("   📍 提交前URL: %s", current_url_before)
         
-        # 使用修复版JavaScript方法
         try:
-            result = self.driver.execute_script(self.react_utils.get_find_submit_button_script())
-            
-            if result.get('success'):
-                print(f"✅ 找到提交按钮: {result.get('clicked')}")
-                print(f"   🔧 使用方法: {result.get('method')}")
-                
-                # 等待页面响应
-                for i in range(15):  # 最多等待7.5秒
-                    sleep(0.5)
-                    
-                    # 检查URL是否跳转到支付页面
-                    current_url_after = self.driver.current_url
-                    if current_url_after != current_url_before:
-                        print(f"✅ 页面已跳转: {current_url_after}")
-                        
-                        # 检查是否是支付页面
-                        page_info = self.driver.execute_script(self.react_utils.get_page_url_check_script())
-                        if page_info.get('isPaymentPage'):
-                            print(f"🎉 成功跳转到支付页面！")
-                            return True
-                        elif 'cashier' in current_url_after or 'pay' in current_url_after:
-                            print(f"🎉 URL显示已到达支付页面！")
-                            return True
-                        else:
-                            print(f"⚠️  跳转了但可能不是支付页面: {current_url_after}")
-                            return True  # 先认为成功，避免重复提交
-                    
-                    # 检查页面内容变化
-                    if i % 2 == 1:  # 每1秒检查一次
-                        payment_content = self.driver.execute_script("""
-                            var text = document.body.textContent;
-                            return text.includes('支付宝') || 
-                                   text.includes('微信支付') ||
-                                   text.includes('确认支付') ||
-                                   text.includes('输入支付密码') ||
-                                   text.includes('收银台');
-                        """)
-                        if payment_content:
-                            print(f"✅ 检测到支付页面关键内容")
-                            return True
-                
-                print("⚠️  提交后页面未发生预期跳转")
-                return False
+            return self.strategies.run('submit', [
+                ('js_finder', lambda: self._submit_js_finder(handle, current_url_before)),
+                ('order_analysis', lambda: self._submit_order_analysis(current_url_before)),
+                ('powerful_click', lambda: self._submit_powerful_click(current_url_before)),
+                ('backup_selectors', lambda: self._click_backup_selectors(
+                    'submit.backup', SUBMIT_BACKUP_SELECTORS, current_url_before, settle=2)),
+            ])
+        except Exception as e:
+            logger.error("❌ 提交订单过程出错: %s", e)
+            return False
+    
+    def _submit_js_finder(self, handle, current_url_before):
+        """修复版JavaScript查找（或直接点击状态分类器的按钮句柄）"""
+        with self.timer.span(SUBMIT_CLICK, handle=handle is not None):
+            if handle is not None:
+                self.run_script('handle_click', "arguments[0].click();", handle)
+                result = {'success': True, 'clicked': '状态分类器按钮句柄', 'method': 'state-handle'}
             else:
-                print(f"⚠️  未找到提交按钮")
-                for line in result.get('results', []):
-                    print(f"   📝 {line}")
+                result = self.run_script('find_submit', self.react_utils.get_find_submit_button_script(), remember=True)
+        
+        if not result.get('success'):
+            logger.warning("⚠️  未找到提交按钮")
+            for line in result.get('results', []):
+                logger.debug("   📝 %s", line)
+            return MISSED
+        
+        self.timer.start(CASHIER)
+        logger.info("✅ 找到提交按钮: %s", result.get('clicked'))
+        logger.debug("   🔧 使用方法: %s", result.get('method'))
+        
+        # 等待页面响应
+        clicked_at = last_content_check = monotonic()
+        for _ in self.pacing.navigation_polls(7.5):  # 最多等待7.5秒
+            # 一次调用同时检查URL跳转和支付页面状态
+            page = self.state_machine.classify()
+            current_url_after = page.url
+            if current_url_after != current_url_before:
+                self.pacing.navigated(monotonic() - clicked_at)
+                logger.info("✅ 页面已跳转: %s", current_url_after)
                 
-                # 对订单页面进行深度分析
-                print("🔍 对订单页面启动深度分析...")
+                if page.state == PAYMENT:
+                    logger.info("🎉 成功跳转到支付页面！")
+                else:
+                    logger.warning("⚠️  跳转了但可能不是支付页面: %s", current_url_after)
+                return WON  # 跳转即认为成功，避免重复提交
+            
+            # 检查页面内容变化（全文扫描较重，每秒一次）
+            if monotonic() - last_content_check >= 1.0:
+                last_content_check = monotonic()
+                payment_content = self.run_script('payment_content_check', """
+                    var text = document.body.textContent;
+                    return text.includes('支付宝') || 
+                           text.includes('微信支付') ||
+                           text.includes('确认支付') ||
+                           text.includes('输入支付密码') ||
+                           text.includes('收银台');
+                """)
+                if payment_content:
+                    logger.info("✅ 检测到支付页面关键内容")
+                    return WON
+        
+        logger.warning("⚠️  提交后页面未发生预期跳转")
+        return STALLED
+    
+    def _submit_order_analysis(self, current_url_before):
+        # 对订单页面进行深度分析
+        logger.info("🔍 对订单页面启动深度分析...")
+        try:
+            # 使用专门的订单页面分析脚本
+            order_analysis = self.run_script('order_page_analysis', self.get_order_page_analysis_script(), remember=True)
+            
+            logger.debug("📊 订单页面分析结果:")
+            logger.debug("   - 按钮总数: %s", len(order_analysis.get('allButtons', [])))
+            logger.debug("   - 提交相关元素: %s", len(order_analysis.get('submitMatches', [])))
+            logger.debug("   - 推荐点击: %s", len(order_analysis.get('recommendations', [])))
+            
+            # 显示推荐的点击目标
+            recommendations = order_analysis.get('recommendations', [])
+            if recommendations:
+                logger.info("🎯 订单页面推荐点击目标:")
+                for rec in recommendations[:5]:
+                    logger.debug("   %s. %.40s (得分: %s)", rec.get('rank', '?'), rec.get('text', ''), rec.get('score', 0))
+                    logger.debug("      方法: %s - %.60s", rec.get('method'), rec.get('selector', ''))
+            
+            # 尝试点击推荐的目标
+            logger.info("🚀 尝试点击订单页面推荐目标...")
+            recommendations.sort(key=lambda x: x.get('score', 0), reverse=True)
+            
+            for i, rec in enumerate(recommendations[:5]):
+                clicked = False
                 try:
-                    # 使用专门的订单页面分析脚本
-                    order_analysis = self.driver.execute_script(self.get_order_page_analysis_script())
-                    
-                    print(f"📊 订单页面分析结果:")
-                    print(f"   - 按钮总数: {len(order_analysis.get('allButtons', []))}")
-                    print(f"   - 提交相关元素: {len(order_analysis.get('submitMatches', []))}")
-                    print(f"   - 推荐点击: {len(order_analysis.get('recommendations', []))}")
+                    logger.debug("   尝试第%s个推荐: %.30s...", i+1, rec.get('text', ''))
                     
-                    # 显示推荐的点击目标
-                    recommendations = order_analysis.get('recommendations', [])
-                    if recommendations:
-                        print("🎯 订单页面推荐点击目标:")
-                        for rec in recommendations[:5]:
-                            print(f"   {rec.get('rank', '?')}. {rec.get('text', '')[:40]} (得分: {rec.get('score', 0)})")
-                            print(f"      方法: {rec.get('method')} - {rec.get('selector', '')[:60]}")
+                    if rec.get('method') == 'XPATH':
+                        xpath = rec.get('xpath')
+                        if xpath:
+                            elements = self.driver.find_elements(By.XPATH, xpath)
+                            for elem in elements:
+                                try:
+                                    elem.click()
+                                    logger.info("✅ XPATH点击成功: %s", xpath)
+                                    clicked = True
+                                    break
+                                except Exception as e:
+                                    continue
                     
-                    # 尝试点击推荐的目标
-                    print("🚀 尝试点击订单页面推荐目标...")
-                    recommendations.sort(key=lambda x: x.get('score', 0), reverse=True)
+                    elif rec.get('method') == 'CSS_SELECTOR':
+                        selector = rec.get('selector')
+                        if selector:
+                            try:
+                                element = self.driver.find_element(By.CSS_SELECTOR, selector)
+                                element.click()
+                                logger.info("✅ CSS选择器点击成功: %s", selector)
+                                clicked = True
+                            except Exception as e:
+                                # 尝试JavaScript点击
+                                try:
+                                    self.run_script('selector_click', f"document.querySelector('{selector}').click();")
+                                    logger.info("✅ JavaScript点击成功: %s", selector)
+                                    clicked = True
+                                except Exception as e2:
+                                    continue
                     
-                    for i, rec in enumerate(recommendations[:5]):
-                        try:
-                            print(f"   尝试第{i+1}个推荐: {rec.get('text', '')[:30]}...")
-                            
-                            clicked = False
-                            if rec.get('method') == 'XPATH':
-                                xpath = rec.get('xpath')
-                                if xpath:
-                                    elements = self.driver.find_elements(By.XPATH, xpath)
-                                    for elem in elements:
-                                        try:
-                                            elem.click()
-                                            print(f"✅ XPATH点击成功: {xpath}")
-                                            clicked = True
-                                            break
-                                        except Exception as e:
-                                            continue
-                            
-                            elif rec.get('method') == 'CSS_SELECTOR':
-                                selector = rec.get('selector')
-                                if selector:
-                                    try:
-                                        element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                                        element.click()
-                                        print(f"✅ CSS选择器点击成功: {selector}")
-                                        clicked = True
-                                    except Exception as e:
-                                        # 尝试JavaScript点击
-                                        try:
-                                            self.driver.execute_script(f"document.querySelector('{selector}').click();")
-                                            print(f"✅ JavaScript点击成功: {selector}")
-                                            clicked = True
-                                        except Exception as e2:
-                                            continue
+                    if clicked:
+                        sleep(2)  # 等待页面响应
+                        current_url_after = self.driver.current_url
+                        if current_url_after != current_url_before:
+                            logger.info("🎉 订单页面深度分析策略成功！页面已跳转: %s", current_url_after)
+                            return WON
+                        # 提交点击可能已生效，不再点击其他推荐目标（避免重复提交）
+                        logger.warning("⚠️  点击推荐目标后页面未跳转")
+                        return STALLED
                             
-                            if clicked:
-                                sleep(2)  # 等待页面响应
-                                current_url_after = self.driver.current_url
-                                if current_url_after != current_url_before:
-                                    print(f"🎉 订单页面深度分析策略成功！页面已跳转: {current_url_after}")
-                                    return True
-                                else:
-                                    print(f"   页面未跳转，继续尝试下一个...")
-                                    
-                        except Exception as e:
-                            print(f"   推荐目标{i+1}点击失败: {e}")
-                            continue
-                    
                 except Exception as e:
-                    print(f"❌ 订单页面深度分析失败: {e}")
-                
-                # 强力点击订单提交相关元素
-                print("🚀 对订单页面启动强力点击...")
-                try:
-                    powerful_result = self.driver.execute_script(self.get_order_powerful_click_script())
-                    
-                    if powerful_result.get('success'):
-                        print(f"✅ 订单页面强力点击成功: {powerful_result.get('clicked')[:50]}")
-                        print(f"   🔧 使用方法: {powerful_result.get('method')}")
-                        
-                        # 等待并检查页面响应
-                        for check_i in range(10):  # 等待5秒
-                            sleep(0.5)
-                            current_url_check = self.driver.current_url
-                            if current_url_check != current_url_before:
-                                print(f"🎉 订单页面强力点击策略成功！页面已跳转!")
-                                return True
-                        
-                        print("⚠️  订单页面强力点击后页面未跳转")
-                    else:
-                        print(f"❌ 订单页面强力点击也失败: {powerful_result.get('reason', '未知')}")
-                        
-                except Exception as e:
-                    print(f"❌ 订单页面强力点击执行失败: {e}")
+                    if clicked:
+                        return STALLED
+                    logger.debug("   推荐目标%s点击失败: %s", i+1, e)
+                    continue
+            
+        except Exception as e:
+            logger.warning("❌ 订单页面深度分析失败: %s", e)
+        return MISSED
+    
+    def _submit_powerful_click(self, current_url_before):
+        # 强力点击订单提交相关元素
+        logger.info("🚀 对订单页面启动强力点击...")
+        clicked = False
+        try:
+            powerful_result = self.run_script('order_powerful_click', self.get_order_powerful_click_script(), remember=True)
+            
+            if powerful_result.get('success'):
+                clicked = True
+                logger.info("✅ 订单页面强力点击成功: %.50s", powerful_result.get('clicked'))
+                logger.debug("   🔧 使用方法: %s", powerful_result.get('method'))
                 
-                # 备用方案：传统选择器
-                print("   🔄 尝试传统备用提交方案...")
-                try:
-                    backup_selectors = [
-                        (By.XPATH, "//button[contains(text(),'提交订单')]"),
-                        (By.XPATH, "//button[contains(text(),'立即支付')]"),
-                        (By.XPATH, "//a[contains(text(),'提交订单')]"),
-                        (By.CSS_SELECTOR, "button[data-spm*='submit']"),
-                        (By.CSS_SELECTOR, "button[data-spm*='order']"),
-                        (By.CSS_SELECTOR, "input[type='submit']"),
-                        (By.XPATH, "//button[contains(@class,'submit')]"),
-                        (By.XPATH, "//div[@role='button' and contains(text(),'提交')]"),
-                        # 新增订单页面特有的选择器
-                        (By.XPATH, "//button[contains(text(),'确认订单')]"),
-                        (By.XPATH, "//button[contains(text(),'确认下单')]"),
-                        (By.XPATH, "//span[contains(text(),'提交订单')]/../.."),
-                        (By.CSS_SELECTOR, "button[class*='submit']"),
-                        (By.CSS_SELECTOR, "div[class*='submit'][role='button']"),
-                        (By.XPATH, "//button[contains(@onclick,'submit')]")
-                    ]
-                    
-                    for by_method, selector in backup_selectors:
-                        try:
-                            element = self.wait_short.until(EC.element_to_be_clickable((by_method, selector)))
-                            element.click()
-                            print(f"✅ 备用提交选择器成功: {selector}")
-                            sleep(2)
-                            
-                            # 检查是否跳转
-                            if self.driver.current_url != current_url_before:
-                                print(f"✅ 备用方案成功跳转")
-                                return True
-                                
-                        except TimeoutException:
-                            continue
-                        except Exception:
-                            continue
-                    
-                    print("❌ 所有备用提交方案都失败")
-                except Exception as e:
-                    print(f"❌ 备用提交方案执行失败: {e}")
+                # 等待并检查页面响应
+                for check_i in range(10):  # 等待5秒
+                    sleep(0.5)
+                    current_url_check = self.driver.current_url
+                    if current_url_check != current_url_before:
+                        logger.info("🎉 订单页面强力点击策略成功！页面已跳转!")
+                        return WON
                 
-                return False
+                logger.warning("⚠️  订单页面强力点击后页面未跳转")
+                return STALLED
+            else:
+                logger.warning("❌ 订单页面强力点击也失败: %s", powerful_result.get('reason', '未知'))
                 
         except Exception as e:
-            print(f"❌ 提交订单过程出错: {e}")
-            return False
+            logger.warning("❌ 订单页面强力点击执行失败: %s", e)
+            if clicked:
+                return STALLED
+        return MISSED
     
     def get_order_page_analysis_script(self):
         """订单页面专用分析脚本"""
@@ -932,202 +1246,297 @@ class OptimizedSecKill:
             return orderPowerfulClick();
         """
     
-    def optimized_sec_kill(self):
-        """优化版的秒杀主函数 - 修复版"""
-        print("🚀 开始智能秒杀流程...")
-        print(f"   ⏰ 当前时间: {datetime.now()}")
-        print(f"   🎯 目标时间: {self.seckill_time_obj}")
-        
-        # 精确等待到抢购时间
-        while datetime.now() < self.seckill_time_obj:
-            remaining = (self.seckill_time_obj - datetime.now()).total_seconds()
-            if remaining > 1:
-                sleep(min(0.3, remaining - 1))
-            else:
-                sleep(0.01)  # 更高精度等待
-        
-        print("⚡ 抢购时间到！开始智能执行...")
-        start_time = datetime.now()
-        
+    def load_cart_and_select(self):
+        """加载购物车并勾选目标商品；未登录时返回False"""
         # 步骤1：快速刷新和页面检查
         try:
-            print("🔄 快速刷新购物车...")
-            self.driver.get("https://cart.taobao.com/cart.htm")
-            
-            # 使用快速页面加载器
-            if self.page_loader.wait_for_cart_page_load(timeout=5):
-                print("✅ 页面快速加载完成")
-            else:
-                print("⚠️  页面加载超时，继续执行")
-            
-            # 快速登录检查
-            if not self.check_login_status():
-                print("❌ 未登录，秒杀失败")
+            with self.timer.span(CART_LOAD):
+                logger.info("🔄 快速刷新购物车...")
+                self.driver.get("https://cart.taobao.com/cart.htm")
+        
+                # 使用快速页面加载器
+                if self.page_loader.wait_for_cart_page_load(timeout=self.cart_load_timeout):
+                    logger.info("✅ 页面快速加载完成")
+                else:
+                    logger.warning("⚠️  页面加载超时，继续执行")
+        
+                # 快速登录检查
+                logged_in = self.check_login_status()
+            if not logged_in and not self.watchdog.probe():
+                return True  # 浏览器已失效，交给抢购循环换浏览器
+            if not logged_in:
+                logger.error("❌ 未登录，秒杀失败")
                 return False
-                
+        
         except Exception as e:
-            print(f"❌ 页面刷新失败: {e}")
+            logger.error("❌ 页面刷新失败: %s", e)
+            if self.watchdog.report(e):
+                return True  # 浏览器已失效，交给抢购循环换浏览器
             # 不return False，继续尝试
         
         # 步骤2：高速商品选择
-        print("⚡ 高速商品选择...")
-        self.select_all_items_safe()
+        logger.info("⚡ 高速商品选择...")
+        with self.timer.span(SELECT, targets=len(self.targets)):
+            self.select_items()
+        return True
+    
+    def optimized_sec_kill(self):
+        """优化版的秒杀主函数 - 修复版；结束（包括提前返回和异常）时关闭后台线程"""
+        try:
+            return self._run_race()
+        finally:
+            self.close()
+    
+    def close(self):
+        """停止看门狗，写出并关闭调试轨迹和失败快照"""
+        self.watchdog.stop()
+        self.trace.close()
+        if self.snapshots is not None:
+            self.snapshots.close()
+    
+    def _run_race(self):
+        logger.info("🚀 开始智能秒杀流程...")
+        logger.info("   ⏰ 当前时间: %s", datetime.now())
+        logger.info("   🎯 目标时间: %s", self.seckill_time_obj)
         
-        # 步骤3：智能抢购循环
+        # 从武装到抢购结束使用race日志档位，只输出WARNING及以上
         submit_success = False
         retry_count = 0
-        last_url = ""
-        stagnant_count = 0  # 页面无变化计数
+        self.arm_checkpoint()
+        with race_profile(self.race_log_level) if self.race_log_level else nullcontext():
+            # 精确等待到抢购时间；有可用性探测时提前开始轮询，开放即开抢
+            with self.timer.span(WAIT, probe=self.availability_probe is not None):
+                opened = None
+                if self.availability_probe is not None:
+                    opened = self.wait_for_availability()
+                    if opened is None and not self.cancel_event.is_set():
+                        logger.warning("⚠️  未探测到开放，按标称时间开抢")
+                if self.cancel_event.is_set() or (opened is None and not self.wait_until(self.seckill_time_obj)):
+                    logger.info("⏹️  抢购已取消")
+                    return False
         
-        print("🧠 开始智能抢购循环...")
+            logger.info("⚡ 抢购时间到！开始智能执行...")
+            start_time = datetime.now()
+            self.save_debug_info("fire")
+            self.checkpoint.advance(recovery.FIRED)
         
-        while not submit_success and retry_count < self.max_retry_count:
-            retry_count += 1
-            elapsed = (datetime.now() - start_time).total_seconds()
+            if self.buy_now:
+                # 立即购买：不加载购物车，直接进入订单确认页
+                try:
+                    self.open_buy_now()
+                except Exception as e:
+                    logger.error("❌ 立即购买请求失败: %s", e)
+                    self.watchdog.report(e)
+            elif not self.load_cart_and_select():
+                return False
+            if not self.watchdog.dead:
+                self.checkpoint.advance(recovery.CONFIRM)
+        
+            # 步骤3：智能抢购循环（状态机驱动，每轮一次页面内分类调用）
+            logger.info("🧠 开始智能抢购循环...")
+        
+            while not submit_success and retry_count < self.max_retry_count and not self.cancel_event.is_set():
+                if self.watchdog.dead and not self.recover():
+                    break
+                retry_count += 1
+                elapsed = (datetime.now() - start_time).total_seconds()
             
-            if retry_count % 3 == 1:  # 更频繁的进度报告
-                print(f"⚡ 第{retry_count}次抢购 (已用时{elapsed:.2f}秒)...")
+                if retry_count % 3 == 1:  # 更频繁的进度报告
+                    logger.info("⚡ 第%s次抢购 (已用时%.2f秒)...", retry_count, elapsed)
             
-            try:
-                # 获取当前页面状态
-                current_url = self.driver.current_url.lower()
-                page_info = self.driver.execute_script(self.react_utils.get_page_url_check_script())
-                
-                # 检测页面是否有变化
-                if current_url == last_url:
-                    stagnant_count += 1
-                else:
-                    stagnant_count = 0
-                    last_url = current_url
-                
-                # 如果页面长时间无变化，尝试刷新
-                if stagnant_count > 10:
-                    print("🔄 页面长时间无变化，尝试刷新...")
-                    self.driver.refresh()
-                    sleep(2)
-                    stagnant_count = 0
-                    continue
+                try:
+                    # 一次调用获取页面状态
+                    observed_at = monotonic()
+                    page = self.state_machine.observe()
+                    self.pacing.observe(page, monotonic() - observed_at)
+                    current_url = page.url.lower()
+                    if self.state_machine.changed:
+                        self.save_debug_info("state", state=page.state, via=page.via, retry=retry_count)
                 
-                # 智能判断当前页面状态并执行相应操作
-                if page_info.get('isCartPage') or 'cart' in current_url:
-                    # 在购物车页面，尝试点击结算
-                    print(f"📍 检测到购物车页面，尝试结算...")
-                    if self.click_settlement_button():
-                        print("✅ 结算按钮点击成功，等待页面跳转...")
-                        sleep(1)
+                    # 如果页面长时间无变化，尝试刷新
+                    if self.pacing.should_refresh():
+                        logger.info("🔄 页面长时间无变化，尝试刷新...")
+                        self.driver.refresh()
+                        sleep(self.pacing.refresh_delay())
+                        self.pacing.refreshed()
                         continue
-                    else:
-                        print("⚠️  结算按钮点击失败，继续重试...")
+                
+                    if page.state == CART and self.buy_now:
+                        logger.info("📍 仍在购物车页面，重新发起立即购买...")
+                        if not self.open_buy_now():
+                            self.capture_failure("buy_now_failed", retry=retry_count)
+                        
+                    elif page.state == CART:
+                        # 在购物车页面，尝试点击结算
+                        logger.info("📍 检测到购物车页面(%s)，尝试结算...", page.via)
+                        if self.click_settlement_button(handle=page.handle):
+                            logger.info("✅ 结算按钮点击成功，等待页面跳转...")
+                            sleep(self.pacing.settle_delay())
+                            continue
+                        else:
+                            logger.warning("⚠️  结算按钮点击失败，继续重试...")
+                            self.capture_failure("settle_failed", retry=retry_count)
                         
-                elif page_info.get('isOrderPage') or any(keyword in current_url for keyword in ['buy', 'order', 'confirm', 'checkout']):
-                    # 在订单确认页面，尝试提交订单
-                    print(f"📍 检测到订单确认页面，尝试提交...")
+                    elif page.state == ORDER:
+                        # 在订单确认页面，尝试提交订单
+                        logger.info("📍 检测到订单确认页面(%s)，尝试提交...", page.via)
                     
-                    # 第一次进入订单页面时等待加载
-                    if retry_count == 1 or 'order' not in last_url:
-                        print("📍 首次进入订单页面，等待加载...")
-                        self.page_loader.wait_for_order_page_load(timeout=3)
+                        # 刚进入订单页面时等待加载
+                        if self.state_machine.changed:
+                            self.timer.stop(NAVIGATION, via=page.via)
+                            self.checkpoint.advance(recovery.ORDER, order_url=page.url)
+                        if self.state_machine.changed and page.via == 'url':
+                            logger.info("📍 首次进入订单页面，等待加载...")
+                            with self.timer.span(ORDER_LOAD):
+                                self.page_loader.wait_for_order_page_load(timeout=self.order_load_timeout)
                     
-                    if self.submit_order():
+                        if self.dry_run:
+                            self.rehearsal = self.rehearse_submit(handle=page.handle)
+                            if self.rehearsal.get('found') and self.rehearsal.get('enabled'):
+                                self.checkpoint.advance(recovery.DONE)
+                                submit_success = True
+                                break
+                            logger.warning("⚠️  演练：提交按钮未就绪(%s)，继续重试...", self.rehearsal)
+                        else:
+                            # 点击结果确认前浏览器失效时不能确定是否已下单，恢复时不再重复提交
+                            self.checkpoint.attempt(recovery.SUBMITTING)
+                            if self.submit_order(handle=page.handle):
+                                self.checkpoint.attempt(None)
+                                self.checkpoint.advance(recovery.DONE)
+                                self.timer.stop(CASHIER)
+                                submit_success = True
+                                logger.info("🎉 订单提交成功！")
+                                break
+                            if not self.watchdog.probe():
+                                continue
+                            self.checkpoint.attempt(None)
+                            logger.warning("⚠️  订单提交失败，继续重试...")
+                            self.capture_failure("submit_failed", retry=retry_count)
+                        
+                    elif page.state == PAYMENT:
+                        # 已经到达支付页面
+                        logger.info("🎉 已成功到达支付页面！")
+                        self.checkpoint.advance(recovery.DONE)
+                        self.timer.stop(CASHIER)
                         submit_success = True
-                        print("🎉 订单提交成功！")
                         break
-                    else:
-                        print("⚠️  订单提交失败，继续重试...")
-                        
-                elif page_info.get('isPaymentPage') or any(keyword in current_url for keyword in ['cashier', 'pay']):
-                    # 已经到达支付页面
-                    print("🎉 已成功到达支付页面！")
-                    submit_success = True
-                    break
-                    
-                else:
-                    # 未知页面状态，尝试通用策略
-                    print(f"📍 未知页面状态: {current_url[:50]}...")
-                    
-                    # 检查页面内容来判断应该执行什么操作
-                    page_content = self.driver.execute_script("""
-                        var text = document.body.textContent;
-                        return {
-                            hasCart: text.includes('购物车') || text.includes('结算'),
-                            hasOrder: text.includes('提交订单') || text.includes('确认订单'),
-                            hasPayment: text.includes('支付') || text.includes('收银台'),
-                            hasError: text.includes('页面出错') || text.includes('网络异常')
-                        };
-                    """)
                     
-                    if page_content.get('hasError'):
-                        print("❌ 检测到页面错误，尝试刷新...")
+                    elif page.state == ERROR:
+                        logger.warning("❌ 检测到页面错误，尝试刷新...")
                         self.driver.refresh()
-                        sleep(2)
-                    elif page_content.get('hasCart'):
-                        print("🛒 页面包含购物车内容，尝试结算...")
-                        self.click_settlement_button()
-                    elif page_content.get('hasOrder'):
-                        print("📋 页面包含订单内容，尝试提交...")
-                        self.submit_order()
-                    elif page_content.get('hasPayment'):
-                        print("💳 页面包含支付内容，认为成功...")
-                        submit_success = True
-                        break
+                        sleep(self.pacing.refresh_delay())
+                        self.pacing.refreshed()
+                    
                     else:
-                        print("❓ 无法识别页面状态，重新导航到购物车...")
+                        logger.info("❓ 无法识别页面状态: %.50s...，重新导航到购物车...", current_url)
                         self.driver.get("https://cart.taobao.com/cart.htm")
-                        sleep(1)
+                        sleep(self.pacing.settle_delay())
                     
-            except Exception as e:
-                if retry_count % 5 == 0:  # 减少错误报告频率
-                    print(f"⚠️  第{retry_count}次抢购错误: {str(e)}")
-                self.save_debug_info("seckill_error", e)
+                except Exception as e:
+                    if self.watchdog.report(e):
+                        # 浏览器已失效，不再对着它重试，下一轮开头换浏览器
+                        continue
+                    if retry_count % 5 == 0:  # 减少错误报告频率
+                        logger.warning("⚠️  第%s次抢购错误: %s", retry_count, e)
+                    self.save_debug_info("seckill_error", e)
+                    self.capture_failure("seckill_error", retry=retry_count, error=str(e))
             
-            sleep(0.05)  # 更短的重试间隔
+                sleep(self.pacing.retry_interval())
+        self.watchdog.stop()
+        
+        if self.cancel_event.is_set():
+            logger.info("⏹️  抢购已取消")
+            self.save_timing(success=False, retries=retry_count, cancelled=True)
+            return False
         
         # 输出最终结果
         total_time = (datetime.now() - start_time).total_seconds()
+        dwell_times = self.state_machine.finish()
+        script_summary = self.scripts.summary()
+        self.save_debug_info("finish", success=submit_success, retries=retry_count,
+                             total_time=total_time, dwell=dwell_times, scripts=script_summary)
+        self.trace.flush()
+        if dwell_times:
+            logger.info("⏱️  各页面状态停留时长: %s", ", ".join(
+                f"{state}={seconds:.3f}s" for state, seconds in dwell_times.items()))
+        if script_summary:
+            logger.info("⏱️  页面脚本耗时拆分(中位数):\n%s", self.scripts.format_summary())
+        if self.dry_run:
+            if submit_success:
+                logger.info("🎭 演练完成：提交按钮可用(%s)，未提交订单。总用时: %.2f秒",
+                            self.rehearsal.get('text'), total_time)
+            else:
+                logger.error("😞 演练失败：未能在%s次重试内到达可提交状态", self.max_retry_count)
+            self.save_timing(success=submit_success, retries=retry_count, dry_run=True, submit_target=self.rehearsal)
+            return submit_success
         if submit_success:
-            print(f"🎊 抢购成功！总用时: {total_time:.2f}秒")
-            print(f"📍 最终页面: {self.driver.current_url}")
+            logger.info("🎊 抢购成功！总用时: %.2f秒", total_time)
+            logger.info("📍 最终页面: %s", self.driver.current_url)
             if self.password:
-                print("💳 开始自动支付流程...")
+                logger.info("💳 开始自动支付流程...")
                 self.pay()
         else:
-            print(f"😞 抢购失败，已达到最大重试次数({self.max_retry_count}次)")
-            print(f"   📊 总用时: {total_time:.2f}秒")
-            print(f"   📍 最终页面: {self.driver.current_url}")
+            logger.error("😞 抢购失败，已达到最大重试次数(%s次)", self.max_retry_count)
+            logger.info("   📊 总用时: %.2f秒", total_time)
+            if not self.watchdog.dead:
+                logger.info("   📍 最终页面: %s", self.driver.current_url)
         
+        self.save_timing(success=submit_success, retries=retry_count)
         return submit_success
     
+    def save_timing(self, **meta):
+        """保存本次运行的阶段计时和策略统计，并输出阶段耗时"""
+        self.timer.finish()
+        try:
+            self.strategies.save()
+        except OSError as e:
+            logger.warning("⚠️  策略统计保存失败: %s", e)
+        logger.info("⏱️  阶段耗时: %s", ", ".join(
+            f"{phase}={ms:.1f}ms" for phase, ms in self.timer.durations().items()))
+        if self.timing_path:
+            try:
+                self.timer.save(self.timing_path, self.scripts.spans, **meta)
+            except OSError as e:
+                logger.warning("⚠️  阶段计时保存失败: %s", e)
+    
     def pay(self):
-        """自动支付功能 - 快速版"""
-        print("💳 快速支付处理...")
+        """自动支付 - 事件驱动版
+
+        密码框和支付结果都由页面内观察器等待，确认支付成功后立即释放浏览器；
+        池中的浏览器无论结果都归还，未使用浏览器池且未确认成功时保留浏览器供手动完成
+        """
+        logger.info("💳 快速支付处理...")
         
+        result = FAILED
         try:
-            # 快速查找支付密码框
-            password_input = self.wait_medium.until(
-                EC.element_to_be_clickable((By.CLASS_NAME, 'sixDigitPassword'))
-            )
-            password_input.clear()
-            password_input.send_keys(self.password)
-            print("✅ 已输入支付密码")
-            
-            # 快速查找确认按钮
-            confirm_btn = self.wait_medium.until(
-                EC.element_to_be_clickable((By.ID, 'J_authSubmit'))
-            )
-            confirm_btn.click()
-            
-            print("✅ 支付成功！")
-            notify_user(msg="淘宝秒杀：支付成功！")
-            
+            with self.timer.span(PAY) as span:
+                result = PaymentFlow(self.driver, self.password, self.scripts).run()
+                span.attrs['result'] = result
         except Exception as e:
-            print(f"❌ 支付失败: {str(e)}")
-            notify_user(msg="淘宝秒杀：支付失败，请手动完成")
+            logger.error("❌ 支付失败: %s", e)
         finally:
-            print("💤 等待30秒后关闭...")
-            sleep(30)
+            # 与ChromeDrive.pay相同：池中的浏览器（已失效的由池丢弃）不能一直占用
+            if self.driver_pool is not None or result == SUCCESS:
+                self.release_driver()
+        self.save_debug_info("pay", result=result)
+        
+        if result == SUCCESS:
+            notify_user(msg="淘宝秒杀：支付成功！")
+        elif result == FAILED:
+            notify_user(msg="淘宝秒杀：支付失败，请手动完成")
+        else:
+            notify_user(msg="淘宝秒杀：支付结果未确认，请检查订单")
+        return result
+    
+    def release_driver(self):
+        """归还浏览器到池中；未使用浏览器池时直接关闭"""
+        self.released = True
+        if self.driver_pool is not None:
+            self.driver_pool.release(self.driver)
+        else:
             try:
                 self.driver.quit()
-            except:
+            except Exception:
                 pass
     
     def find_element_smart(self, selectors_list, timeout=3, description="元素"):
@@ -1137,7 +1546,7 @@ class OptimizedSecKill:
         for by_method, selector, desc in selectors_list:
             try:
                 element = wait.until(EC.element_to_be_clickable((by_method, selector)))
-                print(f"✅ 找到{description}: {desc}")
+                logger.info("✅ 找到%s: %s", description, desc)
                 return element
             except TimeoutException:
                 continue
@@ -1146,24 +1555,12 @@ class OptimizedSecKill:
         
         raise NoSuchElementException(f"未找到{description}")
 
-# 集成到原有ChromeDrive类的方法
+# 旧接口兼容：ChromeDrive.sec_kill已直接使用OptimizedSecKill
 def optimized_sec_kill_method(self):
-    """替换原有ChromeDrive类中的sec_kill方法 - 高性能版"""
-    print("🔄 使用高性能秒杀方法...")
-    
-    # 等待登录和时间
-    self.keep_wait()
-    
-    # 创建高性能秒杀实例
-    optimizer = OptimizedSecKill(
-        driver=self.driver,
-        seckill_time_obj=self.seckill_time_obj,
-        password=self.password,
-        max_retry_count=30  # 减少重试次数，提高效率
-    )
-    
-    # 执行高性能秒杀
-    return optimizer.optimized_sec_kill()
+    """已废弃，等同于ChromeDrive.sec_kill(self)（支持演练、立即购买和换浏览器恢复），保留给旧脚本使用"""
+    from seckill.seckill_taobao import ChromeDrive
+
+    return ChromeDrive.sec_kill(self)
 
 if __name__ == '__main__':
     print("OptimizedSecKill模块已加载")
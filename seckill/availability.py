@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+开抢前可用性轮询
+实际开抢时刻常与标称时间有偏差：提前触发会被拒绝，按时触发又可能白等。
+距标称时间lead秒开始用廉价请求探测商品是否已可购买，越接近标称时间轮询越快，
+探测到可购买立即返回，由调用方触发已武装好的下单流程。
+总探测次数和最高频率都有上限，遇到限流信号指数退避，避免被风控
+"""
+
+import time
+import threading
+
+import requests
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+# 限流/风控的响应特征
+THROTTLE_STATUS = (429, 503)
+THROTTLE_URL_KEYWORDS = ('punish', 'x5sec', 'captcha')
+
+
+class Throttled(Exception):
+    """探测请求被限流"""
+
+
+class AvailabilityWatcher:
+    """轮询probe直到其返回真值
+
+    probe: 无参可调用对象，可购买时返回真值（该值由wait()返回），被限流时抛出Throttled
+    deadline: 标称开抢时间（datetime）
+    lead: 提前多少秒开始轮询；轮询间隔从max_interval线性缩短，到deadline时为min_interval
+    give_up: 超过deadline多少秒仍未开放则放弃
+    """
+
+    def __init__(self, probe, deadline, lead=5.0, give_up=30.0, min_interval=0.05, max_interval=1.0,
+                 max_probes=300, max_rate=20.0, backoff=2.0, max_backoff=16.0, cancel_event=None,
+                 clock=time.time):
+        self.probe = probe
+        self.deadline = deadline.timestamp()
+        self.lead = lead
+        self.give_up = give_up
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_probes = max_probes
+        self.max_rate = max_rate
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cancel_event = cancel_event or threading.Event()
+        self.clock = clock
+        self._factor = 1.0
+        # 统计
+        self.probes = 0
+        self.errors = 0
+        self.throttled = 0
+        self.started_at = None
+        self.opened_at = None
+
+    def interval(self, now):
+        """下一次探测前的等待秒数"""
+        remaining = self.deadline - now
+        if remaining <= 0:
+            base = self.min_interval
+        else:
+            ratio = min(1.0, remaining / self.lead) if self.lead > 0 else 1.0
+            base = self.min_interval + (self.max_interval - self.min_interval) * ratio
+        return max(base * self._factor, 1.0 / self.max_rate)
+
+    def wait(self):
+        """阻塞到商品可购买，返回probe的结果；预算耗尽、超时或取消时返回None"""
+        start = self.deadline - self.lead
+        while self.clock() < start:
+            if self.cancel_event.wait(min(0.3, start - self.clock())):
+                return None
+
+        self.started_at = self.clock()
+        while not self.cancel_event.is_set():
+            now = self.clock()
+            if self.probes >= self.max_probes:
+                logger.warning("⚠️  可用性探测次数达到上限(%s)，停止轮询", self.max_probes)
+                return None
+            if now > self.deadline + self.give_up:
+                logger.warning("⚠️  超过标称时间%s秒仍未开放，停止轮询", self.give_up)
+                return None
+
+            self.probes += 1
+            try:
+                value = self.probe()
+            except Throttled:
+                self.throttled += 1
+                self._factor = min(self._factor * self.backoff, self.max_backoff)
+                logger.warning("⚠️  探测被限流，轮询间隔放大到%.0f倍", self._factor)
+            except Exception as e:
+                self.errors += 1
+                logger.debug("   探测失败: %s", e)
+            else:
+                self._factor = max(1.0, self._factor / self.backoff)
+                if value:
+                    self.opened_at = self.clock()
+                    logger.info("🟢 商品已可购买（相对标称时间%+.0fms，第%s次探测）",
+                                (self.opened_at - self.deadline) * 1000, self.probes)
+                    return value
+
+            self.cancel_event.wait(self.interval(self.clock()))
+        return None
+
+    def stats(self):
+        return {
+            'probes': self.probes,
+            'errors': self.errors,
+            'throttled': self.throttled,
+            'opened_offset_ms': None if self.opened_at is None else round((self.opened_at - self.deadline) * 1000, 3),
+        }
+
+
+def _check_throttle(status, url):
+    if status in THROTTLE_STATUS or any(keyword in (url or '') for keyword in THROTTLE_URL_KEYWORDS):
+        raise Throttled(f"{status} {url}")
+
+
+def http_probe(url, predicate, session=None, timeout=2, **kwargs):
+    """requests探测：predicate(response)为真表示可购买"""
+    sess = session or requests.Session()
+
+    def probe():
+        response = sess.get(url, timeout=timeout, **kwargs)
+        _check_throttle(response.status_code, response.url)
+        return predicate(response)
+    return probe
+
+
+# 页面内fetch，带上浏览器cookie；参数: url, 超时ms
+PAGE_FETCH_SCRIPT = """
+    var done = arguments[arguments.length - 1];
+    var controller = new AbortController();
+    var timer = setTimeout(function() { controller.abort(); }, arguments[1]);
+    fetch(arguments[0], {credentials: 'include', cache: 'no-store', signal: controller.signal})
+        .then(function(r) {
+            return r.text().then(function(text) { done({status: r.status, url: r.url, text: text}); });
+        })
+        .catch(function(e) { done({status: 0, url: '', text: '', error: String(e)}); })
+        .finally(function() { clearTimeout(timer); });
+"""
+
+
+def page_fetch_probe(scripts, url, predicate, timeout=2):
+    """浏览器内探测（共享登录cookie），scripts为ScriptRunner；predicate(响应文本)为真表示可购买"""
+    def probe():
+        result = scripts.run_async('availability_probe', PAGE_FETCH_SCRIPT, url, int(timeout * 1000))
+        if result.get('error'):
+            raise RuntimeError(result['error'])
+        _check_throttle(result.get('status'), result.get('url'))
+        return predicate(result.get('text', ''))
+    return probe
+
+
+def cart_probe(session, item_id=None, sku_id=None):
+    """HTTP路径探测：重新获取购物车，目标商品（和SKU）可购买时返回(Cart, 用户ID)"""
+    from . import taobao_api
+    from .cart import Cart
+
+    def probe():
+        first_data, user_id = taobao_api.get_buy_cart(session)
+        cart = Cart.from_first_data(first_data)
+        if cart.first_purchasable(item_id=item_id, sku_id=sku_id) is not None:
+            return cart, user_id
+        return None
+    return probe
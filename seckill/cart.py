@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+购物车模型
+把cart.htm中的firstData一次遍历解析成紧凑的CartOrder对象（__slots__），
+同时建立itemId / skuId / sellerId / cartId索引；解析后不再保留原始嵌套dict，
+多账号常驻时每个购物车只占用所需字段的内存
+"""
+
+import json
+
+# 每行必须有的字段，sellerId可以从bundle继承
+_REQUIRED = ('cartId', 'itemId', 'skuId')
+
+
+class CartOrder:
+    """购物车中的一行商品"""
+
+    __slots__ = ('cart_id', 'item_id', 'sku_id', 'seller_id', 'title', 'quantity',
+                 'cart_params', 'to_buy_info', 'valid', 'checked')
+
+    def __init__(self, cart_id, item_id, sku_id, seller_id, title='', quantity=1,
+                 cart_params=None, to_buy_info=None, valid=True, checked=False):
+        self.cart_id = cart_id
+        self.item_id = item_id
+        self.sku_id = sku_id
+        self.seller_id = seller_id
+        self.title = title
+        self.quantity = quantity
+        self.cart_params = cart_params
+        self.to_buy_info = to_buy_info
+        self.valid = valid
+        self.checked = checked
+
+    @classmethod
+    def from_dict(cls, order, seller_id=None):
+        """从firstData的order字典构建，ID统一为字符串；缺少必需字段时抛出KeyError"""
+        cart_id, item_id, sku_id = (str(order[name]) for name in _REQUIRED)
+        amount = order.get('amount') or {}
+        return cls(
+            cart_id=cart_id,
+            item_id=item_id,
+            sku_id=sku_id,
+            seller_id=str(order.get('sellerId') or seller_id or ''),
+            title=order.get('title', ''),
+            quantity=int(amount.get('now', 1)) if isinstance(amount, dict) else int(amount),
+            cart_params=(order.get('cartActiveInfo') or {}).get('cartBcParams'),
+            to_buy_info=order.get('toBuyInfo'),
+            valid=bool(order.get('isValid', True)),
+            checked=bool(order.get('checked', False)),
+        )
+
+    @property
+    def purchasable(self):
+        """有效、数量大于0，且带有结算请求所需的参数"""
+        return (self.valid and self.quantity > 0 and bool(self.seller_id)
+                and self.cart_params is not None and self.to_buy_info is not None)
+
+    def confirm_args(self):
+        """taobao_api.confirm_order的前6个参数"""
+        return self.cart_id, self.item_id, self.sku_id, self.seller_id, self.cart_params, self.to_buy_info
+
+    def __repr__(self):
+        return f"CartOrder(cart_id={self.cart_id}, item_id={self.item_id}, sku_id={self.sku_id})"
+
+
+class Cart:
+    """购物车：订单列表加四个索引，查找均为字典访问"""
+
+    __slots__ = ('orders', 'by_item', 'by_sku', 'by_seller', 'by_cart', 'skipped')
+
+    def __init__(self, orders=()):
+        self.orders = []
+        self.by_item = {}
+        self.by_sku = {}
+        self.by_seller = {}
+        self.by_cart = {}
+        self.skipped = 0
+        for order in orders:
+            self.add(order)
+
+    @classmethod
+    def from_first_data(cls, first_data):
+        """一次遍历 list → bundles → orders 构建购物车，first_data可以是JSON字符串或已解析的dict"""
+        if isinstance(first_data, (str, bytes)):
+            first_data = json.loads(first_data)
+        cart = cls()
+        for shop in first_data.get('list') or ():
+            for bundle in shop.get('bundles') or ():
+                seller_id = bundle.get('sellerId') or shop.get('sellerId')
+                for order in bundle.get('orders') or ():
+                    try:
+                        cart.add(CartOrder.from_dict(order, seller_id))
+                    except (KeyError, TypeError, ValueError):
+                        # 结构不完整的行（失效宝贝、赠品等）不参与结算
+                        cart.skipped += 1
+        return cart
+
+    def add(self, order):
+        self.orders.append(order)
+        self.by_item.setdefault(order.item_id, []).append(order)
+        self.by_sku.setdefault(order.sku_id, []).append(order)
+        self.by_seller.setdefault(order.seller_id, []).append(order)
+        self.by_cart[order.cart_id] = order
+
+    def find(self, item_id=None, sku_id=None, seller_id=None):
+        """按条件查找，优先用选择性最高的索引，再过滤其它条件"""
+        if sku_id is not None:
+            candidates = self.by_sku.get(str(sku_id), ())
+        elif item_id is not None:
+            candidates = self.by_item.get(str(item_id), ())
+        elif seller_id is not None:
+            candidates = self.by_seller.get(str(seller_id), ())
+        else:
+            candidates = self.orders
+        return [o for o in candidates
+                if (item_id is None or o.item_id == str(item_id))
+                and (seller_id is None or o.seller_id == str(seller_id))]
+
+    def purchasable(self):
+        return [o for o in self.orders if o.purchasable]
+
+    def first_purchasable(self, item_id=None, sku_id=None):
+        """第一个可购买的目标商品，不指定目标时为购物车中第一个可购买的商品"""
+        for order in self.find(item_id=item_id, sku_id=sku_id):
+            if order.purchasable:
+                return order
+        return None
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __iter__(self):
+        return iter(self.orders)
+
+    def __repr__(self):
+        return f"Cart({len(self.orders)} orders, {len(self.by_seller)} sellers)"
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+服务器时钟偏差测量
+按NTP思路取请求发出和收到响应的中点作为本地时间，与淘宝服务器时间比较；
+多次采样取往返最短的一次，偏差 = 服务器时间 - 本地时间
+"""
+
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+TIME_API = 'https://api.m.taobao.com/rest/api3.do?api=mtop.common.getTimestamp'
+
+
+def _server_time(response):
+    """优先取时间接口的毫秒时间戳，退回HTTP Date头（秒级精度）"""
+    try:
+        return int(response.json()['data']['t']) / 1000
+    except (ValueError, KeyError, TypeError):
+        date = response.headers.get('Date')
+        if not date:
+            raise ValueError("响应中没有服务器时间")
+        return parsedate_to_datetime(date).timestamp()
+
+
+def measure_offset(url=TIME_API, samples=3, timeout=3, session=None):
+    """返回(偏差秒, 往返秒)，偏差为正表示本地时钟慢于服务器"""
+    sess = session or requests.Session()
+    best = None
+    for _ in range(samples):
+        sent = time.time()
+        response = sess.get(url, timeout=timeout)
+        received = time.time()
+        rtt = received - sent
+        offset = _server_time(response) - (sent + received) / 2
+        if best is None or rtt < best[1]:
+            best = (offset, rtt)
+    return best
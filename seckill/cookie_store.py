@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+按账号保存的cookie存储
+每个账号一个JSON文件（COOKIE_STORE_DIR/<账号>.json），先写临时文件再原子替换，多个账号、多个线程同时写入不会互相覆盖。
+读取后按域名和名称建索引并缓存，文件未变化时再次读取只是一次stat，按域名取cookie是字典查找；
+记录每个cookie的过期时间，登录相关cookie过期后视为需要重新登录；cookie2等登录cookie是会话cookie（没有过期时间），
+所以保存时间超过COOKIE_MAX_AGE的存储同样视为失效，由调用方重新登录或交给浏览器确认登录态。
+账号名只允许字母、数字和-_.（不能以.开头），不安全的账号名直接拒绝，不同账号不会映射到同一个文件。
+
+兼容旧格式：ChromeDrive.get_cookie()以前写出的cookie列表JSON（cookies.txt）可以直接用load_file读取
+"""
+
+import os
+import json
+import time
+import threading
+
+import seckill.settings as utils_settings
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+# 决定登录态的cookie，任一过期即视为会话失效
+SESSION_COOKIES = ('cookie2', '_tb_token_', 'unb', 'sgcookie')
+
+# 存储的最长可信时间（秒），超过后即使登录cookie未过期也视为失效
+DEFAULT_MAX_AGE = 3600
+
+# 只保存WebDriver/CDP能写回的字段
+_FIELDS = ('name', 'value', 'domain', 'path', 'expiry', 'secure', 'httpOnly', 'sameSite')
+
+
+def _normalize(cookie):
+    """统一为Selenium格式（expiry为整数秒，会话cookie没有expiry），兼容CDP格式和http.cookiejar.Cookie"""
+    if not isinstance(cookie, dict):
+        cookie = {'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain, 'path': cookie.path,
+                  'expiry': cookie.expires, 'secure': bool(cookie.secure)}
+    expiry = cookie.get('expiry', cookie.get('expires'))
+    cookie = {key: cookie[key] for key in _FIELDS if cookie.get(key) is not None}
+    cookie.pop('expiry', None)
+    if expiry is not None and expiry > 0:
+        cookie['expiry'] = int(expiry)
+    return cookie
+
+
+def domain_matches(host, domain):
+    """cookie域名是否适用于host：'.taobao.com'和'taobao.com'都匹配'cart.taobao.com'"""
+    domain = domain.lstrip('.')
+    return host == domain or host.endswith('.' + domain)
+
+
+class AccountCookies:
+    """一个账号的cookie集合，按域名和名称建索引"""
+
+    __slots__ = ('account', 'saved_at', 'cookies', 'by_domain', 'by_name')
+
+    def __init__(self, cookies=(), account='default', saved_at=None):
+        self.account = account
+        self.saved_at = saved_at
+        self.cookies = [_normalize(c) for c in cookies]
+        self.by_domain = {}
+        self.by_name = {}
+        for cookie in self.cookies:
+            self.by_domain.setdefault(cookie.get('domain', '').lstrip('.'), []).append(cookie)
+            self.by_name.setdefault(cookie['name'], []).append(cookie)
+
+    def for_host(self, host, now=None):
+        """适用于host的未过期cookie：沿域名逐级向上查索引（cart.taobao.com → taobao.com → com）"""
+        now = time.time() if now is None else now
+        result = []
+        parts = host.split('.')
+        for i in range(len(parts)):
+            for cookie in self.by_domain.get('.'.join(parts[i:]), ()):
+                if cookie.get('expiry', now + 1) > now:
+                    result.append(cookie)
+        return result
+
+    def get(self, name, host=None):
+        """按名称取cookie值，指定host时只取适用于该host的"""
+        for cookie in self.by_name.get(name, ()):
+            if host is None or domain_matches(host, cookie.get('domain', host)):
+                return cookie['value']
+        return None
+
+    def expires_at(self, names=SESSION_COOKIES):
+        """登录相关cookie中最早的过期时间（秒），都是会话cookie时为None"""
+        expiries = [c['expiry'] for name in names for c in self.by_name.get(name, ()) if 'expiry' in c]
+        return min(expiries) if expiries else None
+
+    def valid(self, now=None, names=SESSION_COOKIES, max_age=None):
+        """有登录相关cookie且都未过期；指定max_age时保存时间未知或超过max_age秒也算失效"""
+        now = time.time() if now is None else now
+        if not any(name in self.by_name for name in names):
+            return False
+        if max_age is not None and (self.saved_at is None or now - self.saved_at > max_age):
+            return False
+        expires_at = self.expires_at(names)
+        return expires_at is None or expires_at > now
+
+    def apply(self, session, host_suffix='taobao.com'):
+        """写入requests会话，只写host_suffix及其子域名的cookie"""
+        for cookie in self.cookies:
+            if domain_matches(cookie.get('domain', host_suffix).lstrip('.'), host_suffix):
+                session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'),
+                                    path=cookie.get('path', '/'))
+        return session
+
+    def to_cdp(self, now=None):
+        """转为CDP Network.setCookies的参数：所有域名的未过期cookie，一次调用即可写入"""
+        now = time.time() if now is None else now
+        params = []
+        for cookie in self.cookies:
+            if cookie.get('expiry', now + 1) <= now:
+                continue
+            param = {'name': cookie['name'], 'value': cookie['value'], 'domain': cookie.get('domain', 'taobao.com'),
+                     'path': cookie.get('path', '/'), 'secure': cookie.get('secure', False),
+                     'httpOnly': cookie.get('httpOnly', False)}
+            if 'expiry' in cookie:
+                param['expires'] = cookie['expiry']
+            if cookie.get('sameSite') in ('Strict', 'Lax', 'None'):
+                param['sameSite'] = cookie['sameSite']
+            params.append(param)
+        return params
+
+    def to_json(self):
+        return {'account': self.account, 'saved_at': self.saved_at, 'cookies': self.cookies}
+
+    def __len__(self):
+        return len(self.cookies)
+
+    def __repr__(self):
+        return f"AccountCookies({self.account}, {len(self.cookies)} cookies)"
+
+
+def load_file(path, account='default'):
+    """读取cookie文件：CookieStore格式或旧的cookie列表JSON"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return AccountCookies(data, account=account, saved_at=os.path.getmtime(path))
+    return AccountCookies(data.get('cookies', ()), account=data.get('account', account), saved_at=data.get('saved_at'))
+
+
+def write_file(path, cookies):
+    """原子写入：同目录临时文件写完后os.replace，读者只会看到完整的旧文件或新文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(cookies.to_json(), f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+    finally:
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+class CookieStore:
+    """按账号存取cookie，读取结果按文件mtime缓存"""
+
+    def __init__(self, root='cookies'):
+        self.root = root
+        self._locks = {}
+        self._cache = {}  # 账号 -> (mtime_ns, AccountCookies)
+        self._guard = threading.Lock()
+
+    def path(self, account):
+        """账号的cookie文件路径，账号名不安全（含路径分隔符、空白等，或以.开头）时抛出ValueError"""
+        account = str(account)
+        if not account or account.startswith('.') or not all(ch.isalnum() or ch in '-_.' for ch in account):
+            raise ValueError(f"不安全的账号名: {account!r}")
+        return os.path.join(self.root, f"{account}.json")
+
+    def _lock(self, account):
+        with self._guard:
+            return self._locks.setdefault(account, threading.Lock())
+
+    def save(self, account, cookies):
+        """保存账号cookie（Selenium get_cookies()结果、CookieJar或AccountCookies）"""
+        if not isinstance(cookies, AccountCookies):
+            cookies = AccountCookies(cookies, account=account)
+        cookies.account = account
+        cookies.saved_at = time.time()
+        path = self.path(account)
+        with self._lock(account):
+            write_file(path, cookies)
+            self._cache[account] = (os.stat(path).st_mtime_ns, cookies)
+        logger.debug("🍪 账号%s的cookie已保存(%s个)", account, len(cookies))
+        return cookies
+
+    def load(self, account):
+        """读取账号cookie，没有保存过时返回None；文件未变化时直接返回缓存"""
+        path = self.path(account)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        cached = self._cache.get(account)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            cookies = load_file(path, account)
+        except (OSError, ValueError) as e:
+            logger.warning("⚠️ 账号%s的cookie文件读取失败: %s", account, e)
+            return None
+        self._cache[account] = (mtime, cookies)
+        return cookies
+
+    def load_valid(self, account, now=None, max_age=None):
+        """读取未过期的账号cookie，登录相关cookie已过期或保存超过max_age秒（默认COOKIE_MAX_AGE）时返回None"""
+        if max_age is None:
+            max_age = getattr(utils_settings, "COOKIE_MAX_AGE", DEFAULT_MAX_AGE)
+        cookies = self.load(account)
+        if cookies is None or not cookies.valid(now, max_age=max_age):
+            return None
+        return cookies
+
+    def accounts(self):
+        try:
+            return sorted(name[:-5] for name in os.listdir(self.root)
+                          if name.endswith('.json') and not name.startswith('.'))
+        except FileNotFoundError:
+            return []
+
+
+_default_store = None
+
+
+def default_store():
+    """settings.COOKIE_STORE_DIR下的共享存储"""
+    global _default_store
+    if _default_store is None:
+        _default_store = CookieStore(getattr(utils_settings, "COOKIE_STORE_DIR", 'cookies'))
+    return _default_store
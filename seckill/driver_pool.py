@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+浏览器实例池
+抢购/支付结束后立即把浏览器归还池中复用，避免每次重新启动Chrome和登录
+"""
+
+import threading
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+
+class DriverPool:
+    """线程安全的WebDriver池
+
+    factory: 无参函数，返回新的WebDriver
+    size: 池中浏览器总数上限（含借出的）
+    reset_url: 归还时导航到的页面，None表示不导航
+    """
+
+    def __init__(self, factory, size=1, reset_url=None):
+        self.factory = factory
+        self.size = size
+        self.reset_url = reset_url
+        self.created = 0
+        self.reused = 0
+        self._idle = []
+        self._leased = set()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def prewarm(self, count=None):
+        """预先创建浏览器，返回新建数量"""
+        count = self.size if count is None else min(count, self.size)
+        created = 0
+        while True:
+            with self._cond:
+                if self._closed or len(self._idle) + len(self._leased) >= count:
+                    return created
+                self.created += 1
+            try:
+                driver = self.factory()
+            except Exception:
+                with self._cond:
+                    self.created -= 1
+                raise
+            with self._cond:
+                self._idle.append(driver)
+                self._cond.notify()
+            created += 1
+
+    def acquire(self, timeout=None):
+        """借出一个浏览器：优先复用空闲实例，未达上限时新建，否则等待归还"""
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("DriverPool已关闭")
+                if self._idle:
+                    driver = self._idle.pop()
+                    self._leased.add(driver)
+                    self.reused += 1
+                    return driver
+                if len(self._leased) < self.size:
+                    self.created += 1
+                    break
+                if not self._cond.wait(timeout):
+                    raise TimeoutError("等待空闲浏览器超时")
+        try:
+            driver = self.factory()
+        except Exception:
+            with self._cond:
+                self.created -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._leased.add(driver)
+        return driver
+
+    def take_idle(self):
+        """只借出空闲实例（不新建、不等待），没有空闲实例时返回None"""
+        with self._cond:
+            if self._closed or not self._idle:
+                return None
+            driver = self._idle.pop()
+            self._leased.add(driver)
+            return driver
+
+    def release(self, driver):
+        """归还浏览器；已失效的实例直接丢弃，重复归还忽略"""
+        with self._cond:
+            if driver not in self._leased:
+                return
+        try:
+            driver.current_window_handle  # 浏览器已退出时会抛异常
+            if self.reset_url:
+                driver.get(self.reset_url)
+        except Exception as e:
+            logger.warning("⚠️  归还的浏览器已失效，丢弃: %s", e)
+            self.discard(driver)
+            return
+        with self._cond:
+            self._leased.discard(driver)
+            if self._closed:
+                self._quit(driver)
+                return
+            self._idle.append(driver)
+            self._cond.notify()
+
+    def discard(self, driver):
+        """移出池并关闭浏览器，空出的名额可以新建"""
+        with self._cond:
+            self._leased.discard(driver)
+            if driver in self._idle:
+                self._idle.remove(driver)
+            self._cond.notify()
+        self._quit(driver)
+
+    def lease(self, timeout=None):
+        """with pool.lease() as driver: ... 结束后自动归还"""
+        return _Lease(self, timeout)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            drivers, self._idle = self._idle, []
+            self._cond.notify_all()
+        for driver in drivers:
+            self._quit(driver)
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def __len__(self):
+        with self._cond:
+            return len(self._idle) + len(self._leased)
+
+
+class _Lease:
+    def __init__(self, pool, timeout):
+        self.pool = pool
+        self.timeout = timeout
+        self.driver = None
+
+    def __enter__(self):
+        self.driver = self.pool.acquire(self.timeout)
+        return self.driver
+
+    def __exit__(self, *exc):
+        self.pool.release(self.driver)
+        return False
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+抢购流程状态机
+页面状态由一次页面内脚本调用完成分类，每次状态切换都记录单调时钟时间戳
+"""
+
+import time
+
+from .react_utils import ReactPageUtils
+from .script_runner import ScriptRunner
+
+# 页面状态码
+CART = 'cart'
+ORDER = 'order'
+PAYMENT = 'payment'
+ERROR = 'error'
+UNKNOWN = 'unknown'
+
+
+class PageState:
+    """一次分类的结果"""
+
+    __slots__ = ('state', 'via', 'url', 'handle', 'dom', 'throttled')
+
+    def __init__(self, state, via='url', url='', handle=None, dom=None, throttled=False):
+        self.state = state
+        self.via = via
+        self.url = url
+        self.handle = handle
+        self.dom = dom  # DOM签名，文档替换或DOM变化时改变
+        self.throttled = throttled
+
+    def __repr__(self):
+        return f"PageState({self.state!r}, via={self.via!r}, url={self.url[:50]!r})"
+
+
+class FlowStateMachine:
+    """抢购流程状态机，记录状态切换并统计各状态停留时长"""
+
+    def __init__(self, driver, clock=time.monotonic, scripts=None):
+        self.driver = driver
+        self.scripts = scripts or ScriptRunner(driver)
+        self.clock = clock
+        self.script = ReactPageUtils.get_page_state_script()
+        self.current = None
+        self.previous = None
+        self.transitions = []  # [(时间戳, 状态)]
+        self.changed = False  # 最近一次observe是否发生了状态切换
+        self._entered_at = None
+        self._dwell = {}
+
+    def classify(self):
+        """单次页面内调用完成分类，不改变状态机"""
+        result = self.scripts.run('page_state', self.script) or {}
+        return PageState(
+            result.get('state', UNKNOWN),
+            result.get('via', 'url'),
+            result.get('url', ''),
+            result.get('handle'),
+            result.get('dom'),
+            bool(result.get('throttled')),
+        )
+
+    def observe(self):
+        """分类当前页面并推进状态机"""
+        page = self.classify()
+        self.changed = self.transition(page.state)
+        return page
+
+    def transition(self, state):
+        """切换到state；状态未变时只返回False"""
+        if state == self.current:
+            return False
+        now = self.clock()
+        if self.current is not None:
+            self._dwell[self.current] = self._dwell.get(self.current, 0.0) + (now - self._entered_at)
+        self.previous, self.current = self.current, state
+        self._entered_at = now
+        self.transitions.append((now, state))
+        return True
+
+    def finish(self):
+        """结束计时，把当前状态的停留时间计入统计"""
+        if self.current is not None:
+            now = self.clock()
+            self._dwell[self.current] = self._dwell.get(self.current, 0.0) + (now - self._entered_at)
+            self._entered_at = now
+        return self.dwell_times()
+
+    def dwell_times(self):
+        """各状态累计停留时长（秒）"""
+        return dict(self._dwell)
+
+    def timeline(self):
+        """相对第一次切换的状态时间线 [(秒, 状态)]"""
+        if not self.transitions:
+            return []
+        start = self.transitions[0][0]
+        return [(round(t - start, 4), s) for t, s in self.transitions]
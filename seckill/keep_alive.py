@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+会话保活模块 - 轻量版
+用极小的认证请求代替整页刷新购物车，保持登录状态
+"""
+
+import time
+
+import requests
+
+from .script_runner import ScriptRunner
+
+# 保活模式
+MODE_FETCH = 'fetch'    # 页面内fetch HEAD请求，浏览器自动携带并更新cookie
+MODE_HTTP = 'http'      # 用浏览器cookie构造requests会话发送HEAD请求
+MODE_RELOAD = 'reload'  # 旧行为：整页加载购物车
+
+CART_URL = "https://cart.taobao.com/cart.htm"
+
+
+class SessionKeepAlive:
+    """会话保活器，每次调用ping()发送一次最小流量的认证请求
+
+    ping_url为空时，fetch模式请求当前页面地址（同源，淘宝cookie作用于.taobao.com），
+    其它模式请求购物车地址。
+    scripts: 可传入与抢购流程共用的ScriptRunner，保活脚本的往返耗时一并统计
+    """
+
+    def __init__(self, driver, mode=MODE_FETCH, ping_url=None, timeout=10, scripts=None):
+        self.driver = driver
+        self.scripts = scripts or ScriptRunner(driver)
+        self.mode = mode
+        self.ping_url = ping_url
+        self.timeout = timeout
+        self.ping_count = 0
+        self.fail_count = 0
+        self.last_latency = None
+        self._http_session = None
+
+    def ping(self):
+        """发送一次保活请求，返回是否成功"""
+        started = time.perf_counter()
+        try:
+            if self.mode == MODE_RELOAD:
+                self.driver.get(self.ping_url or CART_URL)
+                ok = True
+            elif self.mode == MODE_HTTP:
+                ok = self._ping_http()
+            else:
+                ok = self._ping_fetch()
+        except Exception:
+            ok = False
+
+        self.last_latency = time.perf_counter() - started
+        self.ping_count += 1
+        if not ok:
+            self.fail_count += 1
+        return ok
+
+    def _ping_fetch(self):
+        """在页面上下文内发送HEAD请求，不渲染、不加载子资源
+
+        浏览器与抢购流程共用，临时设置的脚本超时在结束后恢复
+        """
+        previous = self.driver.timeouts.script
+        self.driver.set_script_timeout(self.timeout)
+        try:
+            status = self.scripts.run_async('keep_alive_ping', """
+                var done = arguments[arguments.length - 1];
+                fetch(arguments[0] || location.href, {method: 'HEAD', credentials: 'include', cache: 'no-store'})
+                    .then(function(r) { done(r.status); })
+                    .catch(function() { done(0); });
+            """, self.ping_url)
+        finally:
+            self.driver.set_script_timeout(previous)
+        return 0 < status < 400
+
+    def _ping_http(self):
+        """用浏览器cookie发送HEAD请求，并把服务端刷新的cookie写回浏览器"""
+        if self._http_session is None:
+            self._http_session = requests.session()
+        session = self._http_session
+        for cookie in self.driver.get_cookies():
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'))
+
+        res = session.head(self.ping_url or CART_URL, timeout=self.timeout, verify=False, allow_redirects=False)
+        for name, value in res.cookies.items():
+            try:
+                self.driver.add_cookie({'name': name, 'value': value})
+            except Exception:
+                pass
+        return res.status_code < 400
+
+    def warm_up(self):
+        """抢购前的最终预热：完整加载一次购物车页面"""
+        self.driver.get(CART_URL)
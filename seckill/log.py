@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+日志模块
+分级、惰性格式化，由队列监听线程负责格式化和输出，调用方不会被慢终端阻塞；
+抢购期间可切换到race档位，只输出WARNING及以上级别（只作用于当前线程，并发任务互不影响）
+"""
+
+import sys
+import queue
+import threading
+import atexit
+import logging
+import logging.handlers
+from contextlib import contextmanager
+
+ROOT_LOGGER = 'seckill'
+
+_listener = None
+_race = threading.local()  # 当前线程的race档位级别
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """不在调用线程格式化消息，记录原样入队，由监听线程格式化
+
+    注意：参数对象在格式化之前被修改会反映到输出中，调用方应传入不可变值
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class _RaceFilter(logging.Filter):
+    """在调用线程丢弃低于该线程race档位的记录，不格式化也不入队"""
+
+    def filter(self, record):
+        level = getattr(_race, 'level', None)
+        return level is None or record.levelno >= level
+
+
+def setup_logging(level=logging.INFO, stream=None, fmt='%(message)s'):
+    """初始化seckill日志：队列处理器 + 后台监听线程；重复调用只调整级别"""
+    global _listener
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level)
+    if _listener is not None:
+        return root
+
+    log_queue = queue.SimpleQueue()
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(logging.Formatter(fmt))
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    handler = _DeferredQueueHandler(log_queue)
+    handler.addFilter(_RaceFilter())
+    root.addHandler(handler)
+    root.propagate = False
+    return root
+
+
+def get_logger(name):
+    """获取seckill下的子日志器，首次使用时自动初始化"""
+    if _listener is None:
+        setup_logging()
+    if name != ROOT_LOGGER and not name.startswith(ROOT_LOGGER + '.'):
+        name = f'{ROOT_LOGGER}.{name}'
+    return logging.getLogger(name)
+
+
+@contextmanager
+def race_profile(level=logging.WARNING):
+    """抢购期间的日志档位：当前线程低于level的日志在调用线程被丢弃，不做任何格式化
+
+    不修改共享的seckill日志器级别，多个任务并发抢购时各自进入、退出互不影响
+    """
+    if _listener is None:
+        setup_logging()
+    previous = getattr(_race, 'level', None)
+    _race.level = level
+    try:
+        yield
+    finally:
+        _race.level = previous
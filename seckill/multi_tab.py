@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多标签页并行抢购
+同一浏览器（共享登录会话）为每个目标商品或店铺组合打开一个标签页，
+每个标签页通过自己的DevTools连接独立执行 结算 → 提交，互不等待窗口切换
+"""
+
+import json
+import time
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium.common.exceptions import WebDriverException
+
+from .react_utils import ReactPageUtils
+from .script_runner import ScriptRunner
+from .snapshot import CdpSession, websocket
+from .keep_alive import CART_URL
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+# 只取状态和URL，元素句柄无法跨DevTools连接按值返回
+PROBE_SCRIPT = """
+    var r = (function() { %s })();
+    return {state: r.state, url: r.url, ready: document.readyState, stale: !!window.__tabStale};
+""" % ReactPageUtils.get_page_state_script()
+
+# 任务状态
+PENDING = 'pending'
+SUCCESS = 'success'
+FAILED = 'failed'
+
+
+class CdpTab:
+    """通过独立DevTools连接驱动的标签页，多个标签页可并行执行"""
+
+    transport = 'cdp'
+
+    def __init__(self, handle, session):
+        self.handle = handle
+        self.session = session
+
+    def evaluate(self, name, script, *args):
+        expression = '(function() { %s }).apply(null, %s)' % (script, json.dumps(args))
+        result = self.session.call('Runtime.evaluate', {'expression': expression, 'returnByValue': True})
+        if 'exceptionDetails' in result:
+            raise RuntimeError(result['exceptionDetails'].get('text', 'Runtime.evaluate失败'))
+        return result.get('result', {}).get('value')
+
+    def navigate(self, url):
+        self.session.call('Page.navigate', {'url': url})
+
+    def close(self):
+        self.session.close()
+
+
+class WebDriverTab:
+    """回退方案：共用WebDriver连接和ScriptRunner，执行前切换窗口句柄（各标签页串行）"""
+
+    transport = 'webdriver'
+
+    def __init__(self, handle, driver, lock, current, scripts):
+        self.handle = handle
+        self.driver = driver
+        self.scripts = scripts
+        self._lock = lock
+        self._current = current  # 共享的当前窗口记录，避免重复切换
+
+    def _switch(self):
+        if self._current.get('handle') != self.handle:
+            self.driver.switch_to.window(self.handle)
+            self._current['handle'] = self.handle
+
+    def evaluate(self, name, script, *args):
+        with self._lock:
+            self._switch()
+            return self.scripts.run(name, script, *args)
+
+    def navigate(self, url):
+        with self._lock:
+            self._switch()
+            self.scripts.run('tab_navigate', 'window.location.href = arguments[0];', url)
+
+    def close(self):
+        pass
+
+
+class TabTask:
+    """一个标签页要结算的商品组合"""
+
+    __slots__ = ('name', 'item_ids', 'tab', 'status', 'reason', 'marks')
+
+    def __init__(self, name, item_ids):
+        self.name = name
+        self.item_ids = [str(i) for i in item_ids]
+        self.tab = None
+        self.status = PENDING
+        self.reason = None
+        self.marks = []  # [(步骤, monotonic_ns)]
+
+    def mark(self, step):
+        self.marks.append((step, time.monotonic_ns()))
+
+    def elapsed_ms(self):
+        if len(self.marks) < 2:
+            return 0.0
+        return (self.marks[-1][1] - self.marks[0][1]) / 1e6
+
+
+class MultiTabSecKill:
+    """多标签页并行抢购协调器
+
+    targets: 每个元素是一个商品ID或一组商品ID（同一标签页一起结算）
+    注意：淘宝购物车的勾选状态会同步到服务端，不同标签页同时勾选不同商品可能互相影响，
+    建议把同一店铺的商品放在同一组
+    dry_run: 演练模式，到达订单页后只检查提交按钮，不点击
+    scripts: WebDriver回退方案使用的ScriptRunner，默认新建
+    """
+
+    def __init__(self, driver, targets, cart_url=CART_URL, step_timeout=10, poll_interval=0.03,
+                 max_parallel=None, use_cdp=True, dry_run=False, scripts=None):
+        self.driver = driver
+        self.scripts = scripts or ScriptRunner(driver)
+        self.cart_url = cart_url
+        self.step_timeout = step_timeout
+        self.poll_interval = poll_interval
+        self.max_parallel = max_parallel
+        self.use_cdp = use_cdp and websocket is not None
+        self.dry_run = dry_run
+        self.tasks = []
+        for i, target in enumerate(targets):
+            ids = target if isinstance(target, (list, tuple)) else [target]
+            self.tasks.append(TabTask(f"tab{i + 1}", ids))
+        self.started_ns = None
+        self.finished_ns = None
+        self.origin = None
+        self.opened = []  # prepare()新开的标签页句柄
+
+    def prepare(self):
+        """为每个任务打开标签页并预加载购物车"""
+        lock, current = threading.Lock(), {}
+        debugger_address = self.driver.capabilities.get('goog:chromeOptions', {}).get('debuggerAddress')
+        origin = self.origin = self.driver.current_window_handle
+
+        for index, task in enumerate(self.tasks):
+            if index == 0:
+                handle = origin
+                self.driver.switch_to.window(handle)
+            else:
+                self.driver.switch_to.new_window('tab')
+                handle = self.driver.current_window_handle
+                self.opened.append(handle)
+            self.driver.get(self.cart_url)
+            task.tab = self._open_tab(handle, debugger_address, lock, current)
+
+        self.driver.switch_to.window(origin)
+        current['handle'] = origin
+        logger.info("🗂️  已打开%s个标签页（%s）", len(self.tasks), self.tasks[0].tab.transport if self.tasks else '-')
+        return self
+
+    def _open_tab(self, handle, debugger_address, lock, current):
+        if self.use_cdp and debugger_address:
+            try:
+                return CdpTab(handle, CdpSession.for_target(debugger_address, handle))
+            except Exception as e:
+                logger.warning("⚠️  标签页DevTools连接失败，改用WebDriver串行执行: %s", e)
+        return WebDriverTab(handle, self.driver, lock, current, self.scripts)
+
+    def run(self, fire_at=None):
+        """到点后所有标签页并行执行，返回成功结算的任务数"""
+        if fire_at is not None:
+            while datetime.now() < fire_at:
+                remaining = (fire_at - datetime.now()).total_seconds()
+                time.sleep(min(0.3, remaining - 1) if remaining > 1 else 0.01)
+
+        self.started_ns = time.monotonic_ns()
+        workers = self.max_parallel or len(self.tasks) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tab') as pool:
+            list(pool.map(self._drive, self.tasks))
+        self.finished_ns = time.monotonic_ns()
+
+        succeeded = sum(1 for t in self.tasks if t.status == SUCCESS)
+        logger.info("🏁 多标签抢购完成: %s/%s 成功，用时%.3f秒，吞吐%.2f件/秒",
+                    succeeded, len(self.tasks), self.elapsed(), self.throughput())
+        return succeeded
+
+    def _drive(self, task):
+        """单个标签页：刷新购物车 → 勾选目标 → 结算 → 提交"""
+        tab = task.tab
+        task.mark('start')
+        try:
+            tab.evaluate('mark_stale', 'window.__tabStale = true;')
+            tab.navigate(self.cart_url)
+            if not self._wait_state(tab, 'cart'):
+                return self._fail(task, 'cart_timeout')
+            task.mark('cart')
+
+            selection = tab.evaluate('select_items', ReactPageUtils.get_select_items_script(), task.item_ids) or {}
+            if not selection.get('selected'):
+                return self._fail(task, f"未找到商品: {selection.get('missing')}")
+            task.mark('select')
+
+            settle = tab.evaluate('find_settlement', ReactPageUtils.get_find_settlement_button_script()) or {}
+            if not settle.get('success'):
+                return self._fail(task, 'settle_not_found')
+            if not self._wait_state(tab, 'order'):
+                return self._fail(task, 'order_timeout')
+            task.mark('order')
+
+            if self.dry_run:
+                button = tab.evaluate('inspect_submit', ReactPageUtils.get_inspect_submit_button_script()) or {}
+                if not (button.get('found') and button.get('enabled')):
+                    return self._fail(task, f"演练: 提交按钮不可用 {button}")
+                task.mark('rehearsal')
+                task.status = SUCCESS
+                logger.info("🎭 %s 演练完成，提交按钮可用 (%.0fms)", task.name, task.elapsed_ms())
+                return
+
+            submit = tab.evaluate('find_submit', ReactPageUtils.get_find_submit_button_script()) or {}
+            if not submit.get('success'):
+                return self._fail(task, 'submit_not_found')
+            if not self._wait_state(tab, 'payment'):
+                return self._fail(task, 'cashier_timeout')
+            task.mark('cashier')
+            task.status = SUCCESS
+            logger.info("✅ %s 已进入收银台 (%.0fms)", task.name, task.elapsed_ms())
+        except Exception as e:
+            self._fail(task, f"异常: {e}")
+
+    def _wait_state(self, tab, state):
+        """等待标签页进入指定状态且文档不再是跳转前的旧页面"""
+        deadline = time.monotonic() + self.step_timeout
+        while time.monotonic() < deadline:
+            try:
+                probe = tab.evaluate('tab_probe', PROBE_SCRIPT) or {}
+                if probe.get('state') == state and not probe.get('stale') and probe.get('ready') != 'loading':
+                    return True
+            except (RuntimeError, WebDriverException):
+                pass  # 跳转过程中执行上下文被销毁
+            time.sleep(self.poll_interval)
+        return False
+
+    def _fail(self, task, reason):
+        task.mark('failed')
+        task.status = FAILED
+        task.reason = reason
+        logger.warning("⚠️  %s 失败: %s", task.name, reason)
+
+    def elapsed(self):
+        if self.started_ns is None or self.finished_ns is None:
+            return 0.0
+        return (self.finished_ns - self.started_ns) / 1e9
+
+    def throughput(self):
+        """每秒成功结算的商品组合数"""
+        elapsed = self.elapsed()
+        succeeded = sum(1 for t in self.tasks if t.status == SUCCESS)
+        return succeeded / elapsed if elapsed else 0.0
+
+    def results(self):
+        return [{
+            'name': t.name, 'items': t.item_ids, 'status': t.status, 'reason': t.reason,
+            'elapsed_ms': round(t.elapsed_ms(), 1),
+            'transport': t.tab.transport if t.tab else None,
+        } for t in self.tasks]
+
+    def close(self):
+        """断开各标签页的DevTools连接，关闭prepare()打开的标签页并切回原标签页"""
+        for task in self.tasks:
+            if task.tab is not None:
+                task.tab.close()
+        if self.origin is None:
+            return
+        for handle in self.opened:
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except WebDriverException as e:
+                logger.debug("标签页%s关闭失败: %s", handle, e)
+        self.opened = []
+        try:
+            self.driver.switch_to.window(self.origin)
+        except WebDriverException as e:
+            logger.warning("⚠️  切回原标签页失败: %s", e)
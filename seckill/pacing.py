@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+抢购循环节奏控制
+决定重试间隔、点击后检查跳转的轮询间隔、刷新后的等待，以及何时判定页面停滞需要刷新。
+
+  fixed     原有固定节奏：重试50ms、跳转检查500ms、点击后1秒、刷新后2秒、URL连续10次不变即刷新
+  adaptive  按观测到的脚本往返和页面跳转耗时设置间隔；以DOM变化（而非URL相等）判断停滞；
+            出现限流/验证码信号时间隔倍增，恢复正常后逐步回落
+
+策略可替换，benchmarks/bench_pacing.py 在模拟服务器上对比各策略
+"""
+
+import time
+
+# 页面停滞时的兜底：URL连续不变超过该秒数时，无论DOM是否变化都刷新
+MAX_STALL = 8.0
+
+
+class FixedPacing:
+    """固定节奏（原有行为）"""
+
+    name = 'fixed'
+
+    def __init__(self, retry_interval=0.05, poll_interval=0.5, settle_delay=1.0, refresh_delay=2.0,
+                 stagnant_limit=10, clock=time.monotonic):
+        self._retry_interval = retry_interval
+        self._poll_interval = poll_interval
+        self._settle_delay = settle_delay
+        self._refresh_delay = refresh_delay
+        self.stagnant_limit = stagnant_limit
+        self.clock = clock
+        self._last_url = None
+        self._stagnant = 0
+
+    def observe(self, page, rtt):
+        """每轮状态分类后调用，rtt为分类脚本往返秒数"""
+        if page.url == self._last_url:
+            self._stagnant += 1
+        else:
+            self._stagnant = 0
+            self._last_url = page.url
+
+    def navigated(self, seconds):
+        """点击后页面跳转完成，seconds为点击到跳转的耗时"""
+
+    def should_refresh(self):
+        return self._stagnant > self.stagnant_limit
+
+    def refreshed(self):
+        self._stagnant = 0
+
+    def retry_interval(self):
+        return self._retry_interval
+
+    def poll_interval(self):
+        return self._poll_interval
+
+    def settle_delay(self):
+        return self._settle_delay
+
+    def refresh_delay(self):
+        return self._refresh_delay
+
+    def navigation_polls(self, timeout, sleep=time.sleep):
+        """点击后检查跳转：每次先等待poll_interval再产出，总时长不超过timeout"""
+        deadline = self.clock() + timeout
+        while self.clock() < deadline:
+            sleep(max(0.0, min(self.poll_interval(), deadline - self.clock())))
+            yield
+
+
+class AdaptivePacing(FixedPacing):
+    """自适应节奏
+
+    rtt和跳转耗时取指数加权平均；重试间隔不低于脚本往返，跳转检查约在预期跳转时间内轮询8次；
+    DOM签名（文档标识+变更计数）在stagnant_after秒内无变化才判定停滞，stagnant_after随跳转耗时伸缩
+    """
+
+    name = 'adaptive'
+
+    def __init__(self, retry_interval=0.02, max_interval=1.0, initial_navigation=0.5, alpha=0.3,
+                 backoff=2.0, max_backoff=16.0, min_observations=3, clock=time.monotonic):
+        super().__init__(retry_interval=retry_interval, clock=clock)
+        self.max_interval = max_interval
+        self.alpha = alpha
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.min_observations = min_observations
+        self.rtt = None
+        self.navigation = initial_navigation
+        self.factor = 1.0
+        self._dom = None
+        self._dom_since = clock()
+        self._url_since = clock()
+        self._unchanged = 0
+
+    def _ewma(self, current, sample):
+        return sample if current is None else current + self.alpha * (sample - current)
+
+    def observe(self, page, rtt):
+        now = self.clock()
+        self.rtt = self._ewma(self.rtt, rtt)
+        if getattr(page, 'throttled', False) or page.state == 'error':
+            self.factor = min(self.factor * self.backoff, self.max_backoff)
+        else:
+            self.factor = max(1.0, self.factor / self.backoff)
+
+        dom = getattr(page, 'dom', None)
+        if dom is None or dom != self._dom:
+            self._dom = dom
+            self._dom_since = now
+            self._unchanged = 0
+        else:
+            self._unchanged += 1
+        if page.url != self._last_url:
+            self._last_url = page.url
+            self._url_since = now
+
+    def navigated(self, seconds):
+        self.navigation = self._ewma(self.navigation, seconds)
+
+    def stagnant_after(self):
+        return min(5.0, max(1.0, 4 * self.navigation))
+
+    def should_refresh(self):
+        if self.factor > 1.0:
+            # 限流期间刷新只会加重限流
+            return False
+        now = self.clock()
+        if self._dom is not None and self._unchanged >= self.min_observations \
+                and now - self._dom_since >= self.stagnant_after():
+            return True
+        return now - self._url_since >= MAX_STALL
+
+    def refreshed(self):
+        now = self.clock()
+        self._dom = None
+        self._dom_since = now
+        self._url_since = now
+        self._unchanged = 0
+
+    def _clamp(self, value, low):
+        return min(self.max_interval * self.factor, max(low, value) * self.factor)
+
+    def retry_interval(self):
+        return self._clamp(self.rtt or 0.0, self._retry_interval)
+
+    def poll_interval(self):
+        return self._clamp(min(0.25, self.navigation / 8), self._retry_interval)
+
+    def settle_delay(self):
+        # 点击后已在navigation_polls中确认跳转，这里只需一个轮询间隔
+        return self.poll_interval()
+
+    def refresh_delay(self):
+        return self._clamp(min(2.0, self.navigation), self._retry_interval)
+
+
+POLICIES = {
+    FixedPacing.name: FixedPacing,
+    AdaptivePacing.name: AdaptivePacing,
+}
+
+
+def make_pacing(policy='adaptive', **kwargs):
+    """按名称创建节奏策略，已是策略对象时原样返回"""
+    if isinstance(policy, str):
+        try:
+            return POLICIES[policy](**kwargs)
+        except KeyError:
+            raise ValueError(f"未知的节奏策略: {policy}，可选: {', '.join(POLICIES)}")
+    return policy
@@ -9,30 +9,35 @@
 from time import sleep
 from selenium.webdriver.support.ui import WebDriverWait
 from .react_utils import ReactPageUtils
+from .script_runner import ScriptRunner
+from .log import get_logger
+
+logger = get_logger(__name__)
 
 class PageLoader:
     """页面加载工具类 - 性能优化版"""
     
-    def __init__(self, driver):
+    def __init__(self, driver, scripts=None):
         self.driver = driver
         self.react_utils = ReactPageUtils()
+        self.scripts = scripts or ScriptRunner(driver)
     
     def wait_for_cart_page_load(self, timeout=8):
         """等待购物车页面完全加载 - 快速版"""
         try:
-            print("⚡ 快速等待购物车页面加载...")
+            logger.info("⚡ 快速等待购物车页面加载...")
             return self._wait_for_react_page_load_fast(timeout, 'cart')
         except Exception as e:
-            print(f"⚠️  购物车页面加载失败: {e}")
+            logger.warning("⚠️  购物车页面加载失败: %s", e)
             return False
     
     def wait_for_order_page_load(self, timeout=10):
         """等待订单确认页面完全加载 - 快速版"""
         try:
-            print("⚡ 快速等待订单确认页面加载...")
+            logger.info("⚡ 快速等待订单确认页面加载...")
             return self._wait_for_react_page_load_fast(timeout, 'order')
         except Exception as e:
-            print(f"⚠️  订单页面加载失败: {e}")
+            logger.warning("⚠️  订单页面加载失败: %s", e)
             return False
     
     def _wait_for_react_page_load_fast(self, timeout, page_type):
@@ -40,18 +45,18 @@ class PageLoader:
         # 1. 快速DOM检查
         try:
             WebDriverWait(self.driver, 3).until(
-                lambda d: d.execute_script("return document.readyState") == "complete"
+                lambda d: self.scripts.run('ready_state', "return document.readyState") == "complete"
             )
-            print("   ✅ DOM就绪")
+            logger.info("   ✅ DOM就绪")
         except:
-            print("   ⚠️  DOM加载超时，继续执行")
+            logger.warning("   ⚠️  DOM加载超时，继续执行")
         
         # 2. 并行检查React容器和内容
-        print("   ⚡ 检查React应用状态...")
+        logger.debug("   ⚡ 检查React应用状态...")
         for i in range(timeout):
             try:
                 # 一次性检查所有条件
-                status = self.driver.execute_script("""
+                status = self.scripts.run('react_ready', """
                     // 检查容器
                     var container = document.getElementById('ice-container');
                     if (!container) return {ready: false, reason: 'no_container'};
@@ -92,27 +97,27 @@ class PageLoader:
                 """, page_type)
                 
                 if status['ready']:
-                    print(f"   ✅ {page_type}页面就绪 (元素:{status['elements']}, 文本:{status['textLength']})")
+                    logger.debug("   ✅ %s页面就绪 (元素:%s, 文本:%s)", page_type, status['elements'], status['textLength'])
                     # 最小等待确保稳定
                     sleep(0.5)
                     return True
                     
                 if i % 2 == 1:  # 每2秒报告一次
-                    print(f"   ⏳ 等待{page_type}内容... ({i+1}/{timeout}) - {status['reason']}")
+                    logger.debug("   ⏳ 等待%s内容... (%s/%s) - %s", page_type, i+1, timeout, status['reason'])
                 
             except Exception as e:
                 if i > timeout * 0.7:  # 后期才报告错误
-                    print(f"   ⚠️  检查异常: {e}")
+                    logger.warning("   ⚠️  检查异常: %s", e)
             
             sleep(1)
         
-        print(f"   ⚠️  {page_type}页面加载超时，但继续执行")
+        logger.warning("   ⚠️  %s页面加载超时，但继续执行", page_type)
         return True  # 超时也返回True，避免阻塞
     
     def quick_content_check(self, page_type):
         """快速内容检查，不等待"""
         try:
-            result = self.driver.execute_script("""
+            result = self.scripts.run('quick_content_check', """
                 var container = document.getElementById('ice-container');
                 if (!container) return false;
                 
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+事件驱动的支付流程
+密码框和支付结果都由页面内MutationObserver等待，页面跳转时重新挂载观察器，
+确认结果后立即返回，不再固定等待
+"""
+
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import WebDriverException
+
+from .react_utils import ReactPageUtils
+from .script_runner import ScriptRunner
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+PASSWORD_SELECTOR = '.sixDigitPassword'
+SUBMIT_SELECTOR = '#J_authSubmit'
+
+# 支付结果只在这些域名（及子域名）的页面上判断：支付宝收银台和淘宝付款成功页
+RESULT_HOSTS = ('alipay.com', 'trade.taobao.com')
+
+# 支付结果
+SUCCESS = 'success'
+FAILED = 'failed'
+TIMEOUT = 'timeout'
+
+
+class PaymentFlow:
+    """输入支付密码并确认结果
+
+    单次异步脚本等待不超过chunk秒（低于WebDriver默认30秒脚本超时），
+    页面跳转导致脚本中断时在新页面上重新等待，直到总超时
+    """
+
+    def __init__(self, driver, password, scripts=None, password_timeout=15, result_timeout=15, chunk=10):
+        self.driver = driver
+        self.password = password
+        self.scripts = scripts or ScriptRunner(driver)
+        self.password_timeout = password_timeout
+        self.result_timeout = result_timeout
+        self.chunk = chunk
+
+    def run(self):
+        """执行支付，返回SUCCESS/FAILED/TIMEOUT"""
+        if not self._wait_for(PASSWORD_SELECTOR, self.password_timeout):
+            logger.error("❌ 未出现支付密码框")
+            return TIMEOUT
+        password_input = self.driver.find_element(By.CSS_SELECTOR, PASSWORD_SELECTOR)
+        password_input.clear()
+        password_input.send_keys(self.password)
+        logger.info("✅ 已输入支付密码")
+
+        if not self._wait_for(SUBMIT_SELECTOR, self.password_timeout):
+            logger.error("❌ 未找到支付确认按钮")
+            return TIMEOUT
+        self.driver.find_element(By.CSS_SELECTOR, SUBMIT_SELECTOR).click()
+
+        result = self._wait_for_result()
+        if result == SUCCESS:
+            logger.info("✅ 支付成功，已确认结果页")
+        elif result == FAILED:
+            logger.error("❌ 支付失败（结果页提示失败）")
+        else:
+            logger.warning("⚠️  %s秒内未确认支付结果", self.result_timeout)
+        return result
+
+    def _wait_for(self, selector, timeout):
+        """等待元素出现，跨页面跳转重试"""
+        script = ReactPageUtils.get_wait_for_element_script()
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                if self.scripts.run_async('wait_for_element', script, selector,
+                                          int(min(remaining, self.chunk) * 1000)):
+                    return True
+            except WebDriverException:
+                # 页面跳转中脚本被中断，新页面上重新挂载
+                time.sleep(0.05)
+
+    def _wait_for_result(self):
+        script = ReactPageUtils.get_payment_result_script()
+        deadline = time.monotonic() + self.result_timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return TIMEOUT
+            try:
+                result = self.scripts.run_async('payment_result', script, int(min(remaining, self.chunk) * 1000),
+                                               list(RESULT_HOSTS))
+                if result:
+                    return result
+            except WebDriverException:
+                time.sleep(0.05)
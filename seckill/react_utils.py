@@ -6,9 +6,51 @@ React页面处理工具模块 - 修复版
 专门解决结算按钮点击和页面跳转问题
 """
 
+INSTRUMENT_TEMPLATE = """
+    var __perf = {nodes: 0, layoutReads: 0};
+    var __dqsa = Document.prototype.querySelectorAll;
+    var __eqsa = Element.prototype.querySelectorAll;
+    var __gbcr = Element.prototype.getBoundingClientRect;
+    var __gcs = window.getComputedStyle;
+    Document.prototype.querySelectorAll = function() {
+        var r = __dqsa.apply(this, arguments); __perf.nodes += r.length; return r;
+    };
+    Element.prototype.querySelectorAll = function() {
+        var r = __eqsa.apply(this, arguments); __perf.nodes += r.length; return r;
+    };
+    Element.prototype.getBoundingClientRect = function() {
+        __perf.layoutReads++; return __gbcr.apply(this, arguments);
+    };
+    window.getComputedStyle = function() {
+        __perf.layoutReads++; return __gcs.apply(window, arguments);
+    };
+    var __t0 = performance.now(), __value;
+    try {
+        __value = (function() {
+%s
+        }).apply(this, arguments);
+    } finally {
+        __perf.scriptMs = performance.now() - __t0;
+        Document.prototype.querySelectorAll = __dqsa;
+        Element.prototype.querySelectorAll = __eqsa;
+        Element.prototype.getBoundingClientRect = __gbcr;
+        window.getComputedStyle = __gcs;
+    }
+    return {__perf: __perf, value: __value === undefined ? null : __value};
+"""
+
+
 class ReactPageUtils:
     """React页面处理工具类 - 修复版"""
-    
+
+    @staticmethod
+    def instrument(script):
+        """包装脚本：在页面内统计执行耗时、访问的DOM节点数和布局读取次数
+
+        返回值变为 {__perf: {scriptMs, nodes, layoutReads}, value: 原返回值}
+        """
+        return INSTRUMENT_TEMPLATE % script
+
     @staticmethod
     def get_hide_loading_script():
         """获取隐藏加载动画的脚本"""
@@ -335,6 +377,64 @@ class ReactPageUtils:
             return findAndClickSubmitButton();
         """
     
+    @staticmethod
+    def get_inspect_submit_button_script():
+        """演练模式：查找提交订单按钮但不点击，返回按钮是否可见、可用
+
+        参数: arguments[0]=状态分类器已找到的按钮句柄（可为null）
+        查找顺序与get_find_submit_button_script一致：SPM选择器，再按文本打分
+        """
+        return """
+            function visible(el) {
+                var rect = el.getBoundingClientRect();
+                return rect.width > 30 && rect.height > 20;
+            }
+            
+            function describe(el, method) {
+                var style = window.getComputedStyle(el);
+                var rect = el.getBoundingClientRect();
+                var cls = (typeof el.className === 'string') ? el.className : '';
+                var enabled = !el.disabled && el.getAttribute('aria-disabled') !== 'true' &&
+                    !/(^|[-_ ])disabled?([-_ ]|$)/i.test(cls) && style.pointerEvents !== 'none';
+                return {
+                    found: true,
+                    method: method,
+                    text: (el.textContent || el.value || '').trim().slice(0, 30),
+                    enabled: enabled,
+                    visible: visible(el) && style.visibility !== 'hidden',
+                    rect: [Math.round(rect.left), Math.round(rect.top), Math.round(rect.width), Math.round(rect.height)]
+                };
+            }
+            
+            if(arguments[0]) return describe(arguments[0], 'state-handle');
+            
+            var selectors = ['button[data-spm*="submit"]', 'button[data-spm*="order"]', 'button[data-spm*="pay"]',
+                             'a[data-spm*="submit"]', 'a[data-spm*="order"]'];
+            for(var i = 0; i < selectors.length; i++) {
+                var elements = document.querySelectorAll(selectors[i]);
+                for(var j = 0; j < elements.length; j++) {
+                    if(visible(elements[j])) return describe(elements[j], 'spm-submit');
+                }
+            }
+            
+            var texts = ['提交订单', '立即支付', '确认支付'];
+            var best = null, bestScore = 0;
+            var buttons = document.querySelectorAll('button, a, input[type="submit"]');
+            for(var k = 0; k < buttons.length; k++) {
+                var btn = buttons[k];
+                var text = (btn.textContent || btn.value || '').trim();
+                for(var t = 0; t < texts.length; t++) {
+                    if(text.includes(texts[t]) && visible(btn)) {
+                        var rect = btn.getBoundingClientRect();
+                        var score = (text === texts[t] ? 1000 : 500) + (btn.tagName === 'BUTTON' ? 300 : 0) + rect.right + rect.bottom;
+                        if(score > bestScore) { bestScore = score; best = btn; }
+                        break;
+                    }
+                }
+            }
+            return best ? describe(best, 'text-match') : {found: false};
+        """
+    
     @staticmethod
     def get_verify_selection_script():
         """获取验证商品选择状态的脚本 - 优化版"""
@@ -369,6 +469,65 @@ class ReactPageUtils:
             };
         """
     
+    @staticmethod
+    def get_page_state_script():
+        """页面状态分类脚本 - 一次调用返回状态码、URL签名和后续操作需要的元素句柄"""
+        return """
+            var href = window.location.href;
+            var url = href.toLowerCase();
+            var state = 'unknown', via = 'url';
+
+            // 与原有判断顺序一致：购物车 > 订单 > 支付
+            if(url.includes('cart')) {
+                state = 'cart';
+            } else if(url.includes('buy') || url.includes('order') || url.includes('confirm') || url.includes('checkout')) {
+                state = 'order';
+            } else if(url.includes('cashier') || url.includes('pay')) {
+                state = 'payment';
+            } else {
+                // URL无法判断时才扫描页面文本
+                via = 'text';
+                var text = document.body ? document.body.textContent : '';
+                if(text.includes('页面出错') || text.includes('网络异常')) state = 'error';
+                else if(text.includes('购物车') || text.includes('结算')) state = 'cart';
+                else if(text.includes('提交订单') || text.includes('确认订单')) state = 'order';
+                else if(text.includes('支付') || text.includes('收银台')) state = 'payment';
+            }
+
+            // 顺带取回当前状态下要点击的按钮句柄（精确文本匹配，找不到返回null）
+            var handle = null;
+            var targets = {cart: /^结算\\s*(\\(\\d+\\))?$/, order: /^提交订单$/};
+            if(targets[state]) {
+                var buttons = document.querySelectorAll('button, a, [role="button"]');
+                for(var i = 0; i < buttons.length; i++) {
+                    var t = (buttons[i].textContent || '').trim();
+                    if(targets[state].test(t) && !buttons[i].disabled) {
+                        var rect = buttons[i].getBoundingClientRect();
+                        if(rect.width > 30 && rect.height > 20) {
+                            handle = buttons[i];
+                            break;
+                        }
+                    }
+                }
+            }
+
+            // DOM签名：每个文档一个随机标识加上变更计数，用于判断页面是否停滞
+            if(!window.__seckillDom) {
+                window.__seckillDom = {id: Math.random().toString(36).slice(2), n: 0};
+                try {
+                    new MutationObserver(function(records) { window.__seckillDom.n += records.length; })
+                        .observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+                } catch(e) {}
+            }
+            var dom = window.__seckillDom.id + ':' + window.__seckillDom.n;
+
+            // 限流/风控信号：跳转到风控页或出现滑块验证
+            var throttled = /punish|x5sec|captcha/.test(url) ||
+                !!document.querySelector('#nc_1_wrapper, .nc-container, #baxia-dialog-content');
+
+            return {state: state, via: via, url: href, handle: handle, dom: dom, throttled: throttled};
+        """
+
     @staticmethod
     def get_page_content_check_script():
         """获取页面内容检查脚本"""
@@ -888,4 +1047,200 @@ class ReactPageUtils:
             }
             
             return {success: false, reason: '未找到任何可点击的结算相关元素'};
-        """ 
\ No newline at end of file
+        """
+    
+    @staticmethod
+    def get_wait_for_element_script():
+        """异步脚本：等待可见可用的元素出现（MutationObserver驱动，不轮询）
+
+        参数: arguments[0]=CSS选择器, arguments[1]=超时毫秒；回调结果为true/false
+        """
+        return """
+            var selector = arguments[0], timeout = arguments[1];
+            var done = arguments[arguments.length - 1];
+            
+            function ready() {
+                var el = document.querySelector(selector);
+                return !!(el && !el.disabled && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+            }
+            
+            if (ready()) { done(true); return; }
+            
+            var observer = new MutationObserver(function() {
+                if (ready()) {
+                    observer.disconnect();
+                    clearTimeout(timer);
+                    done(true);
+                }
+            });
+            var timer = setTimeout(function() {
+                observer.disconnect();
+                done(false);
+            }, timeout);
+            observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+        """
+    
+    @staticmethod
+    def get_payment_result_script():
+        """异步脚本：等待支付结果页，回调'success'、'failed'或null（超时）
+
+        参数: arguments[0]=超时毫秒，arguments[1]=收银台域名列表（payment.RESULT_HOSTS）
+        只在收银台域名的页面上判断：失败提示优先；成功须在结果页路径上，
+        路径是付款成功页或页面出现"支付成功"，其他页面上的同样文字不算
+        """
+        return """
+            var timeout = arguments[0];
+            var hosts = arguments.length > 2 ? arguments[1] : ['alipay.com', 'trade.taobao.com'];
+            var done = arguments[arguments.length - 1];
+            
+            function onResultHost() {
+                var host = location.hostname;
+                return hosts.some(function(h) {
+                    return host === h || host.slice(-h.length - 1) === '.' + h;
+                });
+            }
+            
+            function check() {
+                if (!onResultHost()) return null;
+                var path = location.pathname;
+                var text = document.body ? document.body.textContent : '';
+                if (/密码错误|密码不正确|支付失败|付款失败/.test(text)) return 'failed';
+                if (/pay_?success|trade_?success/i.test(path)) return 'success';
+                if (/\\/result\\/|payresult/i.test(path) && /支付成功|付款成功/.test(text)) return 'success';
+                return null;
+            }
+            
+            var result = check();
+            if (result) { done(result); return; }
+            
+            var observer = new MutationObserver(function() {
+                var r = check();
+                if (r) {
+                    observer.disconnect();
+                    clearTimeout(timer);
+                    done(r);
+                }
+            });
+            var timer = setTimeout(function() {
+                observer.disconnect();
+                done(null);
+            }, timeout);
+            observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+        """
+    
+    @staticmethod
+    def get_buy_now_script():
+        """立即购买：在当前页面构造详情页的购买表单并POST提交，直接进入订单确认页
+
+        参数: arguments[0]=表单提交地址，arguments[1]=表单字段（taobao_api.buy_now_form）
+        不需要加载商品详情页或购物车，当前页面只要与buy.taobao.com同站即可带上登录cookie
+        """
+        return """
+            var form = document.createElement('form');
+            form.method = 'POST';
+            form.action = arguments[0];
+            form.style.display = 'none';
+            var fields = arguments[1] || {};
+            for(var name in fields) {
+                var input = document.createElement('input');
+                input.type = 'hidden';
+                input.name = name;
+                input.value = fields[name];
+                form.appendChild(input);
+            }
+            document.body.appendChild(form);
+            window.__buyNowStale = true;
+            form.submit();
+            return {success: true, fields: Object.keys(fields).length};
+        """
+    
+    @staticmethod
+    def get_select_items_script():
+        """只勾选指定商品的脚本，其余已勾选商品取消勾选
+
+        参数: arguments[0]=目标列表，元素为商品ID或"商品ID:SKU ID"（只勾选该SKU的行）
+        先一次遍历所有复选框建立 行 → 商品ID/SKU ID 的映射，再集中切换需要变化的复选框，
+        不等待合计金额，由调用方在全部切换后统一等待一次
+        """
+        return """
+            var wantItems = {}, wantSkus = {}, hit = {};
+            (arguments[0] || []).forEach(function(target) {
+                var parts = String(target).split(':');
+                if(parts.length > 1 && parts[1]) wantSkus[parts[1]] = String(target);
+                else wantItems[parts[0]] = parts[0];
+            });
+            var targets = Object.keys(wantItems).concat(Object.keys(wantSkus).map(function(k) { return wantSkus[k]; }));
+            var result = {requested: targets.length, rows: 0, found: 0, selected: 0, deselected: 0, missing: []};
+            
+            // 每个祖先节点包含的复选框数量，一次遍历得出；商品行是只含一个复选框的最外层祖先
+            var boxes = document.querySelectorAll('input[type="checkbox"]');
+            var counts = new Map();
+            for(var i = 0; i < boxes.length; i++) {
+                for(var n = boxes[i].parentElement; n && n !== document.body; n = n.parentElement) {
+                    counts.set(n, (counts.get(n) || 0) + 1);
+                }
+            }
+            
+            function rowOf(cb) {
+                var row = null;
+                for(var n = cb.parentElement; n && n !== document.body && counts.get(n) === 1; n = n.parentElement) {
+                    row = n;
+                }
+                return row;
+            }
+            
+            function attrOf(row, name) {
+                if(row.hasAttribute(name)) return row.getAttribute(name);
+                var el = row.querySelector('[' + name + ']');
+                return el ? el.getAttribute(name) : null;
+            }
+            
+            function paramOf(row, pattern) {
+                var link = row.querySelector('a[href*="id="]');
+                var m = link && pattern.exec(link.getAttribute('href'));
+                return m ? m[1] : null;
+            }
+            
+            // 读阶段：确定每个需要切换的复选框
+            var toggles = [];
+            for(var j = 0; j < boxes.length; j++) {
+                var cb = boxes[j];
+                if(cb.disabled) continue;
+                var row = rowOf(cb);
+                if(!row) continue;
+                var item = attrOf(row, 'data-item-id') || paramOf(row, /[?&]id=(\\d+)/);
+                if(!item) continue;
+                var sku = attrOf(row, 'data-sku-id') || paramOf(row, /[?&]skuId=(\\d+)/);
+                result.rows++;
+                
+                var target = (sku && wantSkus[sku]) || wantItems[item];
+                if(target) {
+                    hit[target] = true;
+                    result.found++;
+                    if(!cb.checked) toggles.push([cb, true]);
+                    else result.selected++;
+                } else if(cb.checked) {
+                    toggles.push([cb, false]);
+                }
+            }
+            
+            // 写阶段：集中切换，期间不读取布局
+            for(var k = 0; k < toggles.length; k++) {
+                var box = toggles[k][0], checked = toggles[k][1];
+                try {
+                    box.click();
+                } catch(e) {
+                    box.checked = checked;
+                    box.dispatchEvent(new Event('change', {bubbles: true}));
+                }
+                if(box.checked === checked) {
+                    if(checked) result.selected++;
+                    else result.deselected++;
+                }
+            }
+            
+            targets.forEach(function(target) {
+                if(!hit[target]) result.missing.push(target);
+            });
+            return result;
+        """
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+抢购流程检查点与浏览器看门狗
+抢购中chromedriver或Chrome崩溃（常见于内存紧张时）后，后续每个WebDriver命令都会失败，
+旧流程把异常记进调试轨迹后继续对着失效的浏览器重试，直到用完重试次数。
+
+Checkpoint记录流程走到了哪一步，以及换浏览器后继续所需的数据：
+  cookies  布防时的登录cookie，用CDP一次写入新浏览器
+  confirm  购物车目标行的结算参数，新浏览器直接POST结算表单进入订单确认页，不再加载和勾选购物车（立即购买时由目标商品/SKU重新生成）
+  origin   布防时所在页面，新浏览器不在同一站点时先打开它，保证POST带上登录cookie
+  order_url  到达的订单确认页
+
+DriverWatchdog在后台线程检查chromedriver进程（以及Linux上它启动的浏览器进程）是否还在，不发送WebDriver命令，
+不与抢购线程争用浏览器；抢购线程遇到异常时用report()按错误信息判断浏览器是否可能已失效，
+再确认进程已退出或另一个WebDriver命令同样失败后才标记（页面断网、iframe跳转等错误信息相似但浏览器仍可用）。
+"""
+
+import time
+import threading
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+# 流程阶段，按推进顺序
+ARMED = 'armed'            # 布防完成，cookie和结算参数已保存
+FIRED = 'fired'            # 已开抢，购物车尚未勾选
+CONFIRM = 'confirm'        # 已勾选（或立即购买），可直接POST结算表单进入订单确认页
+ORDER = 'order'            # 已进入订单确认页
+SUBMITTING = 'submitting'  # 已发出提交订单点击，结果未确认
+DONE = 'done'              # 已到达收银台/演练完成
+PHASES = (ARMED, FIRED, CONFIRM, ORDER, SUBMITTING, DONE)
+
+# 说明浏览器或chromedriver可能已失效的错误信息片段（小写），取chromedriver和urllib3的原文，
+# 不用'disconnected'这类宽泛片段（会匹配页面的net::ERR_INTERNET_DISCONNECTED）
+DEAD_DRIVER_ERRORS = (
+    'invalid session id', 'chrome not reachable', 'disconnected: not connected to devtools',
+    'session deleted because of page crash', 'tab crashed', 'no such window: target window already closed',
+    'connection refused', 'max retries exceeded', 'remotedisconnected', 'connection aborted',
+)
+
+
+def is_driver_dead(error):
+    """异常是否像浏览器/chromedriver已失效（而不是页面元素找不到之类的普通失败），只看错误信息，未经确认"""
+    if isinstance(error, ConnectionError):
+        return True
+    message = str(error).lower()
+    return any(fragment in message for fragment in DEAD_DRIVER_ERRORS)
+
+
+class Checkpoint:
+    """抢购流程检查点：阶段只前进不后退，in_flight标记结果尚未确认的操作"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.phase = None
+        self.in_flight = None
+        self.cookies = None
+        self.confirm = None
+        self.origin = None
+        self.order_url = None
+        self.reached = {}  # 阶段 -> 到达时间
+
+    def advance(self, phase, **data):
+        """推进到phase（已经过的阶段忽略），同时保存恢复所需的数据"""
+        for key, value in data.items():
+            setattr(self, key, value)
+        if self.phase is None or PHASES.index(phase) > PHASES.index(self.phase):
+            self.phase = phase
+            self.reached[phase] = self.clock()
+            return True
+        return False
+
+    def at_least(self, phase):
+        return self.phase is not None and PHASES.index(self.phase) >= PHASES.index(phase)
+
+    def attempt(self, step):
+        """标记正在进行、结果未确认的操作；确认结果后调用attempt(None)"""
+        self.in_flight = step
+
+    def to_json(self):
+        return {'phase': self.phase, 'in_flight': self.in_flight, 'confirm': self.confirm is not None,
+                'cookies': len(self.cookies) if self.cookies is not None else 0, 'order_url': self.order_url}
+
+
+def _describe(error):
+    return str(error).strip()[:120]
+
+
+def _browser_pids(pid):
+    """Linux上chromedriver启动的浏览器主进程号，其他平台返回空列表"""
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children', 'r') as f:
+            children = [int(child) for child in f.read().split()]
+    except (OSError, ValueError):
+        return []
+    pids = []
+    for child in children:
+        try:
+            with open(f'/proc/{child}/comm', 'r') as f:
+                if 'chrom' in f.read().lower():
+                    pids.append(child)
+        except OSError:
+            continue
+    return pids
+
+
+def _pid_alive(pid):
+    """进程存在且不是僵尸进程"""
+    try:
+        with open(f'/proc/{pid}/stat', 'r') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except OSError:
+        return False
+
+
+def quit_driver(driver):
+    """关闭浏览器，忽略已失效浏览器的错误"""
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+class DriverWatchdog:
+    """浏览器看门狗
+
+    interval: 后台检查间隔（秒），只读取进程状态，开销可以忽略
+    on_death: 可选，判定失效时以原因调用（在看门狗线程或report()的调用线程中执行）
+    """
+
+    def __init__(self, driver, interval=0.01, on_death=None):
+        self.interval = interval
+        self.on_death = on_death
+        self.reason = None
+        self.died_at = None
+        self._died = threading.Event()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.watch(driver)
+
+    def watch(self, driver):
+        """开始看守driver（换浏览器后调用），清除失效状态"""
+        process = getattr(getattr(driver, 'service', None), 'process', None)
+        with self._lock:
+            self.driver = driver
+            self._process = process
+            self._browsers = _browser_pids(process.pid) if process is not None else []
+            self.reason = None
+            self.died_at = None
+            self._died.clear()
+
+    @property
+    def dead(self):
+        return self._died.is_set()
+
+    def alive(self):
+        """只检查进程：chromedriver已退出或浏览器主进程已消失时返回False"""
+        process = self._process
+        if process is not None and process.poll() is not None:
+            return False
+        return all(_pid_alive(pid) for pid in self._browsers)
+
+    def report(self, error):
+        """抢购线程遇到异常时调用，错误像浏览器失效且确认属实时标记并返回True"""
+        if not self.dead and is_driver_dead(error) and self._confirm_dead() is not None:
+            self._mark(f"{type(error).__name__}: {_describe(error)}")
+        return self.dead
+
+    def probe(self):
+        """确认浏览器仍可用（只在操作失败后的慢路径上使用）"""
+        if self.dead:
+            return False
+        reason = self._confirm_dead()
+        if reason is not None:
+            self._mark(reason)
+            return False
+        return True
+
+    def _confirm_dead(self):
+        """进程已退出，或一次不依赖当前标签页的轻量WebDriver命令也报失效错误时返回原因，否则返回None"""
+        if not self.alive():
+            return "浏览器进程已退出"
+        try:
+            self.driver.window_handles
+        except Exception as e:
+            if is_driver_dead(e):
+                return f"{type(e).__name__}: {_describe(e)}"
+        return None
+
+    def _mark(self, reason):
+        with self._lock:
+            if self._died.is_set():
+                return
+            self.reason = reason
+            self.died_at = time.monotonic()
+            self._died.set()
+        logger.warning("💀 浏览器已失效: %s", reason)
+        if self.on_death is not None:
+            self.on_death(reason)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='driver-watchdog', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            if not self._died.is_set() and not self.alive():
+                self._mark("chromedriver或浏览器进程已退出")
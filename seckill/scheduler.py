@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+抢购任务调度器
+一个常驻进程按时间顺序执行多场抢购：任务放在按布防时间排序的优先队列中，
+各账号的浏览器在任务之间保持登录和保活，时间重叠的任务在不同工作线程上执行
+
+用法: python -m seckill.scheduler jobs.json [--lead 180] [--workers 4] [--exit-when-done]
+
+jobs.json示例:
+[
+  {"time": "2024-12-12 20:00:00", "account": "main", "items": ["600001"], "path": "browser", "password": "123456"},
+  {"time": "2024-12-12 20:00:00", "account": "alt", "path": "http"},
+  {"time": "2024-12-12 21:00:00", "account": "alt", "items": ["600002:4800001"], "path": "http", "checkout": "buy_now"}
+]
+"""
+
+import json
+import time
+import heapq
+import argparse
+import itertools
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import seckill.settings as utils_settings
+from .driver_pool import DriverPool
+from .cookie_store import default_store
+from .keep_alive import SessionKeepAlive, CART_URL
+from .timing import PhaseTimer, WAIT, CART_LOAD, SETTLE_CLICK, SUBMIT_CLICK
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 抢购路径
+BROWSER = 'browser'
+HTTP = 'http'
+
+# 下单方式：购物车结算 / 立即购买（从商品/SKU直接进入订单确认，需要指定目标商品）
+CART = 'cart'
+BUY_NOW = 'buy_now'
+
+# 任务状态
+QUEUED = 'queued'
+ARMED = 'armed'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class Job:
+    """一场抢购任务"""
+
+    __slots__ = ('job_id', 'fire_at', 'account', 'targets', 'path', 'password', 'checkout', 'status', 'error',
+                 'timings')
+
+    def __init__(self, job_id, fire_at, account='default', targets=None, path=BROWSER, password=None, checkout=CART):
+        if path not in (BROWSER, HTTP):
+            raise ValueError(f"未知的抢购路径: {path}")
+        if checkout not in (CART, BUY_NOW):
+            raise ValueError(f"未知的下单方式: {checkout}")
+        if checkout == BUY_NOW and not targets:
+            raise ValueError("立即购买需要指定目标商品")
+        self.job_id = job_id
+        self.fire_at = fire_at
+        self.account = account
+        self.targets = [str(t) for t in targets] if targets else []
+        self.path = path
+        self.password = password
+        self.checkout = checkout
+        self.status = QUEUED
+        self.error = None
+        self.timings = {}  # {阶段: 毫秒}
+
+    def __repr__(self):
+        return f"Job#{self.job_id}({self.fire_at:%m-%d %H:%M:%S} {self.account}/{self.path}/{self.checkout} {self.status})"
+
+
+class SeckillScheduler:
+    """按布防时间调度抢购任务的常驻调度器
+
+    arm_lead: 提前多少秒布防（借出浏览器、预热购物车）
+    browsers_per_account: 每个账号最多同时使用的浏览器数，决定同账号重叠任务的并行度
+    driver_factory: 可选，factory(account)返回已登录的WebDriver，默认启动Chrome并登录
+    seckill_options: 传给OptimizedSecKill的额外参数（重试次数、超时、间隔等）
+    dry_run: 演练模式，走完整流程但停在提交订单之前
+    """
+
+    def __init__(self, arm_lead=None, max_workers=None, browsers_per_account=None,
+                 keep_alive_interval=None, keep_alive_mode=None, driver_factory=None, seckill_options=None,
+                 dry_run=False):
+        self.arm_lead = arm_lead if arm_lead is not None else getattr(utils_settings, "WARM_UP_LEAD", 180)
+        self.keep_alive_interval = keep_alive_interval or getattr(utils_settings, "KEEP_ALIVE_INTERVAL", 60)
+        self.keep_alive_mode = keep_alive_mode or getattr(utils_settings, "KEEP_ALIVE_MODE", "fetch")
+        self.browsers_per_account = browsers_per_account or getattr(utils_settings, "SCHEDULER_BROWSERS_PER_ACCOUNT", 2)
+        self.driver_factory = driver_factory
+        self.seckill_options = seckill_options or {}
+        self.dry_run = dry_run
+        self.jobs = []
+        self._heap = []  # [(布防时间戳, 任务号, Job)]
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._running = set()
+        self._stopped = False
+        self._stop_event = threading.Event()  # 停止时唤醒等待开抢的工作线程
+        self._pools = {}
+        # 账号最近一次登录/保活成功时的cookie，用于给新浏览器免扫码登录和HTTP路径
+        self.cookie_store = default_store()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or getattr(utils_settings, "SCHEDULER_MAX_WORKERS", 4),
+            thread_name_prefix='seckill-job',
+        )
+
+    def add_job(self, fire_at, account='default', targets=None, path=BROWSER, password=None, checkout=CART):
+        """添加任务，fire_at为datetime或'%Y-%m-%d %H:%M:%S'字符串"""
+        if isinstance(fire_at, str):
+            fire_at = datetime.strptime(fire_at, TIME_FORMAT)
+        job = Job(next(self._ids), fire_at, account, targets, path, password, checkout)
+        with self._cond:
+            heapq.heappush(self._heap, (fire_at.timestamp() - self.arm_lead, job.job_id, job))
+            self.jobs.append(job)
+            self._cond.notify()
+        logger.info("🗓️  已添加任务 %s", job)
+        return job
+
+    def run_forever(self, exit_when_done=False):
+        """主循环：到布防时间的任务交给工作线程，空闲时为各账号浏览器保活"""
+        last_keep_alive = time.monotonic()
+        while True:
+            job = None
+            with self._cond:
+                if self._stopped or (exit_when_done and not self._heap and not self._running):
+                    break
+                now = time.time()
+                if self._heap and self._heap[0][0] <= now:
+                    job = heapq.heappop(self._heap)[2]
+                else:
+                    timeout = self.keep_alive_interval - (time.monotonic() - last_keep_alive)
+                    if self._heap:
+                        timeout = min(timeout, self._heap[0][0] - now)
+                    self._cond.wait(max(0.0, timeout))
+
+            if job is not None:
+                self._dispatch(job)
+            elif time.monotonic() - last_keep_alive >= self.keep_alive_interval:
+                self._keep_warm()
+                last_keep_alive = time.monotonic()
+
+    def stop(self, wait=True):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._stop_event.set()
+        self._executor.shutdown(wait=wait)
+        for pool in self._pools.values():
+            pool.close()
+
+    def _dispatch(self, job):
+        job.status = ARMED
+        logger.info("🎯 布防 %s，距开抢%.1f秒", job, (job.fire_at - datetime.now()).total_seconds())
+        future = self._executor.submit(self._execute, job)
+        with self._cond:
+            self._running.add(future)
+        future.add_done_callback(self._job_done)
+
+    def _job_done(self, future):
+        with self._cond:
+            self._running.discard(future)
+            self._cond.notify()
+
+    def _execute(self, job):
+        from utils.utils import notify_user
+        try:
+            ok = self._run_http(job) if job.path == HTTP else self._run_browser(job)
+            job.status = SUCCEEDED if ok else FAILED
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            logger.error("❌ %s 执行异常: %s", job, e)
+        logger.info("🏁 %s", job)
+        notify_user(msg=f"淘宝秒杀任务#{job.job_id}({job.account}): {'成功' if job.status == SUCCEEDED else '失败'}")
+
+    def _run_browser(self, job):
+        from optimized_sec_kill import OptimizedSecKill
+
+        pool = self._pool(job.account)
+        driver = pool.acquire(timeout=max(1.0, (job.fire_at - datetime.now()).total_seconds()))
+        optimizer = None
+        try:
+            SessionKeepAlive(driver, mode=self.keep_alive_mode).warm_up()
+            # 任务的目标是一组商品，单个标签页勾选即可；支付、提前轮询、换浏览器恢复和策略统计都在OptimizedSecKill中
+            optimizer = OptimizedSecKill(driver, job.fire_at, password=job.password, driver_pool=pool,
+                                         targets=job.targets, buy_now=job.checkout == BUY_NOW,
+                                         dry_run=self.dry_run, **self.seckill_options)
+            try:
+                return optimizer.optimized_sec_kill()
+            finally:
+                job.timings = {phase: round(ms, 3) for phase, ms in optimizer.timer.durations().items()}
+        finally:
+            # 支付成功时OptimizedSecKill已归还，浏览器可能已被其他任务借走；
+            # 抢购中换过浏览器时归还新借的那个（失效的已被丢弃）
+            if optimizer is None or not optimizer.released:
+                pool.release(driver if optimizer is None else optimizer.driver)
+
+    def _run_http(self, job):
+        from . import taobao_api
+        from .cart import Cart
+        from .availability import AvailabilityWatcher, cart_probe
+
+        # 保活会持续刷新存储中的cookie，未过期时不必再借浏览器
+        cookies = self.cookie_store.load_valid(job.account)
+        if cookies is None:
+            with self._pool(job.account).lease(timeout=max(1.0, (job.fire_at - datetime.now()).total_seconds())) as driver:
+                cookies = self.cookie_store.save(job.account, driver.get_cookies())
+        sess = cookies.apply(requests.Session())
+
+        timer = PhaseTimer()
+        try:
+            if job.checkout == BUY_NOW:
+                return self._http_buy_now(job, sess, timer)
+            # 布防阶段先取好购物车数据并建好索引，到点只发结算和提交两个请求
+            with timer.span(CART_LOAD):
+                first_data, user_id = taobao_api.get_buy_cart(sess)
+                cart = Cart.from_first_data(first_data)
+            target_item, target_sku = taobao_api.parse_target(job.targets[0]) if job.targets else (None, None)
+            lead = getattr(utils_settings, "AVAILABILITY_LEAD", 0)
+            opened = None
+            with timer.span(WAIT, probe=bool(lead)):
+                if lead:
+                    # 提前轮询购物车，目标商品可购买时直接使用这份最新的购物车数据
+                    watcher = AvailabilityWatcher(
+                        cart_probe(sess, target_item, target_sku), job.fire_at, lead=lead,
+                        give_up=getattr(utils_settings, "AVAILABILITY_GIVE_UP", 30),
+                        max_probes=getattr(utils_settings, "AVAILABILITY_MAX_PROBES", 300),
+                        max_rate=getattr(utils_settings, "AVAILABILITY_MAX_RATE", 20),
+                        cancel_event=self._stop_event,
+                    )
+                    opened = watcher.wait()
+                    if opened:
+                        cart, user_id = opened
+                if not opened and not self._sleep_until(job.fire_at):
+                    return False
+
+            parsed = taobao_api.parse_cart_data(cart, item_id=target_item, sku_id=target_sku)
+            if not parsed:
+                return False
+            cart_id, item_id, sku_id, seller_id, cart_params, attributes = parsed
+            with timer.span(SETTLE_CLICK):
+                order_data = taobao_api.confirm_order(cart_id, item_id, sku_id, seller_id, cart_params,
+                                                      attributes, sess=sess)
+            return self._http_submit(order_data, item_id, user_id, sess, timer)
+        finally:
+            job.timings = {phase: round(ms, 3) for phase, ms in timer.durations().items()}
+
+    def _http_buy_now(self, job, sess, timer):
+        """立即购买：不取购物车，到点直接从商品/SKU请求订单确认页"""
+        from . import taobao_api
+
+        item_id, sku_id = taobao_api.parse_target(job.targets[0])
+        user_id = taobao_api.get_user_id(sess)
+        if not user_id:
+            # cookie中没有用户id时退回用购物车接口获取
+            with timer.span(CART_LOAD):
+                _, user_id = taobao_api.get_buy_cart(sess)
+        with timer.span(WAIT):
+            if not self._sleep_until(job.fire_at):
+                return False
+        with timer.span(SETTLE_CLICK, buy_now=True):
+            order_data = taobao_api.buy_now(item_id, sku_id, sess=sess)
+        return self._http_submit(order_data, item_id, user_id, sess, timer)
+
+    def _http_submit(self, order_data, item_id, user_id, sess, timer):
+        from . import taobao_api
+
+        with timer.span(SUBMIT_CLICK, dry_run=self.dry_run):
+            result = taobao_api.submit_order(order_data, item_id, user_id, sess=sess, dry_run=self.dry_run)
+        if not result['ok']:
+            logger.warning("⚠️ 商品%s提交订单失败: %s", item_id, result.get('reason') or result.get('missing'))
+        return result['ok']
+
+    def _sleep_until(self, fire_at):
+        """等到开抢时间，返回是否等到；调度器停止时立即返回False"""
+        while datetime.now() < fire_at:
+            remaining = (fire_at - datetime.now()).total_seconds()
+            if self._stop_event.wait(min(0.3, remaining - 1) if remaining > 1 else 0.01):
+                logger.info("⏹️  调度器已停止，放弃等待开抢")
+                return False
+        return True
+
+    def _pool(self, account):
+        with self._cond:
+            pool = self._pools.get(account)
+            if pool is None:
+                pool = self._pools[account] = DriverPool(
+                    lambda: self._new_driver(account), size=self.browsers_per_account, reset_url=CART_URL,
+                )
+            return pool
+
+    def _new_driver(self, account):
+        """为账号启动新浏览器：优先注入已有cookie免登录，失败时走扫码登录"""
+        if self.driver_factory is not None:
+            return self.driver_factory(account)
+
+        from .seckill_taobao import ChromeDrive
+
+        chrome = ChromeDrive(seckill_time=datetime.now().strftime(TIME_FORMAT), keep_alive_mode=self.keep_alive_mode,
+                             account=account, cookie_store=self.cookie_store)
+        # login()先尝试存储中该账号未过期的cookie，失败时才扫码
+        chrome.login()
+        self.cookie_store.save(account, chrome.driver.get_cookies())
+        return chrome.driver
+
+    def _keep_warm(self):
+        """为空闲浏览器做一次轻量保活，并刷新账号cookie"""
+        for account, pool in list(self._pools.items()):
+            drivers = []
+            while True:
+                driver = pool.take_idle()
+                if driver is None:
+                    break
+                drivers.append(driver)
+            for driver in drivers:
+                try:
+                    keep_alive = SessionKeepAlive(driver, mode=self.keep_alive_mode)
+                    if keep_alive.ping():
+                        self.cookie_store.save(account, driver.get_cookies())
+                        logger.debug("📱 账号%s保活成功，耗时%.0fms", account, keep_alive.last_latency * 1000)
+                    else:
+                        logger.warning("⚠️ 账号%s保活失败", account)
+                finally:
+                    pool.release(driver)
+
+
+def load_jobs(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='抢购任务调度器')
+    parser.add_argument('jobs', help='任务列表JSON文件')
+    parser.add_argument('--lead', type=float, default=None, help='提前布防秒数')
+    parser.add_argument('--workers', type=int, default=None, help='最多同时执行的任务数')
+    parser.add_argument('--exit-when-done', action='store_true', help='所有任务完成后退出')
+    parser.add_argument('--dry-run', action='store_true', help='演练模式：走完整流程但不提交订单')
+    args = parser.parse_args()
+
+    scheduler = SeckillScheduler(arm_lead=args.lead, max_workers=args.workers, dry_run=args.dry_run)
+    for spec in load_jobs(args.jobs):
+        scheduler.add_job(spec['time'], spec.get('account', 'default'), spec.get('items'),
+                          spec.get('path', BROWSER), spec.get('password'), spec.get('checkout', CART))
+    try:
+        scheduler.run_forever(exit_when_done=args.exit_when_done)
+    except KeyboardInterrupt:
+        logger.info("⏹️  收到中断，停止调度")
+    finally:
+        scheduler.stop(wait=False)
+    failed = [job for job in scheduler.jobs if job.status != SUCCEEDED]
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
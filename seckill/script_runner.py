@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+页面脚本执行器
+所有注入脚本统一经过这里执行：页面内计时 + Python侧往返计时，
+两者相减得到WebDriver传输开销，便于区分是脚本慢还是通道慢
+"""
+
+import time
+from statistics import median
+
+from .react_utils import ReactPageUtils
+
+
+class ScriptSpan:
+    """一次脚本执行的耗时拆分（毫秒）"""
+
+    __slots__ = ('name', 'start_ns', 'rtt_ms', 'script_ms', 'nodes', 'layout_reads')
+
+    def __init__(self, name, start_ns, rtt_ms, script_ms=None, nodes=None, layout_reads=None):
+        self.name = name
+        self.start_ns = start_ns
+        self.rtt_ms = rtt_ms
+        self.script_ms = script_ms
+        self.nodes = nodes
+        self.layout_reads = layout_reads
+
+    @property
+    def transport_ms(self):
+        if self.script_ms is None:
+            return None
+        return max(0.0, self.rtt_ms - self.script_ms)
+
+
+class ScriptRunner:
+    """带页面内计时的execute_script包装"""
+
+    def __init__(self, driver, instrument=True, max_spans=10000):
+        self.driver = driver
+        self.instrument = instrument
+        self.max_spans = max_spans
+        self.spans = []
+        self._wrapped = {}
+
+    def run(self, name, script, *args):
+        """执行脚本并返回原始返回值"""
+        if self.instrument:
+            wrapped = self._wrapped.get(script)
+            if wrapped is None:
+                wrapped = self._wrapped[script] = ReactPageUtils.instrument(script)
+        else:
+            wrapped = script
+
+        start_ns = time.monotonic_ns()
+        started = time.perf_counter()
+        raw = self.driver.execute_script(wrapped, *args)
+        rtt_ms = (time.perf_counter() - started) * 1000
+
+        perf = None
+        if self.instrument and isinstance(raw, dict) and '__perf' in raw:
+            perf = raw['__perf'] or {}
+            raw = raw.get('value')
+
+        if len(self.spans) < self.max_spans:
+            if perf is not None:
+                span = ScriptSpan(name, start_ns, rtt_ms, perf.get('scriptMs'),
+                                  perf.get('nodes'), perf.get('layoutReads'))
+            else:
+                span = ScriptSpan(name, start_ns, rtt_ms)
+            self.spans.append(span)
+        return raw
+
+    def run_async(self, name, script, *args):
+        """执行异步脚本（回调式，不做页面内计时），只记录往返耗时"""
+        start_ns = time.monotonic_ns()
+        started = time.perf_counter()
+        try:
+            return self.driver.execute_async_script(script, *args)
+        finally:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(ScriptSpan(name, start_ns, (time.perf_counter() - started) * 1000))
+
+    def summary(self):
+        """按脚本名汇总：次数、往返/脚本/传输耗时中位数、访问节点数和布局读取次数"""
+        grouped = {}
+        for span in self.spans:
+            grouped.setdefault(span.name, []).append(span)
+
+        rows = []
+        for name, spans in grouped.items():
+            timed = [s for s in spans if s.script_ms is not None]
+            rows.append({
+                'name': name,
+                'count': len(spans),
+                'rtt_ms': round(median(s.rtt_ms for s in spans), 3),
+                'script_ms': round(median(s.script_ms for s in timed), 3) if timed else None,
+                'transport_ms': round(median(s.transport_ms for s in timed), 3) if timed else None,
+                'nodes': max((s.nodes or 0) for s in spans),
+                'layout_reads': max((s.layout_reads or 0) for s in spans),
+            })
+        rows.sort(key=lambda r: r['rtt_ms'] * r['count'], reverse=True)
+        return rows
+
+    def format_summary(self):
+        lines = [f"{'脚本':<28}{'次数':>6}{'往返ms':>10}{'脚本ms':>10}{'传输ms':>10}{'节点':>8}{'布局读':>8}"]
+        for r in self.summary():
+            lines.append(f"{r['name']:<28}{r['count']:>6}{r['rtt_ms']:>10}{str(r['script_ms']):>10}"
+                         f"{str(r['transport_ms']):>10}{r['nodes']:>8}{r['layout_reads']:>8}")
+        return '\n'.join(lines)
@@ -3,30 +3,35 @@
 
 
 import os
-import json
 import platform
+import threading
+import time
 from time import sleep
 from random import choice
 from datetime import datetime
+from urllib.parse import urlparse
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import WebDriverException
-from webdriver_manager.chrome import ChromeDriverManager
 
 import seckill.settings as utils_settings
+from seckill.keep_alive import SessionKeepAlive
+from seckill.cookie_store import default_store, load_file
+from seckill.payment import PaymentFlow, SUCCESS
+from seckill.log import get_logger
 from utils.utils import get_useragent_data
 from utils.utils import notify_user
 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-
-from optimized_sec_kill import OptimizedSecKill
 # 直接使用最优版本，无需考虑其他选择
 
 
 
+logger = get_logger(__name__)
+
 # 抢购失败最大次数
 max_retry_count = 30
 
@@ -48,27 +53,50 @@ def default_chrome_path():
 
 class ChromeDrive:
 
-    def __init__(self, chrome_path=None, seckill_time=None, password=None):
+    def __init__(self, chrome_path=None, seckill_time=None, password=None, keep_alive_mode=None,
+                 driver_pool=None, headless=False, login_timeout=60, cookie_file=None,
+                 cancel_event=None, listener=None, targets=None, dry_run=False, buy_now=False,
+                 account='default', cookie_store=None):
         self.chrome_path = chrome_path or default_chrome_path()
         self.seckill_time = seckill_time
         self.seckill_time_obj = datetime.strptime(self.seckill_time, '%Y-%m-%d %H:%M:%S')
         self.password = password
+        self.keep_alive_mode = keep_alive_mode or getattr(utils_settings, "KEEP_ALIVE_MODE", "fetch")
+        # 浏览器池（可选）：设置后从池中借用浏览器，支付确认后立即归还
+        self.driver_pool = driver_pool
+        # 无头模式无法扫码，需要cookie_file或cookie存储中该账号未过期的cookie恢复登录
+        self.headless = headless
+        self.login_timeout = login_timeout
+        self.cookie_file = cookie_file
+        self.account = account
+        self.cookie_store = cookie_store or default_store()
+        # 取消信号和阶段计时回调（GUI后台线程使用）
+        self.cancel_event = cancel_event or threading.Event()
+        self.listener = listener
+        # 目标商品ID（可带":SKU ID"），为空时结算购物车全部商品
+        self.targets = targets
+        # 立即购买：从第一个目标商品/SKU直接进入订单确认页，不经过购物车
+        self.buy_now = buy_now
+        # 演练模式：走完整流程，停在提交订单之前
+        self.dry_run = dry_run
+        self.driver = None
 
     def start_driver(self):
         try:
             driver = self.find_chromedriver()
         except WebDriverException:
-            print("Unable to find chromedriver, Please check the drive path.")
+            logger.error("Unable to find chromedriver, Please check the drive path.")
         else:
             return driver
 
     def find_chromedriver(self):
         try:
-            # 首先尝试使用webdriver-manager自动管理的chromedriver
+            # 首先尝试使用webdriver-manager自动管理的chromedriver（只在启动浏览器时才导入）
+            from webdriver_manager.chrome import ChromeDriverManager
             service = Service(ChromeDriverManager().install())
             driver = webdriver.Chrome(service=service, options=self.build_chrome_options())
 
-        except WebDriverException:
+        except (ImportError, WebDriverException):
             try:
                 # 如果失败，尝试使用系统PATH中的chromedriver
                 driver = webdriver.Chrome(options=self.build_chrome_options())
@@ -97,6 +125,8 @@ class ChromeDrive:
     def build_chrome_options(self):
         """配置启动项"""
         chrome_options = webdriver.ChromeOptions()
+        if self.headless:
+            chrome_options.add_argument('--headless=new')
         
         # 基本配置
         chrome_options.add_argument('--ignore-certificate-errors')
@@ -150,61 +180,71 @@ class ChromeDrive:
     def login(self, login_url: str="https://www.taobao.com"):
         """优化版登录方法，使用多选择器策略"""
         if login_url:
-            self.driver = self.start_driver()
+            self.driver = self.driver_pool.acquire() if self.driver_pool else self.start_driver()
         else:
-            print("Please input the login url.")
+            logger.error("Please input the login url.")
             raise Exception("Please input the login url.")
-
-        print("🔐 开始智能登录流程...")
+        if self.cancel_event.is_set():
+            # 浏览器启动期间已被取消
+            self.quit()
+            raise InterruptedError("已取消")
+
+        if self._restore_cookies(login_url):
+            logger.info("🍪 已通过保存的cookie恢复登录")
+            return
+        if self.headless:
+            raise RuntimeError("无头模式无法扫码登录，请提供有效的cookie文件或先保存该账号的cookie")
+
+        logger.info("🔐 开始智能登录流程...")
         max_login_attempts = 3
         
         for attempt in range(max_login_attempts):
             try:
-                print(f"🔄 第{attempt + 1}次登录尝试...")
+                logger.info("🔄 第%s次登录尝试...", attempt + 1)
                 self.driver.get(login_url)
                 sleep(3)  # 等待页面加载
                 
                 # 检查是否已经登录
                 if self._check_login_status():
-                    print("✅ 检测到已登录状态")
+                    logger.info("✅ 检测到已登录状态")
                     return
                 
                 # 尝试找到登录按钮/链接
                 login_element = self._find_login_element()
                 
                 if login_element:
-                    print("🖱️ 找到登录按钮，准备点击...")
+                    logger.info("🖱️ 找到登录按钮，准备点击...")
                     
                     # 滚动到元素位置并点击
                     self.driver.execute_script("arguments[0].scrollIntoView(true);", login_element)
                     sleep(0.5)
                     self.driver.execute_script("arguments[0].click();", login_element)
                     
-                    print("⏳ 请在60秒内完成登录（扫码或输入账号密码）...")
+                    logger.info("⏳ 请在%s秒内完成登录（扫码或输入账号密码）...", self.login_timeout)
                     
                     # 等待用户完成登录
-                    login_success = self._wait_for_login_completion(60)
+                    login_success = self._wait_for_login_completion(self.login_timeout)
                     
                     if login_success:
-                        print("🎉 登录成功！")
+                        logger.info("🎉 登录成功！")
                         return
                     else:
-                        print("⚠️ 登录超时或失败，准备重试...")
+                        logger.warning("⚠️ 登录超时或失败，准备重试...")
                         continue
                 else:
-                    print("❌ 未找到登录按钮，可能已经登录或页面结构变化")
+                    logger.warning("❌ 未找到登录按钮，可能已经登录或页面结构变化")
                     # 检查是否实际上已经登录了
                     if self._check_login_status():
-                        print("✅ 实际上已经登录")
+                        logger.info("✅ 实际上已经登录")
                         return
                     else:
-                        print("🔄 页面可能需要刷新...")
+                        logger.info("🔄 页面可能需要刷新...")
                         continue
                         
             except Exception as e:
-                print(f"⚠️ 登录过程中出现错误: {str(e)}")
+                logger.warning("⚠️ 登录过程中出现错误: %s", e)
                 if attempt == max_login_attempts - 1:
-                    print("❌ 多次登录尝试失败，请检查网络连接或手动登录")
+                    logger.error("❌ 多次登录尝试失败，请检查网络连接或手动登录")
                     raise
                 continue
     
@@ -240,10 +280,10 @@ class ChromeDrive:
                 element = WebDriverWait(self.driver, 3).until(
                     EC.element_to_be_clickable((by_method, selector))
                 )
-                print(f"✅ 找到登录元素: {description}")
+                logger.info("✅ 找到登录元素: %s", description)
                 return element
             except:
-                print(f"❌ 未找到: {description}")
+                logger.debug("❌ 未找到: %s", description)
                 continue
         
         return None
@@ -265,7 +305,7 @@ class ChromeDrive:
                 try:
                     element = self.driver.find_element(by_method, selector)
                     if element and element.text.strip():
-                        print(f"✅ 检测到登录状态: {description} - {element.text}")
+                        logger.info("✅ 检测到登录状态: %s - %s", description, element.text)
                         return True
                 except:
                     continue
@@ -273,88 +313,204 @@ class ChromeDrive:
             # 检查页面源码中的登录状态
             page_source = self.driver.page_source
             if any(keyword in page_source for keyword in ['我的淘宝', 'mytaobao', 'user-nick']):
-                print("✅ 通过页面源码检测到登录状态")
+                logger.info("✅ 通过页面源码检测到登录状态")
                 return True
                 
             return False
             
         except Exception as e:
-            print(f"⚠️ 登录状态检查失败: {e}")
+            logger.warning("⚠️ 登录状态检查失败: %s", e)
             return False
     
+    def _saved_cookies(self):
+        """cookie_file优先，否则取cookie存储中该账号未过期的cookie
+
+        写入后会检查登录态，所以不限制保存时间（不用load_valid的COOKIE_MAX_AGE）
+        """
+        if self.cookie_file:
+            try:
+                return load_file(self.cookie_file, self.account)
+            except (OSError, ValueError) as e:
+                logger.warning("⚠️ 读取cookie文件失败: %s", e)
+                return None
+        cookies = self.cookie_store.load(self.account)
+        return cookies if cookies is not None and cookies.valid() else None
+
+    def _set_cookies_cdp(self, cookies):
+        """一次CDP Network.setCookies写入所有域名的cookie，不需要先打开页面；不支持CDP时返回False"""
+        try:
+            self.driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies.to_cdp()})
+            return True
+        except (AttributeError, WebDriverException) as e:
+            logger.debug("CDP写入cookie失败，改用add_cookie: %s", e)
+            return False
+
+    def _add_cookies(self, cookies, host):
+        """逐个add_cookie：只能写入当前页面域名的cookie，每个都是一次WebDriver往返"""
+        self.driver.get(f"https://{host}")
+        for cookie in cookies.for_host(host):
+            try:
+                self.driver.add_cookie(cookie)
+            except WebDriverException:
+                continue
+
+    def _restore_cookies(self, url="https://www.taobao.com"):
+        """用保存的cookie恢复登录，返回是否已登录
+
+        首次导航前用CDP批量写入cookie，打开url一次即可确认登录；会话已失效时清掉写入的cookie，回到扫码登录
+        """
+        cookies = self._saved_cookies()
+        if not cookies:
+            return False
+        started = time.perf_counter()
+        bulk = self._set_cookies_cdp(cookies)
+        if bulk:
+            self.driver.get(url)
+        else:
+            self._add_cookies(cookies, urlparse(url).hostname or "www.taobao.com")
+            self.driver.refresh()
+        if self._check_login_status():
+            logger.info("🍪 cookie恢复登录耗时%.0fms（%s）", (time.perf_counter() - started) * 1000,
+                        "CDP批量写入" if bulk else "add_cookie")
+            return True
+        logger.warning("⚠️ 保存的cookie已失效，改为扫码登录")
+        try:
+            if bulk:
+                self.driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            else:
+                self.driver.delete_all_cookies()
+        except WebDriverException:
+            pass
+        return False
+
     def _wait_for_login_completion(self, timeout=60):
         """等待用户完成登录"""
         for i in range(timeout):
-            sleep(1)
+            if self.cancel_event.wait(1):
+                return False
             if self._check_login_status():
                 return True
             
             # 每10秒提示一次
             if i % 10 == 0 and i > 0:
                 remaining = timeout - i
-                print(f"⏳ 等待登录中... ({remaining}秒剩余)")
+                logger.info("⏳ 等待登录中... (%s秒剩余)", remaining)
         
         return False
 
     def keep_wait(self):
         self.login()
-        print("等待到点抢购...")
-        while True:
+        logger.info("等待到点抢购...")
+        keep_alive = SessionKeepAlive(self.driver, mode=self.keep_alive_mode)
+        warm_up_lead = getattr(utils_settings, "WARM_UP_LEAD", 180)
+        interval = getattr(utils_settings, "KEEP_ALIVE_INTERVAL", 60)
+        while not self.cancel_event.is_set():
             current_time = datetime.now()
             time_diff = (self.seckill_time_obj - current_time).total_seconds()
-            
-            print(f"⏰ 当前时间: {current_time.strftime('%H:%M:%S')}")
-            print(f"🎯 目标时间: {self.seckill_time_obj.strftime('%H:%M:%S')}")
-            print(f"⏳ 剩余时间: {time_diff:.1f}秒")
-            
-            if time_diff > 180:  # 如果还有超过3分钟
-                self.driver.get("https://cart.taobao.com/cart.htm")
-                print("📱 每分钟刷新一次界面，防止登录超时...")
-                sleep(60)
+
+            logger.info("⏰ 当前时间: %s", current_time.strftime('%H:%M:%S'))
+            logger.info("🎯 目标时间: %s", self.seckill_time_obj.strftime('%H:%M:%S'))
+            logger.info("⏳ 剩余时间: %.1f秒", time_diff)
+
+            if time_diff > warm_up_lead:  # 距离抢购还早，只做轻量保活
+                if keep_alive.ping():
+                    logger.info("📱 会话保活(%s)成功，耗时%.0fms", keep_alive.mode, keep_alive.last_latency * 1000)
+                else:
+                    logger.warning("⚠️ 会话保活(%s)失败，累计失败%s次", keep_alive.mode, keep_alive.fail_count)
+                self.cancel_event.wait(min(interval, time_diff - warm_up_lead))
             elif time_diff > 0:  # 如果时间还没到但已经很接近
-                print(f"🚀 抢购时间将近({time_diff:.1f}秒)，停止自动刷新，准备进入抢购阶段...")
+                logger.info("🚀 抢购时间将近(%.1f秒)，完整加载一次购物车做最终预热...", time_diff)
+                keep_alive.warm_up()
                 self.get_cookie()
                 break
             else:  # 如果时间已经过了
-                print("⚡ 抢购时间已到或已过，立即进入抢购阶段...")
+                logger.info("⚡ 抢购时间已到或已过，立即进入抢购阶段...")
                 self.get_cookie()
                 break
 
 
     def sec_kill(self):
         """使用优化版秒杀方法"""
-        print("🔄 使用OptimizedSecKill优化版秒杀方法...")
+        from optimized_sec_kill import OptimizedSecKill
+
+        logger.info("🔄 使用OptimizedSecKill优化版秒杀方法...")
         
         # 等待登录和时间
         self.keep_wait()
+        if self.cancel_event.is_set():
+            return False
         
         # 创建优化版秒杀实例
         optimizer = OptimizedSecKill(
             driver=self.driver,
             seckill_time_obj=self.seckill_time_obj,
             password=self.password,
-            max_retry_count=50  # 增加重试次数
+            max_retry_count=50,  # 增加重试次数
+            driver_pool=self.driver_pool,
+            cancel_event=self.cancel_event,
+            listener=self.listener,
+            targets=self.targets,
+            dry_run=self.dry_run,
+            buy_now=self.buy_now,
+            # 没有浏览器池时，浏览器崩溃后新开一个，由检查点中的cookie恢复登录
+            driver_factory=None if self.driver_pool else self.start_driver,
         )
         
         # 执行优化版秒杀
-        return optimizer.optimized_sec_kill()
+        try:
+            return optimizer.optimized_sec_kill()
+        finally:
+            # 抢购中换过浏览器时，后续保活/关闭使用新浏览器
+            self.driver = optimizer.driver
 
 
+    def sec_kill_multi_tab(self, targets):
+        """多标签页并行抢购：每个目标商品（或一组商品）一个标签页"""
+        from seckill.multi_tab import MultiTabSecKill
+
+        self.keep_wait()
+        coordinator = MultiTabSecKill(self.driver, targets, dry_run=self.dry_run).prepare()
+        try:
+            coordinator.run(fire_at=self.seckill_time_obj)
+        finally:
+            coordinator.close()
+        for result in coordinator.results():
+            logger.info("   %s", result)
+        return coordinator.results()
+
     def pay(self):
+        result = None
         try:
-            element = WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.CLASS_NAME, 'sixDigitPassword')))
-            element.send_keys(self.password)
-            WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.ID, 'J_authSubmit'))).click()
-            notify_user(msg="付款成功")
-        except:
-            notify_user(msg="付款失败")
+            result = PaymentFlow(self.driver, self.password).run()
+        except Exception as e:
+            logger.error("❌ 支付异常: %s", e)
         finally:
-            sleep(60)
-            self.driver.quit()
+            # 池中的浏览器无论结果都归还（已失效的由池丢弃），否则一直被占用；
+            # 未使用浏览器池时只在成功后关闭，未确认成功时保留浏览器便于手动完成
+            if self.driver_pool is not None or result == SUCCESS:
+                self.release_driver()
+        notify_user(msg="付款成功" if result == SUCCESS else "付款失败")
+
+    def quit(self):
+        """取消当前流程并关闭浏览器"""
+        self.cancel_event.set()
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+
+    def release_driver(self):
+        """归还浏览器到池中；未使用浏览器池时直接关闭"""
+        if self.driver_pool is not None:
+            self.driver_pool.release(self.driver)
+        else:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
 
 
     def get_cookie(self):
-        cookies = self.driver.get_cookies()
-        cookie_json = json.dumps(cookies)
-        with open('./cookies.txt', 'w', encoding = 'utf-8') as f:
-            f.write(cookie_json)
+        """把当前登录态保存到cookie存储（按账号原子写入）"""
+        return self.cookie_store.save(self.account, self.driver.get_cookies())
@@ -2,4 +2,43 @@
 # encoding=utf-8
 
 
-DRIVER_DIR = "/usr/src/drivers"
\ No newline at end of file
+DRIVER_DIR = "/usr/src/drivers"
+
+# 会话保活：fetch（页面内HEAD请求）/ http（requests会话）/ reload（整页刷新购物车）
+KEEP_ALIVE_MODE = "fetch"
+# 保活间隔（秒）
+KEEP_ALIVE_INTERVAL = 60
+# 距抢购多少秒时停止保活，完整加载一次购物车做最终预热
+WARM_UP_LEAD = 180
+
+# 任务调度器：最多同时执行的任务数、每个账号最多同时使用的浏览器数
+SCHEDULER_MAX_WORKERS = 4
+SCHEDULER_BROWSERS_PER_ACCOUNT = 2
+
+# 开抢前可用性轮询：距标称时间多少秒开始探测商品是否可购买，0表示关闭（到点直接抢）
+AVAILABILITY_LEAD = 0
+# 超过标称时间多少秒仍未开放则停止探测
+AVAILABILITY_GIVE_UP = 30
+# 探测总次数上限和每秒最多探测次数，防止触发限流
+AVAILABILITY_MAX_PROBES = 300
+AVAILABILITY_MAX_RATE = 20
+
+# 抢购循环节奏策略：adaptive（按观测延迟自适应）/ fixed（原有固定间隔）
+PACING_POLICY = "adaptive"
+
+# 结算/提交按钮查找策略排序：ucb（按历史成功率和跳转耗时排序）/ fixed（原有顺序）；统计文件
+STRATEGY_POLICY = "ucb"
+STRATEGY_STATS_PATH = "strategy_stats.json"
+
+# 按账号保存cookie的目录（每个账号一个JSON文件）
+COOKIE_STORE_DIR = "cookies"
+# 存储的cookie最长可信时间（秒）：登录cookie是会话cookie，超过后需重新登录（保活会持续刷新存储）
+COOKIE_MAX_AGE = 3600
+
+# 抢购中浏览器崩溃恢复：看门狗检查间隔（秒）、最多换几次浏览器、等待浏览器池借出的超时（秒）
+WATCHDOG_INTERVAL = 0.01
+MAX_RECOVERIES = 2
+RECOVERY_TIMEOUT = 10
+
+# 调试轨迹文件(debug_seckill.json)大小上限（字节），超过时改名为.1后重新写，0表示不限制
+TRACE_MAX_BYTES = 10 * 1024 * 1024
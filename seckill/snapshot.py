@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+失败快照服务
+抢购失败时在后台抓取页面MHTML、截图和最近的分析脚本结果，压缩并按内容哈希去重保存
+（MHTML每次抓取的分隔符、Date头和资源Content-ID都不同，先统一后再计算哈希）
+"""
+
+import os
+import re
+import json
+import gzip
+import time
+import base64
+import hashlib
+import itertools
+import threading
+from collections import deque, Counter
+from datetime import datetime
+
+import requests
+
+try:
+    import websocket  # websocket-client，selenium 4的依赖
+except ImportError:
+    websocket = None
+
+
+_MHTML_BOUNDARY = re.compile(r'boundary="([^"]+)"')
+_MHTML_DATE = re.compile(r'^Date: [^\r\n]*\r?\n', re.MULTILINE)
+_MHTML_CONTENT_ID = re.compile(r'[\w.-]+@mhtml\.blink')
+
+
+def normalize_mhtml(mhtml):
+    """去掉每次抓取都会变化的部分：分隔符换成固定值，删除Date头，资源Content-ID按出现顺序重新编号"""
+    match = _MHTML_BOUNDARY.search(mhtml)
+    if match:
+        mhtml = mhtml.replace(match.group(1), '----MultipartBoundary--snapshot----')
+    mhtml = _MHTML_DATE.sub('', mhtml, count=1)
+    ids = {}
+    return _MHTML_CONTENT_ID.sub(lambda m: ids.setdefault(m.group(0), f"part-{len(ids)}@mhtml.blink"), mhtml)
+
+
+class CdpSession:
+    """直连浏览器DevTools的独立CDP会话，不占用chromedriver的命令通道"""
+
+    def __init__(self, ws_url, timeout=10):
+        self._ws = websocket.create_connection(ws_url, timeout=timeout, suppress_origin=True)
+        self._ids = itertools.count(1)
+
+    @classmethod
+    def for_target(cls, debugger_address, target_id, timeout=10):
+        targets = requests.get(f"http://{debugger_address}/json", timeout=timeout).json()
+        for target in targets:
+            if target.get('id') == target_id and target.get('webSocketDebuggerUrl'):
+                return cls(target['webSocketDebuggerUrl'], timeout)
+        raise LookupError(f"DevTools target not found: {target_id}")
+
+    def call(self, method, params=None):
+        msg_id = next(self._ids)
+        self._ws.send(json.dumps({'id': msg_id, 'method': method, 'params': params or {}}))
+        while True:
+            msg = json.loads(self._ws.recv())
+            if msg.get('id') == msg_id:
+                if 'error' in msg:
+                    raise RuntimeError(msg['error'])
+                return msg.get('result', {})
+
+    def close(self):
+        try:
+            self._ws.close()
+        except Exception:
+            pass
+
+
+class SnapshotService:
+    """后台失败快照服务
+
+    capture()只把请求放入队列立即返回；后台线程通过独立CDP会话抓取，
+    失败时退回driver.execute_cdp_cmd。内容以gzip压缩、sha256命名存放在blobs/下
+    （MHTML按normalize_mhtml()统一后保存，页面未变化时复用同一个文件），
+    每次快照写一个清单文件；总大小超过budget_bytes时从最旧的清单开始淘汰。
+    用完后调用close()：写完已排队的快照后停止后台线程。
+    """
+
+    def __init__(self, driver, directory='snapshots', budget_bytes=200 * 1024 * 1024,
+                 history=20, queue_size=4, screenshot=True):
+        self.driver = driver
+        self.directory = directory
+        self.blob_dir = os.path.join(directory, 'blobs')
+        self.budget_bytes = budget_bytes
+        self.screenshot = screenshot
+        self.captured = 0
+        self.dropped = 0
+        self._history = deque(maxlen=history)
+        self._queue = deque(maxlen=queue_size)
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._session = None
+        self._target_id = None
+        self._debugger_address = None
+        # 占用空间索引：首次写入时扫描一次目录，之后随写入和淘汰增减，不再每次遍历目录
+        self._manifests = None  # 按时间排序的[(清单路径, 字节数, 引用的内容文件名)]
+        self._blob_sizes = {}   # 内容文件名 -> 字节数
+        self._refs = Counter()  # 内容文件名 -> 引用它的清单数
+        self._total = 0
+        self.rebind(driver)
+        self._thread = threading.Thread(target=self._run, name='snapshot', daemon=True)
+        self._thread.start()
+
+    def rebind(self, driver):
+        """改为抓取driver（抢购中换浏览器后调用）"""
+        self.driver = driver
+        self._reset_session()
+        try:
+            self._target_id = driver.current_window_handle
+            self._debugger_address = driver.capabilities.get('goog:chromeOptions', {}).get('debuggerAddress')
+        except Exception:
+            self._target_id = self._debugger_address = None
+
+    def remember(self, name, result):
+        """保存最近的分析脚本结果，随下一次快照一起落盘"""
+        self._history.append((time.time(), name, result))
+
+    def capture(self, reason, **fields):
+        """请求一次快照（非阻塞，队列满时丢弃最旧的请求）"""
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append((datetime.now().strftime('%Y%m%d-%H%M%S-%f'), reason, fields, list(self._history)))
+        self._wakeup.set()
+
+    def close(self, timeout=10):
+        """写完已排队的快照（最多等待timeout秒）后停止后台线程，关闭CDP会话"""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self._reset_session()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while self._queue:
+                try:
+                    self._take(*self._queue.popleft())
+                except Exception:
+                    self._reset_session()
+            if self._stopped.is_set():
+                return
+
+    def _cdp(self, method, params=None):
+        if websocket is not None and self._debugger_address and self._target_id:
+            try:
+                if self._session is None:
+                    self._session = CdpSession.for_target(self._debugger_address, self._target_id)
+                return self._session.call(method, params)
+            except Exception:
+                self._reset_session()
+        return self.driver.execute_cdp_cmd(method, params or {})
+
+    def _reset_session(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _take(self, stamp, reason, fields, results):
+        os.makedirs(self.blob_dir, exist_ok=True)
+        if self._manifests is None:
+            self._load_index()
+        manifest = {'time': stamp, 'reason': reason, 'results': results}
+        manifest.update(fields)
+
+        mhtml = self._cdp('Page.captureSnapshot', {'format': 'mhtml'}).get('data', '')
+        manifest['dom'] = self._store(normalize_mhtml(mhtml).encode('utf-8'), '.mhtml')
+        if self.screenshot:
+            png = self._cdp('Page.captureScreenshot', {'format': 'png'}).get('data', '')
+            manifest['screenshot'] = self._store(base64.b64decode(png), '.png')
+
+        path = os.path.join(self.directory, f'snapshot-{stamp}.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, default=str)
+        self._add_manifest(path, os.path.getsize(path), (manifest['dom'], manifest.get('screenshot')))
+        self.captured += 1
+        self._enforce_budget()
+
+    def _store(self, data, suffix):
+        """按内容哈希保存，已存在则直接复用"""
+        digest = hashlib.sha256(data).hexdigest()
+        name = digest + suffix + '.gz'
+        if name not in self._blob_sizes:
+            path = os.path.join(self.blob_dir, name)
+            tmp = path + '.tmp'
+            with gzip.open(tmp, 'wb', compresslevel=6) as f:
+                f.write(data)
+            os.replace(tmp, path)
+            self._blob_sizes[name] = os.path.getsize(path)
+            self._total += self._blob_sizes[name]
+        return name
+
+    def _load_index(self):
+        """扫描目录中已有的清单和内容文件（含以前运行留下的），删除没有清单引用的内容文件"""
+        self._manifests, self._blob_sizes, self._refs, self._total = [], {}, Counter(), 0
+        for name in os.listdir(self.blob_dir):
+            self._blob_sizes[name] = os.path.getsize(os.path.join(self.blob_dir, name))
+            self._total += self._blob_sizes[name]
+        for name in sorted(os.listdir(self.directory)):
+            if not name.startswith('snapshot-'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = {}
+            self._add_manifest(path, os.path.getsize(path), (manifest.get('dom'), manifest.get('screenshot')))
+        for name in [n for n in self._blob_sizes if not self._refs[n]]:
+            self._remove_blob(name)
+
+    def _add_manifest(self, path, size, blobs):
+        blobs = tuple(b for b in blobs if b in self._blob_sizes)
+        self._manifests.append((path, size, blobs))
+        self._refs.update(blobs)
+        self._total += size
+
+    def _enforce_budget(self):
+        """从最旧的清单开始淘汰，直到总大小不超过budget_bytes（至少保留最新一份）"""
+        while self._total > self.budget_bytes and len(self._manifests) > 1:
+            path, size, blobs = self._manifests.pop(0)
+            self._remove(path)
+            self._total -= size
+            for name in blobs:
+                self._refs[name] -= 1
+                if self._refs[name] <= 0:
+                    self._remove_blob(name)
+
+    def _remove_blob(self, name):
+        self._refs.pop(name, None)
+        self._total -= self._blob_sizes.pop(name)
+        self._remove(os.path.join(self.blob_dir, name))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+点击策略排序
+结算/提交按钮的查找是一串依次尝试的策略（JS查找、页面分析、深度分析、备用选择器、强力点击）。
+这里持久记录每个策略的尝试次数、成功次数和成功时的跳转耗时，每次执行前按多臂老虎机(UCB1)重新排序：
+收益 = 成功时 scale/(scale+耗时秒)，失败为0，又慢又少成功的策略会自动排到后面。
+
+  ucb    按历史收益加探索项排序（默认）；没有记录的策略按原有顺序给一个递减的先验
+  fixed  保持原有顺序，只记录统计
+
+统计保存在JSON文件中（STRATEGY_STATS_PATH），保存时与文件中已有的数据合并，多个任务可以共用一个文件。
+查看统计: python -m seckill.strategy_stats [strategy_stats.json]
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import threading
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+# 策略执行结果
+WON = 'won'          # 点击后页面跳转
+MISSED = 'missed'    # 未找到/未跳转，继续下一个策略
+STALLED = 'stalled'  # 已点击但未跳转，不再尝试其他策略（避免重复提交）
+
+POLICIES = ('ucb', 'fixed')
+
+_save_lock = threading.Lock()
+
+
+def _empty():
+    return {'tries': 0, 'wins': 0, 'reward': 0.0, 'win_seconds': 0.0}
+
+
+class StrategyStats:
+    """按级联（如settle、submit）分组记录策略统计，并给出每次执行的尝试顺序
+
+    path: 统计文件，为空时只在内存中统计
+    exploration: UCB探索系数，越大越愿意尝试排名靠后的策略
+    scale: 收益的时间尺度（秒），耗时等于scale的成功收益为0.5
+    prior: 没有记录的策略的先验次数，先验收益按原有顺序递减
+    """
+
+    def __init__(self, path=None, policy='ucb', exploration=0.3, scale=1.0, prior=1.0, clock=time.monotonic):
+        if policy not in POLICIES:
+            raise ValueError(f"未知的策略排序方式: {policy}，可选: {', '.join(POLICIES)}")
+        self.path = path
+        self.policy = policy
+        self.exploration = exploration
+        self.scale = scale
+        self.prior = prior
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._stats = self._load(path)
+        self._pending = {}  # 本次运行新增、尚未写入文件的统计
+
+    @staticmethod
+    def _load(path):
+        if not path or not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("⚠️  策略统计读取失败，重新开始统计: %s", e)
+            return {}
+
+    def reward(self, won, seconds):
+        return self.scale / (self.scale + max(0.0, seconds)) if won else 0.0
+
+    def score(self, cascade, name, rank):
+        """UCB1得分；rank为策略在原有顺序中的位置，决定先验收益"""
+        arms = self._stats.get(cascade, {})
+        total = sum(arm['tries'] for arm in arms.values()) + 1
+        arm = arms.get(name) or _empty()
+        n = arm['tries'] + self.prior
+        mean = (arm['reward'] + self.prior * 0.5 / (rank + 1)) / n
+        return mean + self.exploration * math.sqrt(math.log(total + 1) / n)
+
+    def order(self, cascade, names):
+        """返回本次的尝试顺序"""
+        names = list(names)
+        if self.policy == 'fixed':
+            return names
+        with self._lock:
+            scores = {name: self.score(cascade, name, rank) for rank, name in enumerate(names)}
+        # 得分相同时保持原有顺序
+        return sorted(names, key=lambda name: -scores[name])
+
+    def record(self, cascade, name, won, seconds):
+        reward = self.reward(won, seconds)
+        with self._lock:
+            for table in (self._stats, self._pending):
+                arm = table.setdefault(cascade, {}).setdefault(name, _empty())
+                arm['tries'] += 1
+                arm['reward'] += reward
+                if won:
+                    arm['wins'] += 1
+                    arm['win_seconds'] += seconds
+
+    def run(self, cascade, strategies):
+        """按本次顺序执行策略，返回是否有策略成功
+
+        strategies: [(名称, 函数)]，函数返回WON/MISSED/STALLED，抛出异常视为MISSED
+        """
+        return self.run_outcome(cascade, strategies) == WON
+
+    def run_outcome(self, cascade, strategies):
+        """同run()，但返回WON/MISSED/STALLED，嵌套级联据此把STALLED传给外层"""
+        functions = dict(strategies)
+        for name in self.order(cascade, functions):
+            started = self.clock()
+            try:
+                outcome = functions[name]()
+            except Exception as e:
+                logger.warning("❌ 策略%s执行失败: %s", name, e)
+                outcome = MISSED
+            self.record(cascade, name, outcome == WON, self.clock() - started)
+            if outcome == WON:
+                logger.debug("   🏆 %s 由策略%s完成", cascade, name)
+                return WON
+            if outcome == STALLED:
+                return STALLED
+        return MISSED
+
+    def save(self):
+        """把本次新增的统计合并进文件（先写临时文件再替换）"""
+        if not self.path:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        with _save_lock:
+            merged = self._load(self.path)
+            for cascade, arms in pending.items():
+                for name, delta in arms.items():
+                    arm = merged.setdefault(cascade, {}).setdefault(name, _empty())
+                    for key, value in delta.items():
+                        arm[key] += value
+            directory = os.path.dirname(os.path.abspath(self.path))
+            temp = os.path.join(directory, f".{os.path.basename(self.path)}.{os.getpid()}.tmp")
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump(merged, f, ensure_ascii=False, indent=1)
+            os.replace(temp, self.path)
+        with self._lock:
+            # 合并其他任务写入的数据，下次排序时一并参考
+            for cascade, arms in self._pending.items():
+                for name, delta in arms.items():
+                    arm = merged.setdefault(cascade, {}).setdefault(name, _empty())
+                    for key, value in delta.items():
+                        arm[key] += value
+            self._stats = merged
+
+    def summary(self, cascade):
+        """[(策略, 尝试次数, 成功率, 成功时平均耗时ms)]，按当前顺序排列"""
+        arms = self._stats.get(cascade, {})
+        rows = []
+        for name in self.order(cascade, arms):
+            arm = arms[name]
+            rows.append((name, arm['tries'], arm['wins'] / arm['tries'] if arm['tries'] else 0.0,
+                         arm['win_seconds'] * 1000 / arm['wins'] if arm['wins'] else None))
+        return rows
+
+    def format_summary(self):
+        lines = []
+        for cascade in sorted(self._stats):
+            lines.append(f"[{cascade}]")
+            lines.append(f"  {'策略':<40}{'尝试':>6}{'成功率':>8}{'平均耗时ms':>12}")
+            for name, tries, rate, ms in self.summary(cascade):
+                lines.append(f"  {name:<40}{tries:>6}{rate:>8.0%}{'-' if ms is None else f'{ms:.0f}':>12}")
+        return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    print(StrategyStats(sys.argv[1] if len(sys.argv) > 1 else 'strategy_stats.json').format_summary())
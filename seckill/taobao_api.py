@@ -7,31 +7,47 @@ import time
 import datetime
 import requests
 import urllib3
-import browsercookie
 from urllib.parse import *
-from seckill.seckill_taobao import ChromeDrive
+from seckill.cart import Cart
+from seckill.cookie_store import default_store
 
 urllib3.disable_warnings()
 
 session = requests.session()
 
+CART_URL = 'https://cart.taobao.com/cart.htm'
+CONFIRM_URL = 'https://buy.taobao.com/auction/order/confirm_order.htm?spm=a1z0d.6639537.0.0.undefined'
+# 商品详情页"立即购买"表单的提交地址，直接返回订单确认页，不经过购物车
+BUY_NOW_URL = 'https://buy.taobao.com/auction/buy_now.jhtml'
+SUBMIT_URL = 'https://buy.taobao.com/auction/confirm_order.htm'
+# 提交成功后跳转的支付宝收银台
+CASHIER_HOST = 'alipay.com'
 
-def get_cookies():
+
+def get_cookies(account='default', sess=None):
     """
-    手动操作浏览器，用browsercookie获取浏览器cookie
+    优先使用cookie存储中该账号未过期的cookie；没有时手动操作浏览器，用browsercookie获取浏览器cookie并保存
+    :param account: 账号名，对应cookie存储中的文件
+    :param sess: requests会话，默认使用模块级session
     :return:
     """
-    ck = browsercookie.chrome()
-    for i in ck:
-        if 'taobao' in i.domain:
-            session.cookies.set(i.name, i.value)
+    sess = sess or session
+    store = default_store()
+    cookies = store.load_valid(account)
+    if cookies is None:
+        import browsercookie
+
+        cookies = store.save(account, [i for i in browsercookie.chrome() if i.domain.lstrip('.').endswith('taobao.com')])
+    cookies.apply(sess)
 
-def get_buy_cart():
+def get_buy_cart(sess=None):
     """
     获取购物车信息
+    :param sess: requests会话，默认使用模块级session
     :return: 返回提交结算请求的参数
     """
-    url = 'https://cart.taobao.com/cart.htm'
+    sess = sess or session
+    url = CART_URL
     headers = {
         'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_14_6) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.88 Safari/537.36',
         'sec-fetch-dest': 'document', 'sec-fetch-mode': 'navigate', 'sec-fetch-site': 'none', 'sec-fetch-user': '?1',
@@ -39,7 +55,7 @@ def get_buy_cart():
         'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9',
         'accept-encoding': 'gzip, deflate, br', 'accept-language': 'zh-CN,zh;q=0.9,en;q=0.8',
         'cache-control': 'max-age=0'}
-    res = session.get(url, headers = headers, verify = False)
+    res = sess.get(url, headers = headers, verify = False)
     first_data = re.search('try{var firstData = (.*?);}catch', res.text).group(1)
     s_tag = res.headers['s_tag']
     user_rep = re.search('\|\^taoMainUser:(.*?):\^', s_tag)
@@ -51,27 +67,27 @@ def get_buy_cart():
     return first_data, user_id
 
 
-def parse_cart_data(first_data):
+def parse_cart_data(first_data, item_id=None, sku_id=None):
     """
     解析购物车信息
-    :param first_data:
-    :return:
+    :param first_data: firstData JSON字符串、已解析的dict或Cart
+    :param item_id: 目标商品id，默认取购物车中第一个可购买的商品
+    :param sku_id: 目标sku id
+    :return: 结算请求需要的参数
     """
-    first_data = json.loads(first_data)
-    if len(first_data['list']) == 0:
+    cart = first_data if isinstance(first_data, Cart) else Cart.from_first_data(first_data)
+    if len(cart) == 0:
         print("购物车是空的")
         return
-    cart_id = first_data['list'][0]['bundles'][0]['orders'][0]['cartId']
-    cart_params = first_data['list'][0]['bundles'][0]['orders'][0]['cartActiveInfo']['cartBcParams']
-    item_id = first_data['list'][0]['bundles'][0]['orders'][0]['itemId']
-    sku_id = first_data['list'][0]['bundles'][0]['orders'][0]['skuId']
-    seller_id = first_data['list'][0]['bundles'][0]['orders'][0]['sellerId']
-    attributes = first_data['list'][0]['bundles'][0]['orders'][0]['toBuyInfo']
+    order = cart.first_purchasable(item_id=item_id, sku_id=sku_id)
+    if order is None:
+        print("购物车中没有可购买的目标商品")
+        return
     print("成功解析购物车信息")
-    return cart_id, item_id, sku_id, seller_id, cart_params, attributes
+    return order.confirm_args()
 
 
-def confirm_order(cart_id, item_id, sku_id, seller_id, cart_params, attributes):
+def confirm_order(cart_id, item_id, sku_id, seller_id, cart_params, attributes, sess=None):
     """
     发送结算请求
     :param cart_id: 购物车id
@@ -80,9 +96,11 @@ def confirm_order(cart_id, item_id, sku_id, seller_id, cart_params, attributes):
     :param seller_id: 卖家id
     :param cart_params: 购物车参数
     :param attributes:
+    :param sess: requests会话，默认使用模块级session
     :return: 返回提交订单需要的参数
     """
-    url = 'https://buy.taobao.com/auction/order/confirm_order.htm?spm=a1z0d.6639537.0.0.undefined'
+    sess = sess or session
+    url = CONFIRM_URL
     headers = {'cache-control': 'max-age=0', 'upgrade-insecure-requests': '1',
                'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_14_6) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.88 Safari/537.36',
                'origin': 'https://cart.taobao.com', 'content-type': 'application/x-www-form-urlencoded',
@@ -90,14 +108,67 @@ def confirm_order(cart_id, item_id, sku_id, seller_id, cart_params, attributes):
                'sec-fetch-site': 'same-site', 'sec-fetch-mode': 'navigate', 'sec-fetch-user': '?1',
                'sec-fetch-dest': 'document', 'referer': 'https://cart.taobao.com/',
                'accept-encoding': 'gzip, deflate, br', 'accept-language': 'zh-CN,zh;q=0.9,en;q=0.8', }
-    data = {"item": f"{cart_id}_{item_id}_1_{sku_id}_{seller_id}_0_0_0_{cart_params}_{quote(str(attributes))}__0",
-        "buyer_from": "cart", "source_time": "".join(str(int(time.time() * 1000)))}
-    res = session.post(url = url, data = data, headers = headers, verify = False)
-    order_data = re.search('orderData= (.*?);\n</script>', res.text).group(1)
+    data = confirm_form(cart_id, item_id, sku_id, seller_id, cart_params, attributes)
+    res = sess.post(url = url, data = data, headers = headers, verify = False)
+    order_data = extract_order_data(res.text)
     print("成功发送结算请求")
     return order_data
 
 
+def confirm_form(cart_id, item_id, sku_id, seller_id, cart_params, attributes):
+    """购物车结算表单字段，HTTP路径和浏览器换浏览器恢复时共用"""
+    return {"item": f"{cart_id}_{item_id}_1_{sku_id}_{seller_id}_0_0_0_{cart_params}_{quote(str(attributes))}__0",
+            "buyer_from": "cart", "source_time": "".join(str(int(time.time() * 1000)))}
+
+
+def extract_order_data(text):
+    """从订单确认页中取出orderData JSON字符串"""
+    return re.search('orderData= (.*?);\n</script>', text).group(1)
+
+
+def parse_target(target):
+    """'商品ID'或'商品ID:SKU ID' -> (商品ID, SKU ID或None)"""
+    item_id, _, sku_id = str(target).partition(':')
+    return item_id, sku_id or None
+
+
+def buy_now_form(item_id, sku_id=None, quantity=1):
+    """详情页"立即购买"表单字段，HTTP路径和浏览器路径共用"""
+    return {'item_id': str(item_id), 'item_id_num': str(item_id), 'skuId': str(sku_id or ''),
+            'quantity': str(quantity), 'buy_now': 'true', 'buyer_from': 'item', 'auction_type': 'b',
+            'from': 'item_detail', 'source_time': str(int(time.time() * 1000))}
+
+
+def get_user_id(sess=None):
+    """从登录cookie(unb)取用户id，立即购买路径不取购物车时使用"""
+    sess = sess or session
+    return sess.cookies.get('unb')
+
+
+def buy_now(item_id, sku_id=None, quantity=1, sess=None):
+    """
+    立即购买：从商品/SKU直接进入订单确认，不经过购物车
+    :param item_id: 商品id
+    :param sku_id: sku id，无规格商品可不填
+    :param quantity: 购买数量
+    :param sess: requests会话，默认使用模块级session
+    :return: 返回提交订单需要的参数
+    """
+    sess = sess or session
+    headers = {'cache-control': 'max-age=0', 'upgrade-insecure-requests': '1',
+               'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_14_6) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.88 Safari/537.36',
+               'origin': 'https://item.taobao.com', 'content-type': 'application/x-www-form-urlencoded',
+               'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9',
+               'sec-fetch-site': 'same-site', 'sec-fetch-mode': 'navigate', 'sec-fetch-user': '?1',
+               'sec-fetch-dest': 'document', 'referer': f'https://item.taobao.com/item.htm?id={item_id}',
+               'accept-encoding': 'gzip, deflate, br', 'accept-language': 'zh-CN,zh;q=0.9,en;q=0.8', }
+    res = sess.post(url = BUY_NOW_URL, data = buy_now_form(item_id, sku_id, quantity), headers = headers,
+                    verify = False)
+    order_data = extract_order_data(res.text)
+    print("成功发送立即购买请求")
+    return order_data
+
+
 def parse_order_data(order_data):
     """
     解析订单信息
@@ -120,18 +191,21 @@ def parse_order_data(order_data):
     return endpoint, data, structure, hierarchy, linkage, submitref, sparam1, input_charset, event_submit_do_confirm
 
 
-def submit_order(order_data, item_id, user_id):
+def submit_order(order_data, item_id, user_id, sess=None, dry_run=False):
     """
     发送提交订单请求
     :param order_data:订单参数
     :param item_id: 商品id
     :param user_id: 用户id
-    :return:
+    :param sess: requests会话，默认使用模块级session
+    :param dry_run: 演练模式，构造完整请求并检查必需参数，但不发送
+    :return: 提交结果（parse_submit_result），演练模式下返回检查结果
     """
-    token = session.cookies['_tb_token_']
+    sess = sess or session
+    token = sess.cookies['_tb_token_']
     endpoint, data, structure, hierarchy, linkage, submitref, sparam1, input_charset, event_submit_do_confirm = parse_order_data(
         order_data)
-    url = f'https://buy.taobao.com/auction/confirm_order.htm?x-itemid={item_id}&x-uid={user_id}&submitref={submitref}&sparam1={sparam1}'
+    url = f'{SUBMIT_URL}?x-itemid={item_id}&x-uid={user_id}&submitref={submitref}&sparam1={sparam1}'
     new_data = parse_submit_data(data)
     form_data = {'action': '/order/multiTerminalSubmitOrderAction', '_tb_token_': token, 'event_submit_do_confirm': '1',
         'praper_alipay_cashier_domain': 'cashierrz54', 'input_charset': 'utf-8',
@@ -145,9 +219,41 @@ def submit_order(order_data, item_id, user_id):
                'sec-fetch-dest': 'document',
                'referer': 'https://buy.taobao.com/auction/order/confirm_order.htm?spm=a1z0d.6639537.0.0.undefined',
                'accept-encoding': 'gzip, deflate, br', 'accept-language': 'zh-CN,zh;q=0.9,en;q=0.8'}
-    res = session.post(url = url, data = form_data, headers = headers, verify = False)
-    if res.status_code == 200:
-        print('成功提交订单')
+    if dry_run:
+        missing = [name for name, value in (('_tb_token_', token), ('submitref', submitref), ('sparam1', sparam1),
+                                            ('user_id', user_id), ('data', new_data)) if not value]
+        print('演练：提交订单请求已构造，未发送' if not missing else f"演练：缺少参数 {missing}")
+        return {'ok': not missing, 'missing': missing, 'url': url, 'fields': len(new_data)}
+    res = sess.post(url = url, data = form_data, headers = headers, verify = False)
+    result = parse_submit_result(res)
+    print('成功提交订单，已跳转收银台' if result['ok'] else f"提交订单失败: {result['reason']}")
+    return result
+
+
+def is_cashier_url(url):
+    """是否为收银台地址：支付宝收银台域名，或路径中带cashier"""
+    parsed = urlparse(url)
+    host = parsed.hostname or ''
+    return host == CASHIER_HOST or host.endswith('.' + CASHIER_HOST) or 'cashier' in parsed.path.lower()
+
+
+def parse_submit_result(res):
+    """
+    解析提交订单的响应：只有跳转到收银台才算下单成功，
+    被拒绝时淘宝同样返回200（错误页或回到订单确认页）
+    :param res: requests响应（已跟随重定向）
+    :return: {'ok', 'status', 'url'(最终地址), 'redirects'(重定向地址), 'cashier_url', 'reason'}
+    """
+    redirects = [r.headers.get('Location', '') for r in res.history]
+    cashier_url = next((u for u in [res.url] + redirects if u and is_cashier_url(urljoin(res.url, u))), None)
+    if cashier_url:
+        reason = None
+    elif res.status_code != 200:
+        reason = f"HTTP {res.status_code}"
+    else:
+        reason = f"未跳转收银台: {res.url}"
+    return {'ok': cashier_url is not None, 'status': res.status_code, 'url': res.url, 'redirects': redirects,
+            'cashier_url': cashier_url, 'reason': reason}
 
 
 def parse_submit_data(data):
@@ -158,19 +264,17 @@ def parse_submit_data(data):
     return new_data
 
 
-def run_with_selenium_cookie():
+def run_with_selenium_cookie(account='default'):
     """
     通过selenium模拟浏览器登陆，获取cookie并发送请求
     :return:
     """
+    from seckill.seckill_taobao import ChromeDrive
+
     seckill_time = '2021-01-23 15:05:00'
     seckill_time_obj = datetime.datetime.strptime(seckill_time, '%Y-%m-%d %H:%M:%S')
-    ChromeDrive(seckill_time = seckill_time).keep_wait()
-    with open('./cookies.txt', 'r', encoding = 'utf-8') as f:
-        data = f.read()
-    cookies = json.loads(data)
-    for cookie in cookies:
-        session.cookies.set(cookie['name'], cookie['value'])
+    ChromeDrive(seckill_time = seckill_time, account = account).keep_wait()
+    default_store().load(account).apply(session)
     first_data, user_id = get_buy_cart()
     while True:
         current_time = datetime.datetime.now()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+抢购阶段计时
+每个阶段记录单调时钟纳秒时间戳，每次运行追加到JSONL文件，
+可跨运行汇总成直方图，也可导出Chrome trace-event JSON（chrome://tracing / Perfetto）
+
+用法: python seckill/timing.py [--runs timing_runs.jsonl] [--last 20] [--histogram] [--chrome-trace trace.json]
+"""
+
+import os
+import json
+import time
+import argparse
+from contextlib import contextmanager
+from datetime import datetime
+
+# 阶段名
+WAIT = 'wait'
+CART_LOAD = 'cart_load'
+SELECT = 'select'
+SETTLE_CLICK = 'settle_click'
+NAVIGATION = 'navigation'
+ORDER_LOAD = 'order_load'
+SUBMIT_CLICK = 'submit_click'
+CASHIER = 'cashier'
+PAY = 'pay'
+PHASES = (WAIT, CART_LOAD, SELECT, SETTLE_CLICK, NAVIGATION, ORDER_LOAD, SUBMIT_CLICK, CASHIER, PAY)
+
+# 直方图桶上界（毫秒），最后一个桶收纳所有更大的值
+HISTOGRAM_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, float('inf'))
+
+
+class Span:
+    """一个阶段区间（纳秒单调时钟）"""
+
+    __slots__ = ('name', 'start_ns', 'end_ns', 'attrs')
+
+    def __init__(self, name, start_ns, end_ns=None, attrs=None):
+        self.name = name
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.attrs = attrs or {}
+
+    @property
+    def duration_ms(self):
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_list(self):
+        return [self.name, self.start_ns, self.end_ns, self.attrs]
+
+
+class PhaseTimer:
+    """单次运行的阶段计时器
+
+    span()用于有明确边界的阶段；start()/stop()用于跨越多轮循环的阶段（如点击结算后的页面跳转）
+    listener: 可选，每个阶段结束时以Span调用（在计时线程中执行，应尽快返回）
+    """
+
+    def __init__(self, clock=time.monotonic_ns, listener=None):
+        self.clock = clock
+        self.listener = listener
+        self.run_id = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        self.spans = []
+        self._open = {}
+
+    @contextmanager
+    def span(self, name, **attrs):
+        span = Span(name, self.clock(), attrs=attrs)
+        try:
+            yield span
+        finally:
+            span.end_ns = self.clock()
+            self._close(span)
+
+    def start(self, name, **attrs):
+        """开始一个阶段，已在进行中则保持原起点"""
+        if name not in self._open:
+            self._open[name] = Span(name, self.clock(), attrs=attrs)
+
+    def stop(self, name, **attrs):
+        """结束一个进行中的阶段，未开始则忽略"""
+        span = self._open.pop(name, None)
+        if span is not None:
+            span.end_ns = self.clock()
+            span.attrs.update(attrs)
+            self._close(span)
+        return span
+
+    def _close(self, span):
+        self.spans.append(span)
+        if self.listener is not None:
+            self.listener(span)
+
+    def finish(self):
+        """结束所有未关闭的阶段（标记为unfinished）"""
+        for name in list(self._open):
+            self.stop(name, unfinished=True)
+        self.spans.sort(key=lambda s: s.start_ns)
+        return self.spans
+
+    def durations(self):
+        """{阶段: 累计毫秒}，同一阶段多次出现时累加"""
+        totals = {}
+        for span in self.spans:
+            if span.end_ns is not None:
+                totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        return totals
+
+    def save(self, path, script_spans=(), **meta):
+        """把本次运行追加到JSONL文件，script_spans为ScriptRunner.spans"""
+        record = {
+            'run': self.run_id,
+            'spans': [s.to_list() for s in self.finish()],
+            'scripts': [[s.name, s.start_ns, s.rtt_ms, s.script_ms] for s in script_spans],
+        }
+        record.update(meta)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        return record
+
+
+def load_runs(path, last=None):
+    """读取运行记录，last只保留最近N次"""
+    runs = []
+    if not os.path.exists(path):
+        return runs
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    runs.append(json.loads(line))
+                except ValueError:
+                    continue
+    return runs[-last:] if last else runs
+
+
+def phase_durations(runs):
+    """{阶段: [每次运行的累计毫秒]}，按PHASES顺序排列"""
+    samples = {}
+    for run in runs:
+        totals = {}
+        for name, start_ns, end_ns, _ in run.get('spans', []):
+            if end_ns is not None:
+                totals[name] = totals.get(name, 0.0) + (end_ns - start_ns) / 1e6
+        for name, ms in totals.items():
+            samples.setdefault(name, []).append(ms)
+    order = {name: i for i, name in enumerate(PHASES)}
+    return dict(sorted(samples.items(), key=lambda kv: order.get(kv[0], len(order))))
+
+
+def histogram(values, bounds=HISTOGRAM_BOUNDS):
+    """[(桶上界ms, 数量)]"""
+    counts = [0] * len(bounds)
+    for value in values:
+        for i, bound in enumerate(bounds):
+            if value <= bound:
+                counts[i] += 1
+                break
+    return list(zip(bounds, counts))
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(runs):
+    """每个阶段一行：次数、均值、p50/p90/p99、最大值（毫秒）"""
+    rows = []
+    for name, values in phase_durations(runs).items():
+        ordered = sorted(values)
+        rows.append({
+            'phase': name,
+            'count': len(ordered),
+            'mean_ms': round(sum(ordered) / len(ordered), 3),
+            'p50_ms': round(_percentile(ordered, 50), 3),
+            'p90_ms': round(_percentile(ordered, 90), 3),
+            'p99_ms': round(_percentile(ordered, 99), 3),
+            'max_ms': round(ordered[-1], 3),
+        })
+    return rows
+
+
+def format_summary(runs):
+    lines = [f"{'阶段':<14}{'次数':>6}{'均值ms':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'最大':>10}"]
+    for r in summarize(runs):
+        lines.append(f"{r['phase']:<14}{r['count']:>6}{r['mean_ms']:>10}{r['p50_ms']:>10}"
+                     f"{r['p90_ms']:>10}{r['p99_ms']:>10}{r['max_ms']:>10}")
+    return '\n'.join(lines)
+
+
+def format_histograms(runs, width=40):
+    lines = []
+    for name, values in phase_durations(runs).items():
+        buckets = histogram(values)
+        peak = max(count for _, count in buckets) or 1
+        lines.append(f"{name} ({len(values)}次)")
+        for bound, count in buckets:
+            if count:
+                label = '>10000' if bound == float('inf') else f"<={bound:g}"
+                lines.append(f"  {label:>8} ms | {'█' * max(1, count * width // peak)} {count}")
+    return '\n'.join(lines)
+
+
+def to_chrome_trace(runs):
+    """转换为Chrome trace-event格式：每次运行一个进程，阶段和页面脚本分两条线程"""
+    events = []
+    for pid, run in enumerate(runs, 1):
+        spans = run.get('spans', [])
+        scripts = run.get('scripts', [])
+        starts = [s[1] for s in spans] + [s[1] for s in scripts]
+        if not starts:
+            continue
+        origin = min(starts)
+        events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': f"run {run.get('run')}"}})
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': 1, 'args': {'name': 'phases'}})
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': 2, 'args': {'name': 'scripts'}})
+        for name, start_ns, end_ns, attrs in spans:
+            if end_ns is None:
+                continue
+            events.append({
+                'name': name, 'cat': 'phase', 'ph': 'X', 'pid': pid, 'tid': 1,
+                'ts': (start_ns - origin) / 1000, 'dur': (end_ns - start_ns) / 1000, 'args': attrs,
+            })
+        for name, start_ns, rtt_ms, script_ms in scripts:
+            events.append({
+                'name': name, 'cat': 'script', 'ph': 'X', 'pid': pid, 'tid': 2,
+                'ts': (start_ns - origin) / 1000, 'dur': rtt_ms * 1000, 'args': {'script_ms': script_ms},
+            })
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def export_chrome_trace(runs, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(to_chrome_trace(runs), f, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='抢购阶段耗时汇总')
+    parser.add_argument('--runs', default='timing_runs.jsonl', help='运行记录文件')
+    parser.add_argument('--last', type=int, default=None, help='只统计最近N次运行')
+    parser.add_argument('--histogram', action='store_true', help='输出各阶段耗时直方图')
+    parser.add_argument('--chrome-trace', default=None, help='导出Chrome trace-event JSON到指定文件')
+    args = parser.parse_args()
+
+    runs = load_runs(args.runs, args.last)
+    if not runs:
+        print(f"❌ 没有运行记录: {args.runs}")
+        return 1
+
+    print(f"📊 共{len(runs)}次运行")
+    print(format_summary(runs))
+    if args.histogram:
+        print()
+        print(format_histograms(runs))
+    if args.chrome_trace:
+        export_chrome_trace(runs, args.chrome_trace)
+        print(f"\n✅ 已导出Chrome trace: {args.chrome_trace}（在chrome://tracing或ui.perfetto.dev中打开）")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
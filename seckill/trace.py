@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+调试轨迹记录模块
+热路径只往内存环形缓冲区追加一个元组，由后台线程批量写入文件，退出或崩溃时自动落盘
+
+退出和崩溃钩子（含工作线程中未捕获的异常）在模块级只安装一次，对所有未关闭的记录器生效；
+记录器用完后调用close()停止后台线程并移出钩子。
+文件超过max_bytes时改名为<path>.1（覆盖上一份）后写新文件，多次运行不会无限追加
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import itertools
+import weakref
+import threading
+from collections import deque
+from datetime import datetime
+
+# 未关闭的记录器，退出或崩溃时逐个落盘
+_open_recorders = weakref.WeakSet()
+# 同一文件可能被多个记录器（并行任务）写入，轮转时互斥
+_rotate_lock = threading.Lock()
+
+
+class TraceRecorder:
+    """环形缓冲的结构化事件记录器
+
+    每个事件带单调时钟时间戳(ns)和递增序号，文件开头写入一条锚点事件用于换算墙钟时间。
+    context_provider可选，由后台线程在每批写入时调用一次（例如读取当前URL和标题），
+    不会在记录事件时产生额外的WebDriver调用。
+    """
+
+    def __init__(self, path='debug_seckill.json', capacity=4096, flush_interval=1.0,
+                 context_provider=None, max_bytes=10 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.context_provider = context_provider
+        self._buffer = deque(maxlen=capacity)
+        self._seq = itertools.count(1)
+        self._written = 0
+        self._last_seq = 0
+        self._io_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._closed = False
+
+        # 锚点事件单独保存，不会被环形缓冲区挤掉；轮转后在新文件开头重新写入
+        self._anchor_event = (time.monotonic_ns(), 0, 'trace_start', None, {'wall': datetime.now().isoformat()})
+        self._anchor = self._anchor_event
+
+        self._thread = threading.Thread(target=self._run, name='trace-flusher', daemon=True)
+        self._thread.start()
+        _open_recorders.add(self)
+
+    def record(self, step, error=None, **fields):
+        """记录一个事件；格式化和序列化都推迟到后台线程"""
+        self._buffer.append((time.monotonic_ns(), next(self._seq), step, error, fields))
+
+    def flush(self):
+        """把缓冲区中的事件写入文件"""
+        with self._io_lock:
+            if self._rotate_if_full():
+                self._anchor = self._anchor_event
+            batch = []
+            while True:
+                try:
+                    batch.append(self._buffer.popleft())
+                except IndexError:
+                    break
+            if self._anchor is not None:
+                batch.insert(0, self._anchor)
+                self._anchor = None
+            if not batch:
+                return 0
+
+            context = None
+            if self.context_provider is not None:
+                try:
+                    context = self.context_provider()
+                except Exception:
+                    context = None
+
+            lines = []
+            for ts, seq, step, error, fields in batch:
+                event = {'ts_ns': ts, 'seq': seq, 'step': step}
+                if seq and seq != self._last_seq + 1:
+                    # 环形缓冲区溢出时记录丢弃的事件数
+                    event['dropped_before'] = seq - self._last_seq - 1
+                if seq:
+                    self._last_seq = seq
+                if error is not None:
+                    event['error'] = f"{type(error).__name__}: {error}" if isinstance(error, BaseException) else str(error)
+                if fields:
+                    event.update(fields)
+                if context:
+                    event['page_at_flush'] = context
+                lines.append(json.dumps(event, ensure_ascii=False, default=str))
+
+            try:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write('\n'.join(lines) + '\n')
+            except OSError:
+                return 0
+            self._written += len(lines)
+            return len(lines)
+
+    def _rotate_if_full(self):
+        """文件超过max_bytes时改名为.1，返回是否轮转"""
+        if not self.max_bytes:
+            return False
+        with _rotate_lock:
+            try:
+                if os.path.getsize(self.path) < self.max_bytes:
+                    return False
+                os.replace(self.path, self.path + '.1')
+            except OSError:
+                return False
+        return True
+
+    def close(self):
+        """停止后台线程并写出剩余事件"""
+        if self._closed:
+            return
+        self._closed = True
+        _open_recorders.discard(self)
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self.record('trace_end', written=self._written)
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+
+def _close_all():
+    for recorder in list(_open_recorders):
+        recorder.close()
+
+
+def _dump_crash(error, **fields):
+    for recorder in list(_open_recorders):
+        recorder.record('crash', error=error, **fields)
+        recorder.flush()
+
+
+def _install_excepthook():
+    previous = sys.excepthook
+    previous_thread_hook = threading.excepthook
+
+    def hook(exc_type, exc, tb):
+        _dump_crash(exc)
+        previous(exc_type, exc, tb)
+
+    def thread_hook(args):
+        # 工作线程（保活、调度任务等）中未捕获的异常不会经过sys.excepthook
+        if args.exc_type is not SystemExit:
+            _dump_crash(args.exc_value, thread=args.thread.name if args.thread is not None else None)
+        previous_thread_hook(args)
+
+    sys.excepthook = hook
+    threading.excepthook = thread_hook
+
+
+atexit.register(_close_all)
+_install_excepthook()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+后台抢购线程
+GUI只负责显示：抢购在工作线程中执行，进度事件放入线程安全队列，由界面定时取出
+"""
+
+import queue
+import threading
+from datetime import datetime, timedelta
+
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+# 事件类型，队列元素为 (类型, 数据)
+STATUS = 'status'    # 数据: 文本
+CLOCK = 'clock'      # 数据: (偏差ms, 往返ms)
+PHASE = 'phase'      # 数据: (阶段名, 耗时ms)
+DONE = 'done'        # 数据: (是否成功或None表示已取消, 错误信息)
+
+
+class SeckillWorker:
+    """在后台线程运行ChromeDrive + OptimizedSecKill，并通过events队列报告进度
+
+    开抢时间按服务器时间理解：测得时钟偏差后换算为本地时钟的开抢时刻（fire_at），
+    与界面按服务器时间显示的倒计时在同一时刻归零
+    """
+
+    def __init__(self, seckill_time, password=None, events=None):
+        self.seckill_time = seckill_time
+        self.seckill_time_obj = datetime.strptime(seckill_time, '%Y-%m-%d %H:%M:%S')
+        self.fire_at = self.seckill_time_obj  # 本地时钟的开抢时刻
+        self.password = password or None
+        self.events = events or queue.Queue()
+        self.cancel_event = threading.Event()
+        self.chrome = None
+        self._thread = threading.Thread(target=self._run, name='seckill-worker', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def cancel(self):
+        """请求取消并关闭浏览器；正在执行的WebDriver命令会因此立即失败"""
+        if self.cancel_event.is_set():
+            return
+        self.cancel_event.set()
+        self._emit(STATUS, "正在取消...")
+        chrome = self.chrome
+        if chrome is not None:
+            # 关闭浏览器可能耗时数秒，放到独立线程避免卡住界面
+            threading.Thread(target=chrome.quit, name='seckill-teardown', daemon=True).start()
+
+    def _emit(self, kind, data):
+        self.events.put((kind, data))
+
+    def _on_phase(self, span):
+        self._emit(PHASE, (span.name, span.duration_ms))
+
+    def _run(self):
+        from .clock import measure_offset
+        from .seckill_taobao import ChromeDrive
+
+        try:
+            try:
+                offset, rtt = measure_offset()
+                # 偏差为正表示本地时钟慢于服务器，本地应提前offset秒开抢
+                self.fire_at = self.seckill_time_obj - timedelta(seconds=offset)
+                self._emit(CLOCK, (offset * 1000, rtt * 1000))
+            except Exception as e:
+                logger.warning("⚠️  服务器时间获取失败: %s", e)
+
+            self._emit(STATUS, "启动浏览器，请登录...")
+            self.chrome = ChromeDrive(seckill_time=self.seckill_time, password=self.password,
+                                      cancel_event=self.cancel_event, listener=self._on_phase)
+            self.chrome.seckill_time_obj = self.fire_at
+            if self.cancel_event.is_set():
+                raise InterruptedError
+            self._emit(STATUS, "等待开抢...")
+            success = self.chrome.sec_kill()
+            if self.cancel_event.is_set():
+                raise InterruptedError
+            self._emit(DONE, (bool(success), None))
+        except Exception as e:
+            if self.cancel_event.is_set():
+                self._emit(DONE, (None, None))
+            else:
+                logger.error("❌ 抢购线程异常: %s", e)
+                self._emit(DONE, (False, str(e)))
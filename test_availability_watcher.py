@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+可用性轮询测试
+本地替身服务器的商品开放时间在标称时间T附近随机漂移，检查AvailabilityWatcher：
+  - 开放后很快触发（延迟不超过当时的轮询间隔加少量余量），不会在开放前触发
+  - 探测次数不超过预算；替身限流时退避后仍能触发
+无需浏览器和网络。
+
+用法: python test_availability_watcher.py [--trials 5] [--drift 1.0]
+也可以用 pytest test_availability_watcher.py 运行
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from seckill.availability import AvailabilityWatcher, http_probe
+from benchmarks.standin_server import StandInServer
+
+# 触发延迟余量（秒）：一次本地请求往返加线程调度
+SLACK = 0.1
+
+
+def _purchasable(response):
+    return response.json().get('purchasable')
+
+
+def run_trial(drift, lead=1.5, start_in=2.0, seed=None, status_rate_limit=0, max_rate=20.0, max_probes=300,
+              open_offset=None):
+    """返回(开放时间相对T, 触发时间相对开放时间, 开放时刻的轮询间隔, 统计)"""
+    rng = random.Random(seed)
+    deadline = time.time() + start_in
+    if open_offset is None:
+        open_offset = rng.uniform(-drift, drift)
+    with StandInServer(open_at=deadline + open_offset, status_rate_limit=status_rate_limit) as server:
+        watcher = AvailabilityWatcher(
+            http_probe(server.base_url + '/item_status', _purchasable),
+            datetime.fromtimestamp(deadline), lead=lead, give_up=drift + 1,
+            max_rate=max_rate, max_probes=max_probes,
+        )
+        result = watcher.wait()
+        fired_at = time.time()
+    interval = watcher.interval(deadline + open_offset)
+    return open_offset, (fired_at - (deadline + open_offset)) if result else None, interval, watcher.stats()
+
+
+def check_trial(open_offset, latency, interval, stats, max_probes=300):
+    errors = []
+    if latency is None:
+        errors.append(f"开放时间T{open_offset:+.3f}s但未触发")
+    else:
+        if latency < 0:
+            errors.append(f"在开放前{-latency * 1000:.0f}ms触发")
+        # 退避会放大间隔，此处只检查未限流的情况
+        if not stats['throttled'] and latency > interval + SLACK:
+            errors.append(f"触发延迟{latency * 1000:.0f}ms超过轮询间隔{interval * 1000:.0f}ms+余量")
+    if stats['probes'] > max_probes:
+        errors.append(f"探测{stats['probes']}次超过预算{max_probes}")
+    return errors
+
+
+def test_fires_soon_after_randomized_open():
+    for seed in range(3):
+        open_offset, latency, interval, stats = run_trial(drift=1.0, seed=seed)
+        errors = check_trial(open_offset, latency, interval, stats)
+        assert not errors, errors
+
+
+def test_backs_off_when_throttled():
+    # 标称时间后0.5秒才开放，期间50ms一次的探测超过替身每秒4次的限流
+    open_offset, latency, interval, stats = run_trial(drift=0.5, status_rate_limit=4, open_offset=0.5)
+    assert stats['throttled'] > 0
+    assert latency is not None and latency >= 0
+
+
+def test_respects_probe_budget():
+    # 商品一直不开放，探测次数达到预算后停止
+    deadline = time.time() + 0.5
+    with StandInServer(open_at=deadline + 3600) as server:
+        watcher = AvailabilityWatcher(
+            http_probe(server.base_url + '/item_status', _purchasable),
+            datetime.fromtimestamp(deadline), lead=0.5, give_up=5, max_probes=5,
+        )
+        assert watcher.wait() is None
+    assert watcher.stats()['probes'] == 5
+
+
+def main():
+    parser = argparse.ArgumentParser(description='可用性轮询测试（替身服务器随机开放时间）')
+    parser.add_argument('--trials', type=int, default=5, help='随机开放时间的试验次数')
+    parser.add_argument('--drift', type=float, default=1.0, help='开放时间在T前后随机漂移的秒数')
+    parser.add_argument('--lead', type=float, default=1.5, help='提前多少秒开始轮询')
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'试验':>4}{'开放(相对T)ms':>16}{'触发延迟ms':>12}{'轮询间隔ms':>12}{'探测次数':>10}  结果")
+    for trial in range(args.trials):
+        open_offset, latency, interval, stats = run_trial(args.drift, lead=max(args.lead, args.drift + 0.5),
+                                                          start_in=max(args.lead, args.drift) + 0.5, seed=trial)
+        errors = check_trial(open_offset, latency, interval, stats)
+        failed = failed or bool(errors)
+        latency_text = f"{latency * 1000:.0f}" if latency is not None else '-'
+        print(f"{trial + 1:>4}{open_offset * 1000:>16.0f}{latency_text:>12}{interval * 1000:>12.0f}"
+              f"{stats['probes']:>10}  {'❌ ' + '; '.join(errors) if errors else '✅'}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
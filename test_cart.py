@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+购物车模型测试
+用一个小的firstData检查Cart：
+  - 一次遍历解析出所有完整的行，sellerId从bundle或店铺继承，结构不完整的行计入skipped
+  - 按商品ID、SKU ID、卖家查找，四个索引与订单列表一致
+  - 失效、数量为0、缺少结算参数的行不可购买，first_purchasable跳过它们
+  - availability.cart_probe和taobao_api.parse_cart_data按目标商品/SKU取行
+无需浏览器和网络。
+
+用法: python test_cart.py [--repeat 10000]
+也可以用 pytest test_cart.py 运行
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from seckill import taobao_api
+from seckill.cart import Cart
+
+
+def row(cart_id, item_id, sku_id, **fields):
+    order = {'cartId': cart_id, 'itemId': item_id, 'skuId': sku_id, 'title': f'商品{item_id}-{sku_id}',
+             'amount': {'now': 1}, 'cartActiveInfo': {'cartBcParams': f'params-{cart_id}'},
+             'toBuyInfo': {'cart_created_time': cart_id}, 'isValid': True}
+    order.update(fields)
+    return order
+
+
+FIRST_DATA = {'list': [
+    {'sellerId': 'shopA', 'bundles': [{'sellerId': 'sellerA', 'orders': [
+        row('c1', 600001, 500001, isValid=False),       # 同一商品的失效SKU排在前面
+        row('c2', 600001, 500002),
+        row('c3', 600002, 500003, amount={'now': 0}),   # 数量为0
+        row('c4', 600003, 500004, cartActiveInfo={}),   # 缺少结算参数
+        {'cartId': 'c5', 'itemId': 600005},             # 缺少skuId，跳过
+    ]}]},
+    {'sellerId': 'sellerB', 'bundles': [{'orders': [    # bundle没有sellerId，继承店铺的
+        row('c6', 600004, 500005),
+        row('c7', 600001, 500006, amount=2),
+    ]}]},
+]}
+
+
+def test_parse_and_indexes():
+    cart = Cart.from_first_data(json.dumps(FIRST_DATA))
+    assert len(cart) == 6 and cart.skipped == 1
+    assert [o.cart_id for o in cart] == ['c1', 'c2', 'c3', 'c4', 'c6', 'c7']
+    assert cart.by_cart['c6'].seller_id == 'sellerB' and cart.by_cart['c2'].seller_id == 'sellerA'
+    # ID统一为字符串，数字和字符串查找结果相同
+    assert [o.cart_id for o in cart.find(item_id=600001)] == ['c1', 'c2', 'c7']
+    assert cart.find(item_id='600001') == cart.find(item_id=600001)
+    assert [o.cart_id for o in cart.find(sku_id='500006')] == ['c7']
+    assert cart.find(item_id='600002', sku_id='500006') == []
+    assert [o.cart_id for o in cart.find(seller_id='sellerB')] == ['c6', 'c7']
+    assert cart.find(item_id='999999') == []
+    assert sum(len(v) for v in cart.by_item.values()) == len(cart) == len(cart.by_cart)
+    assert cart.by_cart['c7'].quantity == 2
+
+
+def test_non_purchasable_rows():
+    cart = Cart.from_first_data(FIRST_DATA)
+    assert [o.cart_id for o in cart.purchasable()] == ['c2', 'c6', 'c7']
+    assert cart.first_purchasable().cart_id == 'c2'
+    assert cart.first_purchasable(item_id='600001').cart_id == 'c2'
+    assert cart.first_purchasable(item_id='600001', sku_id='500006').cart_id == 'c7'
+    assert cart.first_purchasable(item_id='600001', sku_id='500001') is None
+    assert cart.first_purchasable(item_id='600002') is None
+    assert cart.first_purchasable(item_id='600003') is None
+    assert cart.by_cart['c2'].confirm_args() == ('c2', '600001', '500002', 'sellerA', 'params-c2', {'cart_created_time': 'c2'})
+
+
+def test_probe_and_parse_use_item_and_sku():
+    from seckill.availability import cart_probe
+
+    original = taobao_api.get_buy_cart
+    taobao_api.get_buy_cart = lambda session: (FIRST_DATA, 'user1')
+    try:
+        assert cart_probe(None, '600001', '500006')()[1] == 'user1'
+        assert cart_probe(None, '600001', '500001')() is None
+        assert cart_probe(None, '600002')() is None
+    finally:
+        taobao_api.get_buy_cart = original
+
+    parsed = taobao_api.parse_cart_data(Cart.from_first_data(FIRST_DATA), item_id='600001', sku_id='500006')
+    assert parsed[:4] == ('c7', '600001', '500006', 'sellerB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='购物车模型解析与查找耗时')
+    parser.add_argument('--repeat', type=int, default=10000, help='重复次数')
+    args = parser.parse_args()
+
+    text = json.dumps(FIRST_DATA)
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        cart = Cart.from_first_data(text)
+    parse_us = (time.perf_counter() - started) / args.repeat * 1e6
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        cart.first_purchasable(item_id='600001', sku_id='500006')
+    lookup_us = (time.perf_counter() - started) / args.repeat * 1e6
+    print(f"{len(cart)}行购物车: 解析{parse_us:.1f}µs，按商品+SKU取可购买行{lookup_us:.2f}µs")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+无头命令行配置测试
+检查cli.load_config和main：
+  - 未填写的字段取默认值，timeouts/pacing只覆盖填写的子项，没有账号时使用default账号
+  - 缺少或格式错误的抢购时间、账号缺少name或重名、文件不存在或不是JSON都报ConfigError
+  - 配置错误时main返回EXIT_CONFIG，并输出ok=false的结果JSON
+无需浏览器和网络。
+
+用法: python test_cli.py [--repeat 1000]
+也可以用 pytest test_cli.py 运行
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import cli
+from cli import load_config, ConfigError, DEFAULTS, EXIT_CONFIG
+
+CONFIG = {
+    'time': '2024-12-12 20:00:00',
+    'concurrency': 4,
+    'timeouts': {'login': 30},
+    'pacing': {'policy': 'fixed'},
+    'accounts': [{'name': 'main', 'items': ['600001']}, {'name': 'alt', 'path': 'http'}],
+}
+
+
+def write_config(directory, config, name='config.json'):
+    path = os.path.join(directory, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(config if isinstance(config, str) else json.dumps(config, ensure_ascii=False))
+    return path
+
+
+def config_error(directory, config):
+    """返回load_config抛出的ConfigError信息，没有报错时返回None"""
+    try:
+        load_config(write_config(directory, config))
+    except ConfigError as e:
+        return str(e)
+    return None
+
+
+def test_defaults_are_merged():
+    with tempfile.TemporaryDirectory() as directory:
+        config = load_config(write_config(directory, CONFIG))
+        assert config['concurrency'] == 4 and config['path'] == 'browser' and config['dry_run'] is False
+        assert config['timeouts'] == {'login': 30, 'cart_load': 5, 'order_load': 3}
+        assert config['pacing'] == {'retry_interval': 0.05, 'max_retry': 30, 'policy': 'fixed'}
+        assert [a['name'] for a in config['accounts']] == ['main', 'alt']
+        # 默认值不会被某次配置修改
+        assert DEFAULTS['timeouts']['login'] == 60 and DEFAULTS['pacing']['policy'] == 'adaptive'
+
+        config = load_config(write_config(directory, {'time': CONFIG['time']}))
+        assert config['accounts'] == [{'name': 'default'}]
+        assert config['timeouts'] == DEFAULTS['timeouts'] and config['timeouts'] is not DEFAULTS['timeouts']
+
+
+def test_config_errors():
+    with tempfile.TemporaryDirectory() as directory:
+        assert 'time' in config_error(directory, {'accounts': CONFIG['accounts']})
+        assert '格式' in config_error(directory, dict(CONFIG, time='2024/12/12 20:00'))
+        assert 'name' in config_error(directory, dict(CONFIG, accounts=[{'name': 'a'}, {'name': 'a'}]))
+        assert 'name' in config_error(directory, dict(CONFIG, accounts=[{'items': ['600001']}]))
+        assert '无法读取' in config_error(directory, '{"time": ')
+        try:
+            load_config(os.path.join(directory, 'missing.json'))
+        except ConfigError as e:
+            assert 'missing.json' in str(e)
+        else:
+            raise AssertionError('配置文件不存在时应报错')
+        assert issubclass(ConfigError, ValueError)
+
+
+def test_main_reports_config_error():
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, 'result.json')
+        code = cli.main([write_config(directory, {'accounts': []}), '--output', output, '--log-level', 'warning'])
+        with open(output, encoding='utf-8') as f:
+            result = json.load(f)
+        assert code == EXIT_CONFIG
+        assert result['ok'] is False and result['jobs'] == [] and 'time' in result['error']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='配置解析耗时')
+    parser.add_argument('--repeat', type=int, default=1000, help='重复次数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_config(directory, CONFIG)
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            load_config(path)
+        per_call = (time.perf_counter() - started) / args.repeat
+    print(f"{len(CONFIG['accounts'])}个账号的配置: 读取并校验每次{per_call * 1e6:.0f}µs")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cookie存储测试
+检查CookieStore：
+  - 多个账号、多个线程同时保存时，每个账号的文件都完整可读，不留临时文件
+  - 登录相关cookie过期或存储保存太久后load_valid返回None
+  - 拒绝不安全的账号名
+  - 按域名索引取cookie，兼容旧的cookies.txt列表格式
+  - 文件未变化时读取走缓存
+  - ChromeDrive在首次导航前用一次CDP Network.setCookies恢复会话，失效时清掉cookie回到扫码登录
+无需浏览器和网络。
+
+用法: python test_cookie_store.py [--accounts 8] [--rounds 200]
+也可以用 pytest test_cookie_store.py 运行
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from seckill.cookie_store import CookieStore, AccountCookies, load_file
+
+
+def make_cookies(account, serial, expiry=None):
+    expiry = expiry or int(time.time()) + 3600
+    return [
+        {'name': 'cookie2', 'value': f'{account}-{serial}', 'domain': '.taobao.com', 'path': '/', 'expiry': expiry},
+        {'name': '_tb_token_', 'value': f'token-{serial}', 'domain': '.taobao.com', 'path': '/', 'expiry': expiry},
+        {'name': 'unb', 'value': f'uid-{account}', 'domain': '.taobao.com', 'path': '/'},
+        {'name': 'cart_tag', 'value': str(serial), 'domain': 'cart.taobao.com', 'path': '/'},
+        {'name': 'other', 'value': 'x', 'domain': '.tmall.com', 'path': '/'},
+    ]
+
+
+def hammer(store, accounts, rounds, threads_per_account=2):
+    """每个账号多个线程交替保存和读取，返回读取到的损坏次数"""
+    errors = []
+
+    def worker(account, offset):
+        for serial in range(offset, rounds, threads_per_account):
+            store.save(account, make_cookies(account, serial))
+            cookies = store.load(account)
+            if cookies is None or cookies.get('unb') != f'uid-{account}':
+                errors.append(account)
+
+    threads = [threading.Thread(target=worker, args=(account, offset))
+               for account in accounts for offset in range(threads_per_account)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def test_concurrent_saves_stay_intact():
+    with tempfile.TemporaryDirectory() as root:
+        store = CookieStore(root)
+        accounts = [f'acct{i}' for i in range(4)]
+        assert hammer(store, accounts, 40) == []
+        assert store.accounts() == accounts
+        assert not [f for f in os.listdir(root) if f.endswith('.tmp')]
+        # 另一个进程的存储（无缓存）也能读到完整文件
+        for account in accounts:
+            assert CookieStore(root).load(account).get('cookie2').startswith(account)
+
+
+def test_expired_session_is_invalid():
+    with tempfile.TemporaryDirectory() as root:
+        store = CookieStore(root)
+        now = time.time()
+        store.save('main', make_cookies('main', 1, expiry=int(now) + 60))
+        assert store.load_valid('main', now=now) is not None
+        assert store.load_valid('main', now=now + 120) is None
+        assert store.load_valid('missing') is None
+        # 只有无关cookie时不算登录
+        assert not AccountCookies([{'name': 'other', 'value': 'x', 'domain': '.taobao.com'}]).valid()
+        # 登录cookie未过期（cookie2等是会话cookie），但存储太旧
+        store.save('old', make_cookies('old', 1, expiry=int(now) + 86400))
+        assert store.load_valid('old', now=now + 60, max_age=3600) is not None
+        assert store.load_valid('old', now=now + 7200, max_age=3600) is None
+
+
+def test_unsafe_account_names_rejected():
+    store = CookieStore('cookies')
+    assert store.path('acct_1.b-2').endswith('acct_1.b-2.json')
+    for account in ('a/b', '../x', '.hidden', '', 'a b', 'a\\b'):
+        try:
+            store.path(account)
+        except ValueError:
+            continue
+        raise AssertionError(account)
+
+
+def test_host_index_and_legacy_format():
+    with tempfile.TemporaryDirectory() as root:
+        legacy = os.path.join(root, 'cookies.txt')
+        with open(legacy, 'w', encoding='utf-8') as f:
+            json.dump(make_cookies('main', 7), f)
+        cookies = load_file(legacy, 'main')
+        names = {c['name'] for c in cookies.for_host('cart.taobao.com')}
+        assert names == {'cookie2', '_tb_token_', 'unb', 'cart_tag'}
+        assert {c['name'] for c in cookies.for_host('www.taobao.com')} == {'cookie2', '_tb_token_', 'unb'}
+        assert cookies.get('cart_tag', host='www.taobao.com') is None
+        assert cookies.get('cart_tag', host='cart.taobao.com') == '7'
+
+
+def test_load_is_cached_until_file_changes():
+    with tempfile.TemporaryDirectory() as root:
+        store = CookieStore(root)
+        store.save('main', make_cookies('main', 1))
+        first = store.load('main')
+        assert store.load('main') is first
+        CookieStore(root).save('main', make_cookies('main', 2))
+        assert store.load('main').get('cookie2') == 'main-2'
+
+
+class FakeDriver:
+    """记录WebDriver调用顺序；cdp=False时模拟不支持CDP的浏览器"""
+
+    def __init__(self, cdp=True):
+        self.cdp = cdp
+        self.calls = []
+
+    def execute_cdp_cmd(self, method, params):
+        if not self.cdp:
+            raise AttributeError('execute_cdp_cmd')
+        self.calls.append((method, len(params.get('cookies', ()))))
+
+    def get(self, url):
+        self.calls.append(('get', url))
+
+    def add_cookie(self, cookie):
+        self.calls.append(('add_cookie', cookie['name']))
+
+    def refresh(self):
+        self.calls.append(('refresh',))
+
+    def delete_all_cookies(self):
+        self.calls.append(('delete_all_cookies',))
+
+
+def restore(driver, logged_in):
+    from seckill.seckill_taobao import ChromeDrive
+
+    with tempfile.TemporaryDirectory() as root:
+        store = CookieStore(root)
+        store.save('main', make_cookies('main', 1))
+        chrome = ChromeDrive(seckill_time='2030-01-01 00:00:00', account='main', cookie_store=store)
+        chrome.driver = driver
+        chrome._check_login_status = lambda: logged_in
+        return chrome._restore_cookies('https://www.taobao.com')
+
+
+def test_session_restore_bulk_before_navigation():
+    driver = FakeDriver()
+    assert restore(driver, logged_in=True)
+    # 所有域名的cookie一次写入，之后只打开一次页面
+    assert driver.calls == [('Network.setCookies', 5), ('get', 'https://www.taobao.com')]
+
+    driver = FakeDriver()
+    assert not restore(driver, logged_in=False)
+    assert driver.calls[-1] == ('Network.clearBrowserCookies', 0)
+
+    driver = FakeDriver(cdp=False)
+    assert restore(driver, logged_in=True)
+    assert driver.calls[0] == ('get', 'https://www.taobao.com')
+    assert ('add_cookie', 'cart_tag') not in driver.calls and driver.calls[-1] == ('refresh',)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cookie存储并发与读取测试')
+    parser.add_argument('--accounts', type=int, default=8, help='并发保存的账号数')
+    parser.add_argument('--rounds', type=int, default=200, help='每个账号保存的次数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        store = CookieStore(root)
+        accounts = [f'acct{i}' for i in range(args.accounts)]
+        started = time.perf_counter()
+        errors = hammer(store, accounts, args.rounds)
+        elapsed = time.perf_counter() - started
+        print(f"{args.accounts}个账号并发保存{args.rounds}次: {elapsed:.2f}s，"
+              f"每次{elapsed * 1000 / (args.accounts * args.rounds):.2f}ms，读取损坏{len(errors)}次")
+
+        repeat = 10000
+        started = time.perf_counter()
+        for _ in range(repeat):
+            store.load_valid(accounts[0]).for_host('cart.taobao.com')
+        cached = (time.perf_counter() - started) / repeat
+        started = time.perf_counter()
+        for _ in range(repeat // 10):
+            load_file(store.path(accounts[0]), accounts[0]).for_host('cart.taobao.com')
+        uncached = (time.perf_counter() - started) / (repeat // 10)
+        print(f"读取并按域名取cookie: 缓存{cached * 1e6:.1f}µs，重新解析{uncached * 1e6:.1f}µs")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
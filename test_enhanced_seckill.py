@@ -8,7 +8,6 @@
 import sys
 from datetime import datetime, timedelta
 from seckill.seckill_taobao import ChromeDrive
-from optimized_sec_kill import optimized_sec_kill_method
 
 def test_enhanced_settlement():
     """测试增强版结算按钮查找功能"""
@@ -20,12 +19,9 @@ def test_enhanced_settlement():
     print(f"📅 设置测试时间: {seckill_time}")
     
     try:
-        # 创建ChromeDrive实例
+        # 创建ChromeDrive实例，sec_kill即优化版秒杀
         driver = ChromeDrive(seckill_time=seckill_time, password=None)
         
-        # 替换秒杀方法为优化版
-        driver.sec_kill = lambda: optimized_sec_kill_method(driver)
-        
         print("🌐 启动浏览器并登录...")
         driver.login("https://cart.taobao.com/cart.htm")
         
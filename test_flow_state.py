@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+抢购流程状态机测试
+检查页面状态分类和FlowStateMachine：
+  - 分类顺序：URL优先（购物车 > 订单 > 支付），URL无法判断时才看页面文本（出错 > 购物车 > 订单 > 支付）
+  - 只取回当前状态下精确匹配且可点击的按钮，风控页和滑块验证标记为限流
+  - 状态机只在状态变化时记录切换，按假时钟统计各状态停留时长和时间线
+分类脚本在node中用最小的假DOM执行（没有node时跳过），无需浏览器和网络。
+
+用法: python test_flow_state.py [--observations 10000]
+也可以用 pytest test_flow_state.py 运行
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from seckill.react_utils import ReactPageUtils
+from seckill.flow_state import FlowStateMachine, PageState, CART, ORDER, PAYMENT, UNKNOWN
+
+# 假DOM：每个用例新建window和document，按钮为[文本, 是否禁用]
+NODE_HARNESS = """
+const cases = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+global.MutationObserver = class { observe() {} };
+const results = cases.map(([href, text, buttons, risk]) => {
+    global.window = {location: {href}};
+    global.document = {
+        body: {textContent: text},
+        documentElement: {},
+        querySelectorAll: () => buttons.map(([t, disabled]) => ({
+            textContent: t, disabled, getBoundingClientRect: () => ({width: 100, height: 40}),
+        })),
+        querySelector: () => (risk ? {} : null),
+    };
+    const r = (function() { %s })();
+    return [r.state, r.via, r.handle && r.handle.textContent.trim(), r.throttled];
+});
+console.log(JSON.stringify(results));
+"""
+
+CART_URL = 'https://cart.taobao.com/cart.htm'
+ORDER_URL = 'https://buy.taobao.com/auction/order/confirm_order.htm'
+HOME_URL = 'https://www.taobao.com/'
+
+# (URL, 页面文本, 按钮, 是否有滑块) -> (状态, 依据, 按钮文本, 是否限流)
+CASES = [
+    ((CART_URL, '提交订单', [], False), ('cart', 'url', None, False)),
+    ((ORDER_URL, '购物车', [], False), ('order', 'url', None, False)),
+    ((CART_URL + '?from=order', '', [], False), ('cart', 'url', None, False)),
+    (('https://cashier.alipay.com/standard/lightpay.htm', '', [], False), ('payment', 'url', None, False)),
+    ((HOME_URL, '网络异常 购物车 提交订单', [], False), ('error', 'text', None, False)),
+    ((HOME_URL, '购物车 提交订单', [], False), ('cart', 'text', None, False)),
+    ((HOME_URL, '确认订单 支付', [], False), ('order', 'text', None, False)),
+    ((HOME_URL, '收银台', [], False), ('payment', 'text', None, False)),
+    ((HOME_URL, '首页', [['结算', False]], False), ('unknown', 'text', None, False)),
+    ((CART_URL, '', [['去结算', False], ['结算(3)', True], [' 结算 (3) ', False]], False),
+     ('cart', 'url', '结算 (3)', False)),
+    ((ORDER_URL, '', [['提交订单并支付', False], ['提交订单', False]], False), ('order', 'url', '提交订单', False)),
+    ((CART_URL, '', [['结算', False]], True), ('cart', 'url', '结算', True)),
+    (('https://login.taobao.com/punish?x5sec=abc', '', [], False), ('unknown', 'text', None, True)),
+]
+
+
+def test_classification_order():
+    node = shutil.which('node')
+    if node is None:
+        import pytest
+        pytest.skip('需要node执行分类脚本')
+    script = NODE_HARNESS % ReactPageUtils.get_page_state_script()
+    proc = subprocess.run([node, '-e', script], input=json.dumps([c[0] for c in CASES]),
+                          capture_output=True, text=True, check=True)
+    results = [tuple(r) for r in json.loads(proc.stdout)]
+    for (page, expected), actual in zip(CASES, results):
+        assert actual == expected, (page, actual)
+
+
+class FakeRunner:
+    """按顺序返回预设的分类结果"""
+
+    def __init__(self, results):
+        self.results = iter(results)
+        self.calls = []
+
+    def run(self, name, script, *args):
+        self.calls.append(name)
+        return next(self.results)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_classify_builds_page_state():
+    machine = FlowStateMachine(None, scripts=FakeRunner([
+        {'state': 'order', 'via': 'text', 'url': ORDER_URL, 'handle': 'el', 'dom': 'a:3', 'throttled': 1},
+        None,
+    ]))
+    page = machine.classify()
+    assert (page.state, page.via, page.url, page.handle, page.dom, page.throttled) == \
+        (ORDER, 'text', ORDER_URL, 'el', 'a:3', True)
+    page = machine.classify()
+    assert isinstance(page, PageState) and (page.state, page.via, page.throttled) == (UNKNOWN, 'url', False)
+    assert machine.current is None and machine.scripts.calls == ['page_state', 'page_state']
+
+
+def test_transitions_and_dwell_times():
+    clock = FakeClock()
+    states = [CART, CART, ORDER, ORDER, PAYMENT]
+    machine = FlowStateMachine(None, clock=clock, scripts=FakeRunner({'state': s} for s in states))
+    changed = []
+    for _ in states:
+        machine.observe()
+        changed.append(machine.changed)
+        clock.now += 0.5
+    assert changed == [True, False, True, False, True]
+    assert (machine.previous, machine.current) == (ORDER, PAYMENT)
+    assert machine.timeline() == [(0.0, CART), (1.0, ORDER), (2.0, PAYMENT)]
+    assert machine.finish() == {CART: 1.0, ORDER: 1.0, PAYMENT: 0.5}
+    # 再次finish不会重复计入
+    assert machine.finish() == {CART: 1.0, ORDER: 1.0, PAYMENT: 0.5}
+    assert not machine.transition(PAYMENT) and machine.transition(CART)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='状态机每轮推进的Python侧开销')
+    parser.add_argument('--observations', type=int, default=10000, help='模拟的分类次数')
+    args = parser.parse_args()
+
+    states = [CART, CART, CART, ORDER, ORDER, PAYMENT] * (args.observations // 6 + 1)
+    machine = FlowStateMachine(None, scripts=FakeRunner({'state': s, 'dom': 'a:1'} for s in states))
+    started = time.perf_counter()
+    for _ in range(args.observations):
+        machine.observe()
+    per_call = (time.perf_counter() - started) / args.observations
+    print(f"{args.observations}次分类: observe()每次{per_call * 1e6:.2f}µs（不含脚本往返），"
+          f"{len(machine.transitions)}次状态切换")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+启动导入耗时测试
+在独立解释器中用 python -X importtime 导入每个入口模块，检查累计导入耗时不超过预算，
+并确认入口没有提前导入它用不到的重型依赖（selenium、webdriver_manager、browsercookie等）。
+无需浏览器和网络。
+
+用法: python test_import_time.py [--repeat 3] [--scale 1.0]
+也可以用 pytest test_import_time.py 运行
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# 入口模块: (预算ms, 不允许在导入时加载的模块)
+BUDGETS = {
+    'main': (150, ('selenium', 'webdriver_manager', 'optimized_sec_kill', 'seckill.react_utils',
+                   'seckill.page_loader', 'requests')),
+    'cli': (150, ('selenium', 'webdriver_manager', 'seckill.scheduler', 'requests')),
+    'seckill.taobao_api': (400, ('selenium', 'webdriver_manager', 'browsercookie', 'seckill.seckill_taobao')),
+    'seckill.scheduler': (400, ('selenium', 'webdriver_manager', 'optimized_sec_kill')),
+    'seckill.seckill_taobao': (800, ('webdriver_manager', 'optimized_sec_kill', 'seckill.multi_tab')),
+}
+
+_PROBE = "import sys, {module}; print(','.join(sorted(sys.modules)))"
+
+
+def measure(module):
+    """返回(累计导入耗时ms, 导入后sys.modules集合)"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE.format(module=module)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    cumulative_us = None
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:'):
+            continue
+        parts = [p.strip() for p in line[len('import time:'):].split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            cumulative_us = int(parts[1])
+    if cumulative_us is None:
+        raise RuntimeError(f"importtime输出中没有找到 {module}")
+    return cumulative_us / 1000, set(proc.stdout.strip().split(','))
+
+
+def check(module, repeat=3, scale=1.0):
+    """返回错误列表，耗时取repeat次中最快的一次"""
+    budget, forbidden = BUDGETS[module]
+    best, loaded = None, set()
+    for _ in range(repeat):
+        ms, loaded = measure(module)
+        best = ms if best is None else min(best, ms)
+    errors = [f"{module} 提前导入了 {name}" for name in forbidden if name in loaded]
+    if best > budget * scale:
+        errors.append(f"{module} 导入耗时 {best:.1f}ms 超过预算 {budget * scale:.0f}ms")
+    return best, errors
+
+
+def test_import_budgets():
+    failures = []
+    for module in BUDGETS:
+        _, errors = check(module)
+        failures.extend(errors)
+    assert not failures, '\n'.join(failures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='入口模块导入耗时测试')
+    parser.add_argument('--repeat', type=int, default=3, help='每个入口测量次数，取最快一次')
+    parser.add_argument('--scale', type=float, default=1.0, help='预算倍数（慢机器上可放宽）')
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'入口':<24}{'耗时ms':>10}{'预算ms':>10}  结果")
+    for module in BUDGETS:
+        try:
+            best, errors = check(module, args.repeat, args.scale)
+        except (subprocess.CalledProcessError, RuntimeError) as e:
+            best, errors = float('nan'), [f"{module} 导入失败: {e}"]
+        failed = failed or bool(errors)
+        print(f"{module:<24}{best:>10.1f}{BUDGETS[module][0] * args.scale:>10.0f}  {'❌' if errors else '✅'}")
+        for error in errors:
+            print(f"    {error}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
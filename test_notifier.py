@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+通知分发器测试
+用假通道检查NotificationDispatcher：
+  - 通道失败时按次数重试，用完重试次数后计为失败，不影响其他通道
+  - 合并窗口内的突发消息合并成一条，相同消息只计数
+  - 队列满时丢弃新消息，notify()不阻塞
+  - 队列满且通道卡住时close()在超时内返回
+无需网络。
+
+用法: python test_notifier.py [--messages 1000]
+也可以用 pytest test_notifier.py 运行
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.notifier import NotificationDispatcher
+
+
+class FakeSink:
+    """记录收到的消息；前failures次发送抛出异常，gate未打开时发送阻塞"""
+
+    def __init__(self, failures=0, gate=None):
+        self.failures = failures
+        self.gate = gate
+        self.attempts = 0
+        self.messages = []
+        self.received = threading.Event()
+
+    def send(self, msg, timeout):
+        self.attempts += 1
+        if self.gate is not None:
+            self.gate.wait()
+        if self.attempts <= self.failures:
+            raise ConnectionError('push service down')
+        self.messages.append(msg)
+        self.received.set()
+
+
+def test_retry_then_give_up():
+    flaky, healthy = FakeSink(failures=2), FakeSink()
+    dispatcher = NotificationDispatcher([flaky, healthy], retries=2, backoff=0, coalesce_window=0)
+    dispatcher.notify('支付成功')
+    dispatcher.close()
+    assert flaky.attempts == 3 and flaky.messages == ['支付成功']
+    assert healthy.messages == ['支付成功'] and dispatcher.sent == 2 and dispatcher.failed == 0
+
+    down = FakeSink(failures=10)
+    dispatcher = NotificationDispatcher([down, healthy], retries=1, backoff=0, coalesce_window=0)
+    dispatcher.notify('支付失败')
+    dispatcher.close()
+    assert down.attempts == 2 and down.messages == []
+    assert healthy.messages[-1] == '支付失败' and dispatcher.failed == 1 and dispatcher.sent == 1
+
+
+def test_burst_is_coalesced():
+    sink = FakeSink()
+    dispatcher = NotificationDispatcher([sink], coalesce_window=0.3)
+    for msg in ('第1次抢购失败', '支付成功', '第1次抢购失败'):
+        assert dispatcher.notify(msg)
+    dispatcher.close()
+    assert sink.messages == ['第1次抢购失败 (x2)\n支付成功']
+
+
+def test_full_queue_drops_without_blocking():
+    gate = threading.Event()
+    sink = FakeSink(gate=gate)
+    dispatcher = NotificationDispatcher([sink], maxsize=2, coalesce_window=0)
+    dispatcher.notify('first')
+    while sink.attempts == 0:  # 后台线程已取走第一条，卡在通道里
+        time.sleep(0.01)
+    started = time.perf_counter()
+    results = [dispatcher.notify(f'msg{i}') for i in range(5)]
+    assert time.perf_counter() - started < 0.1
+    assert results == [True, True, False, False, False] and dispatcher.dropped == 3
+
+    # 队列满、通道卡住：close()不会一直等待停止信号入队
+    started = time.perf_counter()
+    dispatcher.close(timeout=0.2)
+    assert time.perf_counter() - started < 1.0
+    gate.set()
+    dispatcher._thread.join(timeout=1.0)
+    assert not dispatcher._thread.is_alive() and sink.messages == ['first']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='通知分发器调用方耗时')
+    parser.add_argument('--messages', type=int, default=1000, help='通道卡住时连续发送的消息数')
+    args = parser.parse_args()
+
+    gate = threading.Event()
+    dispatcher = NotificationDispatcher([FakeSink(gate=gate)], coalesce_window=0)
+    started = time.perf_counter()
+    for i in range(args.messages):
+        dispatcher.notify(f'msg{i}')
+    per_call = (time.perf_counter() - started) / args.messages
+    started = time.perf_counter()
+    dispatcher.close(timeout=0.5)
+    close_cost = time.perf_counter() - started
+    gate.set()
+    print(f"通道卡住时notify()每次{per_call * 1e6:.1f}µs，丢弃{dispatcher.dropped}条，close()耗时{close_cost * 1000:.0f}ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
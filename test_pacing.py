@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+抢购循环节奏测试
+用假时钟检查AdaptivePacing.should_refresh：
+  - DOM签名在stagnant_after秒内多次观测都不变才刷新，观测次数或时间不够都不刷新
+  - DOM持续变化时不刷新，但URL停滞MAX_STALL秒后兜底刷新
+  - 限流或错误页期间间隔倍增且不刷新，恢复正常后逐步回落
+  - refreshed()后重新计时
+无需浏览器和网络。
+
+用法: python test_pacing.py [--rounds 20]
+也可以用 pytest test_pacing.py 运行
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from seckill.pacing import AdaptivePacing, FixedPacing, MAX_STALL
+
+CART = 'https://cart.taobao.com/cart.htm'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class Page:
+    def __init__(self, url=CART, state='cart', dom=('doc1', 0), throttled=False):
+        self.url = url
+        self.state = state
+        self.dom = dom
+        self.throttled = throttled
+
+
+def make_pacing():
+    clock = FakeClock()
+    return AdaptivePacing(clock=clock), clock
+
+
+def test_unchanged_dom_refreshes_after_stagnant_after():
+    pacing, clock = make_pacing()
+    assert pacing.stagnant_after() == 2.0
+    for _ in range(3):
+        pacing.observe(Page(), 0.01)
+    assert not pacing.should_refresh()  # 观测次数够但还没到时间
+    clock.now += 2.0
+    assert not pacing.should_refresh()  # 第一次观测之后只有2次不变
+    pacing.observe(Page(), 0.01)
+    assert pacing.should_refresh()
+
+    pacing.refreshed()
+    assert not pacing.should_refresh()
+    for _ in range(4):
+        pacing.observe(Page(), 0.01)
+    assert not pacing.should_refresh()
+    clock.now += pacing.stagnant_after()
+    assert pacing.should_refresh()
+
+
+def test_dom_change_postpones_refresh_until_url_stall():
+    pacing, clock = make_pacing()
+    for i in range(int(MAX_STALL)):
+        pacing.observe(Page(dom=('doc1', i)), 0.01)
+        assert not pacing.should_refresh()
+        clock.now += 1.0
+    # URL已经MAX_STALL秒没变，DOM仍在变化也刷新
+    pacing.observe(Page(dom=('doc1', 99)), 0.01)
+    assert pacing.should_refresh()
+
+    # 跳转到新页面重新计时
+    pacing.observe(Page(url='https://buy.taobao.com/auction/order/confirm_order.htm', dom=('doc2', 0)), 0.01)
+    assert not pacing.should_refresh()
+    clock.now += MAX_STALL - 0.1
+    assert not pacing.should_refresh()
+    clock.now += 0.1
+    assert pacing.should_refresh()
+
+
+def test_throttling_backs_off_and_suppresses_refresh():
+    pacing, clock = make_pacing()
+    pacing.observe(Page(), 0.05)
+    normal = pacing.retry_interval()
+    assert normal == 0.05
+    for _ in range(3):
+        pacing.observe(Page(throttled=True), 0.05)
+    assert pacing.factor == 8.0 and pacing.retry_interval() == normal * 8
+    assert pacing.retry_interval() <= pacing.max_interval * pacing.factor
+    clock.now += MAX_STALL * 2
+    assert not pacing.should_refresh()
+
+    pacing.observe(Page(state='error', dom=None), 0.05)
+    assert pacing.factor == 16.0 and not pacing.should_refresh()
+
+    # 恢复正常后逐步回落，回到1倍后停滞的页面才刷新
+    factors = []
+    for _ in range(4):
+        pacing.observe(Page(), 0.05)
+        factors.append(pacing.factor)
+        if pacing.factor > 1.0:
+            assert not pacing.should_refresh()
+    assert factors == [8.0, 4.0, 2.0, 1.0]
+    assert pacing.should_refresh()
+
+
+def test_fixed_pacing_counts_url_repeats():
+    pacing = FixedPacing(stagnant_limit=2, clock=FakeClock())
+    for _ in range(3):
+        pacing.observe(Page(dom=None), 0.01)
+    assert not pacing.should_refresh()
+    pacing.observe(Page(dom=None), 0.01)
+    assert pacing.should_refresh()
+    pacing.refreshed()
+    assert not pacing.should_refresh()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='限流时自适应节奏的间隔变化')
+    parser.add_argument('--rounds', type=int, default=20, help='模拟的轮数，前一半被限流')
+    args = parser.parse_args()
+
+    pacing, clock = make_pacing()
+    intervals = []
+    for i in range(args.rounds):
+        pacing.observe(Page(throttled=i < args.rounds // 2, dom=('doc1', i)), 0.05)
+        intervals.append(pacing.retry_interval())
+        clock.now += intervals[-1]
+    print("重试间隔(ms): " + ' '.join(f'{ms * 1000:.0f}' for ms in intervals))
+    print(f"限流期间最大{max(intervals) * 1000:.0f}ms，恢复后{intervals[-1] * 1000:.0f}ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ReactPageUtils离线回放测试
+把录制的购物车/订单页面通过本地HTTP服务加载到无头Chrome中，逐个运行页面脚本，
+检查选中的元素并统计每个脚本的执行耗时。无需登录，也不会访问淘宝。
+
+用法: python test_react_utils_replay.py [--pages test_pages] [--repeat 5] [--headed]
+也可以用 pytest test_react_utils_replay.py 运行（没有Chrome/chromedriver时跳过）
+"""
+
+import os
+import sys
+import argparse
+import threading
+import functools
+from statistics import median
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from selenium import webdriver
+
+from seckill import taobao_api
+from seckill.react_utils import ReactPageUtils
+from seckill.script_runner import ScriptRunner
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_pages')
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayHarness:
+    """离线回放器：本地HTTP服务 + 无头Chrome"""
+
+    def __init__(self, pages_dir=PAGES_DIR, headless=True):
+        handler = functools.partial(_QuietHandler, directory=pages_dir)
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.base_url = 'http://127.0.0.1:%d' % self.httpd.server_address[1]
+
+        options = webdriver.ChromeOptions()
+        if headless:
+            options.add_argument('--headless=new')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--window-size=1920,1080')
+        self.driver = webdriver.Chrome(options=options)
+        self.scripts = ScriptRunner(self.driver)
+
+    def load(self, page):
+        self.driver.get(f'{self.base_url}/{page}')
+
+    def run(self, script, *args, name='case'):
+        """执行脚本，返回(结果, 耗时拆分ScriptSpan)"""
+        result = self.scripts.run(name, script, *args)
+        return result, self.scripts.spans[-1]
+
+    def clicks(self):
+        return self.driver.execute_script('return window.__clicks || [];')
+
+    def close(self):
+        try:
+            self.driver.quit()
+        finally:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+
+def _check_state(expected):
+    def check(result, clicks):
+        ok = result.get('state') == expected and result.get('handle') is not None
+        return ok, f"state={result.get('state')} handle={'有' if result.get('handle') else '无'}"
+    return check
+
+
+def _check_clicked(expected, forbidden=()):
+    def check(result, clicks):
+        ok = bool(result.get('success')) and expected in clicks and not set(forbidden) & set(clicks)
+        return ok, f"method={result.get('method')} clicks={clicks}"
+    return check
+
+
+def _check_select_items(result, clicks):
+    # 已全选后只保留600001的500001：取消600002，已下架的600003和不存在的600009报告缺失
+    ok = (result.get('found') == 1 and result.get('selected') == 1 and result.get('deselected', 0) >= 1
+          and sorted(result.get('missing', [])) == ['600003', '600009'])
+    return ok, (f"found={result.get('found')} selected={result.get('selected')} "
+                f"deselected={result.get('deselected')} missing={result.get('missing')}")
+
+
+def _check_inspect_submit(result, clicks):
+    ok = bool(result.get('found')) and bool(result.get('enabled')) and '提交订单' in result.get('text', '') and not clicks
+    return ok, f"text={result.get('text')} enabled={result.get('enabled')} clicks={clicks}"
+
+
+BUY_NOW_FORM = taobao_api.buy_now_form('600001', '500001')
+
+# 表单提交改为记录到__clicks，页面不跳转
+STUB_FORM_SUBMIT = """
+    HTMLFormElement.prototype.submit = function() {
+        window.__clicks.push('form ' + this.method + ' ' + this.getAttribute('action') + ' ' + this.elements.length);
+    };
+"""
+
+
+def _check_buy_now(result, clicks):
+    expected = f"form post {taobao_api.BUY_NOW_URL} {len(BUY_NOW_FORM)}"
+    ok = bool(result.get('success')) and result.get('fields') == len(BUY_NOW_FORM) and clicks == [expected]
+    return ok, f"fields={result.get('fields')} clicks={clicks}"
+
+
+# (名称, 页面, 准备脚本, 被测脚本, 脚本参数, 检查函数)
+CASES = [
+    ("页面状态-购物车", 'cart.htm', None, ReactPageUtils.get_page_state_script(), (), _check_state('cart')),
+    ("商品选择", 'cart.htm', None, ReactPageUtils.get_select_products_script(), (),
+     lambda r, c: (r.get('selected', 0) >= 2, f"total={r.get('total')} selected={r.get('selected')}")),
+    ("选择验证", 'cart.htm', ReactPageUtils.get_select_products_script(),
+     ReactPageUtils.get_verify_selection_script(), (), lambda r, c: (r > 0, f"合计={r}")),
+    ("指定商品勾选", 'cart.htm', ReactPageUtils.get_select_products_script(),
+     ReactPageUtils.get_select_items_script(), (['600001:500001', '600003', '600009'],), _check_select_items),
+    ("结算按钮查找", 'cart.htm', ReactPageUtils.get_select_products_script(),
+     ReactPageUtils.get_find_settlement_button_script(), (), _check_clicked('settle', ('settle-detail',))),
+    ("页面分析", 'cart.htm', None, ReactPageUtils.get_page_analysis_script(), (),
+     lambda r, c: (any('结算' in m.get('text', '') for m in r.get('textMatches', [])),
+                   f"textMatches={len(r.get('textMatches', []))} buttons={len(r.get('allButtons', []))}")),
+    ("深度结算分析", 'cart.htm', None, ReactPageUtils.get_deep_settlement_analysis_script(), (),
+     lambda r, c: (len(r.get('recommendations', [])) > 0, f"recommendations={len(r.get('recommendations', []))}")),
+    ("立即购买表单", 'cart.htm', STUB_FORM_SUBMIT, ReactPageUtils.get_buy_now_script(),
+     (taobao_api.BUY_NOW_URL, BUY_NOW_FORM), _check_buy_now),
+    ("页面状态-订单", 'confirm_order.htm', None, ReactPageUtils.get_page_state_script(), (), _check_state('order')),
+    ("提交按钮检查", 'confirm_order.htm', None, ReactPageUtils.get_inspect_submit_button_script(), (None,),
+     _check_inspect_submit),
+    ("提交按钮查找", 'confirm_order.htm', None, ReactPageUtils.get_find_submit_button_script(), (),
+     _check_clicked('submit', ('back',))),
+]
+
+
+def run_case(harness, case):
+    """运行一个用例一次，返回(是否通过, 说明, ScriptSpan或None)"""
+    name, page, setup, script, args, check = case
+    harness.load(page)
+    if setup:
+        harness.run(setup, name='setup')
+    try:
+        result, span = harness.run(script, *args, name=name)
+        passed, detail = check(result, harness.clicks())
+        return passed, detail, span
+    except Exception as e:
+        return False, f"异常: {e}", None
+
+
+def run_cases(harness, repeat=1):
+    """运行所有用例，返回[(名称, 是否通过, 说明, 往返耗时中位数ms, 脚本耗时中位数ms)]"""
+    report = []
+    for case in CASES:
+        timings, script_timings, ok, detail = [], [], True, ''
+        for _ in range(repeat):
+            passed, detail, span = run_case(harness, case)
+            timings.append(span.rtt_ms if span else 0.0)
+            script_timings.append((span.script_ms or 0.0) if span else 0.0)
+            ok = ok and passed
+        report.append((case[0], ok, detail, median(timings), median(script_timings)))
+    return report
+
+
+def test_replay_cases():
+    import pytest
+
+    try:
+        harness = ReplayHarness()
+    except Exception as e:  # 没有Chrome或chromedriver
+        pytest.skip(f"无法启动无头Chrome: {e}")
+    failed = []
+    try:
+        for case in CASES:
+            passed, detail, _ = run_case(harness, case)
+            if not passed:
+                failed.append((case[0], detail))
+    finally:
+        harness.close()
+    assert not failed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ReactPageUtils离线回放测试')
+    parser.add_argument('--pages', default=PAGES_DIR, help='录制页面目录（需包含cart.htm和confirm_order.htm）')
+    parser.add_argument('--repeat', type=int, default=3, help='每个用例重复次数，耗时取中位数')
+    parser.add_argument('--headed', action='store_true', help='显示浏览器窗口')
+    args = parser.parse_args()
+
+    harness = ReplayHarness(args.pages, headless=not args.headed)
+    try:
+        report = run_cases(harness, args.repeat)
+    finally:
+        harness.close()
+
+    print(f"{'用例':<14}{'结果':<6}{'往返ms':>10}{'脚本ms':>10}  说明")
+    for name, ok, detail, elapsed, script_ms in report:
+        print(f"{name:<14}{'✅' if ok else '❌':<6}{elapsed:>10.2f}{script_ms:>10.2f}  {detail}")
+
+    failed = [r for r in report if not r[1]]
+    print(f"\n总计: {len(report) - len(failed)}/{len(report)} 个用例通过")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
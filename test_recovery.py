@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+浏览器崩溃恢复测试
+检查seckill/recovery.py和OptimizedSecKill的换浏览器恢复：
+  - 检查点只前进不后退
+  - 看门狗在chromedriver进程退出后几毫秒内发现（用一个子进程代替chromedriver）
+  - 按错误信息区分浏览器失效和普通失败，确认浏览器确实不响应后才判定失效
+  - 换浏览器后用CDP一次写回cookie，已勾选时直接POST结算表单，不再加载购物车
+  - 提交点击结果未确认时不再恢复，避免重复下单
+无需浏览器和网络。
+
+用法: python test_recovery.py [--trials 20]
+也可以用 pytest test_recovery.py 运行
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from selenium.common.exceptions import InvalidSessionIdException, NoSuchElementException, WebDriverException
+
+from seckill import recovery, taobao_api
+from seckill.recovery import Checkpoint, DriverWatchdog, is_driver_dead
+
+
+class FakeService:
+    def __init__(self, process):
+        self.process = process
+
+
+class FakeDriver:
+    """记录WebDriver调用；所有脚本都返回True（表单提交后页面立即跳转）"""
+
+    current_url = 'https://cart.taobao.com/cart.htm'
+    capabilities = {}
+
+    def __init__(self, name, process=None):
+        self.name = name
+        self.calls = []
+        self.service = FakeService(process) if process is not None else None
+        self.current_window_handle = name
+
+    def execute_cdp_cmd(self, method, params):
+        self.calls.append((method, len(params.get('cookies', ()))))
+
+    def execute_script(self, script, *args):
+        self.calls.append(('script', args))
+        return True
+
+    def get(self, url):
+        self.calls.append(('get', url))
+
+    @property
+    def window_handles(self):
+        return [self.name]
+
+
+class DeadDriver(FakeDriver):
+    """会话已失效的浏览器：确认命令同样失败"""
+
+    @property
+    def window_handles(self):
+        raise InvalidSessionIdException('invalid session id')
+
+
+class FakePool:
+    def __init__(self, spare):
+        self.spare = spare
+        self.discarded = []
+
+    def acquire(self, timeout=None):
+        return self.spare
+
+    def discard(self, driver):
+        self.discarded.append(driver)
+
+
+def sleeper():
+    """代替chromedriver的子进程"""
+    return subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+
+
+def detection_latency(interval=0.005):
+    """杀掉子进程后看门狗判定失效的耗时（秒）"""
+    process = sleeper()
+    watchdog = DriverWatchdog(FakeDriver('a', process), interval=interval).start()
+    try:
+        time.sleep(0.05)
+        assert not watchdog.dead
+        killed_at = time.monotonic()
+        process.kill()
+        process.wait()
+        if not watchdog._died.wait(1.0):
+            return None
+        return watchdog.died_at - killed_at
+    finally:
+        watchdog.stop()
+
+
+def make_optimizer(driver, pool, buy_now=False):
+    from optimized_sec_kill import OptimizedSecKill
+    from seckill.strategy_stats import StrategyStats
+
+    return OptimizedSecKill(driver, datetime.now(), snapshot_dir=None, timing_path=None, driver_pool=pool,
+                            strategy_stats=StrategyStats(), targets=['600001:4800001'], buy_now=buy_now,
+                            race_log_level=None)
+
+
+def recovery_cookies():
+    from seckill.cookie_store import AccountCookies
+
+    return AccountCookies([{'name': 'cookie2', 'value': 'x', 'domain': '.taobao.com'},
+                           {'name': 'unb', 'value': '1', 'domain': '.taobao.com'}])
+
+
+def test_checkpoint_only_moves_forward():
+    checkpoint = Checkpoint()
+    assert checkpoint.advance(recovery.ARMED, confirm=('c',))
+    assert checkpoint.advance(recovery.ORDER, order_url='https://buy.taobao.com/order')
+    assert not checkpoint.advance(recovery.CONFIRM)
+    assert checkpoint.phase == recovery.ORDER and checkpoint.at_least(recovery.CONFIRM)
+    assert checkpoint.confirm == ('c',) and checkpoint.order_url.endswith('/order')
+
+
+def test_dead_driver_errors():
+    assert is_driver_dead(InvalidSessionIdException('invalid session id'))
+    assert is_driver_dead(WebDriverException('unknown error: session deleted because of page crash'))
+    assert is_driver_dead(ConnectionRefusedError(111, 'Connection refused'))
+    assert is_driver_dead(Exception("HTTPConnectionPool(host='localhost'): Max retries exceeded with url"))
+    assert not is_driver_dead(NoSuchElementException('no such element'))
+    assert not is_driver_dead(WebDriverException('javascript error: x is undefined'))
+    assert is_driver_dead(WebDriverException('disconnected: not connected to DevTools'))
+    # 页面断网、iframe跳转不是浏览器失效
+    assert not is_driver_dead(WebDriverException('unknown error: net::ERR_INTERNET_DISCONNECTED'))
+    assert not is_driver_dead(WebDriverException('unknown error: target frame detached'))
+
+
+def test_report_confirms_before_marking():
+    # 浏览器仍能响应时，错误信息再像失效也不标记
+    watchdog = DriverWatchdog(FakeDriver('live'))
+    assert not watchdog.report(WebDriverException('chrome not reachable'))
+    assert watchdog.probe() and not watchdog.dead
+    watchdog = DriverWatchdog(DeadDriver('dead'))
+    assert not watchdog.report(NoSuchElementException('no such element'))
+    assert watchdog.report(WebDriverException('chrome not reachable'))
+    assert watchdog.reason.startswith('WebDriverException')
+
+
+def test_watchdog_detects_driver_exit():
+    latency = detection_latency()
+    assert latency is not None and latency < 0.2, latency
+
+
+def test_recover_posts_confirm_form_on_new_browser():
+    with tempfile.TemporaryDirectory() as directory:
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            dead, spare = DeadDriver('dead'), FakeDriver('spare')
+            pool = FakePool(spare)
+            optimizer = make_optimizer(dead, pool)
+            optimizer.checkpoint.advance(recovery.ARMED, origin=FakeDriver.current_url,
+                                         cookies=recovery_cookies(), confirm=('c1', '600001', '4800001', 's1', {}, {}))
+            optimizer.checkpoint.advance(recovery.ORDER)
+            optimizer.watchdog.report(InvalidSessionIdException('invalid session id'))
+            assert optimizer.recover()
+            assert optimizer.driver is spare and optimizer.scripts.driver is spare
+            assert spare.calls[0] == ('Network.setCookies', 2)
+            url, fields = spare.calls[1][1]
+            assert url == taobao_api.CONFIRM_URL and fields['item'].startswith('c1_600001_1_4800001_s1')
+            assert not any(call[0] == 'get' for call in spare.calls)  # 没有重新加载购物车
+            assert not optimizer.watchdog.dead
+            time.sleep(0.05)
+            assert pool.discarded == [dead]
+        finally:
+            os.chdir(cwd)
+
+
+def test_no_recovery_while_submit_in_flight():
+    with tempfile.TemporaryDirectory() as directory:
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            spare = FakeDriver('spare')
+            optimizer = make_optimizer(DeadDriver('dead'), FakePool(spare), buy_now=True)
+            optimizer.checkpoint.advance(recovery.ORDER)
+            optimizer.checkpoint.attempt(recovery.SUBMITTING)
+            assert optimizer.watchdog.report(WebDriverException('chrome not reachable'))
+            assert not optimizer.recover()
+            assert spare.calls == []
+        finally:
+            os.chdir(cwd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='浏览器看门狗失效检测耗时')
+    parser.add_argument('--trials', type=int, default=20, help='杀进程次数')
+    parser.add_argument('--interval', type=float, default=0.01, help='看门狗检查间隔（秒）')
+    args = parser.parse_args()
+
+    latencies = [detection_latency(args.interval) for _ in range(args.trials)]
+    if None in latencies:
+        print("❌ 有进程退出未被发现")
+        return 1
+    latencies.sort()
+    print(f"检查间隔{args.interval * 1000:.0f}ms，进程退出到判定失效: "
+          f"中位数{latencies[len(latencies) // 2] * 1000:.1f}ms，最大{latencies[-1] * 1000:.1f}ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+抢购任务调度器测试
+用假浏览器和假OptimizedSecKill检查SeckillScheduler：
+  - 任务按布防时间出队，时间相同时按添加顺序，后加入的更早任务排到前面
+  - 停止调度器时，等待开抢的工作线程立即返回
+  - 浏览器任务结束后浏览器回到池中：抢购成功自行归还、抢购异常、中途换浏览器都不泄漏
+无需浏览器和网络。
+
+用法: python test_scheduler.py [--jobs 1000]
+也可以用 pytest test_scheduler.py 运行
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import optimized_sec_kill
+from seckill.scheduler import SeckillScheduler
+from seckill.timing import PhaseTimer
+
+
+class FakeDriver:
+    current_window_handle = 'main'
+
+    def __init__(self):
+        self.urls = []
+        self.quit_called = False
+
+    def get(self, url):
+        self.urls.append(url)
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeSecKill:
+    """按outcome模拟OptimizedSecKill对浏览器的处理"""
+    outcome = 'win'
+
+    def __init__(self, driver, fire_at, driver_pool=None, **kwargs):
+        self.driver = driver
+        self.driver_pool = driver_pool
+        self.timer = PhaseTimer()
+        self.released = False
+
+    def optimized_sec_kill(self):
+        if self.outcome == 'win':
+            # 支付成功后自行归还
+            self.released = True
+            self.driver_pool.release(self.driver)
+            return True
+        if self.outcome == 'crash':
+            raise RuntimeError('页面分析失败')
+        # 浏览器失效：丢弃旧的，换一个继续，最后失败
+        self.driver_pool.discard(self.driver)
+        self.driver = self.driver_pool.acquire(timeout=1)
+        return False
+
+
+def make_scheduler(**kwargs):
+    drivers = []
+
+    def factory(account):
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    scheduler = SeckillScheduler(keep_alive_interval=60, driver_factory=factory, **kwargs)
+    return scheduler, drivers
+
+
+def test_jobs_fire_in_time_order():
+    scheduler, _ = make_scheduler(arm_lead=0, max_workers=1)
+    fired = []
+    scheduler._execute = lambda job: fired.append(job.job_id)
+    now = datetime.now()
+    scheduler.add_job(now + timedelta(seconds=0.3), 'late')      # 1
+    scheduler.add_job(now - timedelta(seconds=5), 'b')           # 2
+    scheduler.add_job(now - timedelta(seconds=10), 'a')          # 3
+    scheduler.add_job(now - timedelta(seconds=5), 'c')           # 4
+    scheduler.run_forever(exit_when_done=True)
+    scheduler.stop()
+    assert fired == [3, 2, 4, 1], fired
+
+
+def test_stop_wakes_waiting_job():
+    scheduler, _ = make_scheduler()
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(scheduler._sleep_until(datetime.now() + timedelta(minutes=5))))
+    waiter.start()
+    time.sleep(0.05)
+    started = time.perf_counter()
+    scheduler.stop()
+    waiter.join(timeout=2)
+    assert not waiter.is_alive() and result == [False]
+    assert time.perf_counter() - started < 1.0
+    assert scheduler._sleep_until(datetime.now() - timedelta(seconds=1))
+
+
+def test_browser_jobs_return_drivers_to_pool():
+    scheduler, drivers = make_scheduler(browsers_per_account=1)
+    original = optimized_sec_kill.OptimizedSecKill
+    optimized_sec_kill.OptimizedSecKill = FakeSecKill
+    try:
+        fire_at = datetime.now() + timedelta(seconds=1)
+        for outcome in ('win', 'crash', 'win', 'swap', 'win'):
+            FakeSecKill.outcome = outcome
+            job = scheduler.add_job(fire_at, 'main')
+            try:
+                ok = scheduler._run_browser(job)
+            except RuntimeError:
+                ok = None
+            assert ok == {'win': True, 'crash': None, 'swap': False}[outcome]
+            pool = scheduler._pools['main']
+            assert not pool._leased and len(pool._idle) == 1, (outcome, pool._leased, pool._idle)
+    finally:
+        optimized_sec_kill.OptimizedSecKill = original
+        scheduler.stop()
+    # 只有换浏览器时新建了一个，失效的那个已关闭
+    assert len(drivers) == 2 and drivers[0].quit_called and pool.reused == 4
+
+
+def main():
+    parser = argparse.ArgumentParser(description='调度器任务出队耗时')
+    parser.add_argument('--jobs', type=int, default=1000, help='任务数')
+    args = parser.parse_args()
+
+    scheduler, _ = make_scheduler(arm_lead=0, max_workers=1)
+    fired = []
+    scheduler._execute = lambda job: fired.append(job.fire_at)
+    now = datetime.now()
+    for i in range(args.jobs):
+        scheduler.add_job(now - timedelta(seconds=(i * 7919) % args.jobs), 'acct%d' % (i % 4))
+    started = time.perf_counter()
+    scheduler.run_forever(exit_when_done=True)
+    elapsed = time.perf_counter() - started
+    scheduler.stop()
+    print(f"{args.jobs}个任务按时间顺序出队: {fired == sorted(fired)}，每个{elapsed / args.jobs * 1e6:.0f}µs")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
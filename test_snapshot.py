@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+失败快照测试
+用假浏览器检查SnapshotService：
+  - 页面未变化时复用同一个内容文件，MHTML中每次变化的分隔符/日期不影响去重
+  - 总大小超过budget_bytes时从最旧的清单开始淘汰，并删除不再被引用的内容文件
+  - 记录的占用空间与目录实际大小一致；新实例接着以前运行留下的快照计数，并清理孤立的内容文件
+无需浏览器和网络。
+
+用法: python test_snapshot.py [--captures 200]
+也可以用 pytest test_snapshot.py 运行
+"""
+
+import os
+import sys
+import time
+import base64
+import itertools
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from seckill.snapshot import SnapshotService
+
+MHTML = ('From: <Saved by Blink>\r\nDate: {date}\r\nContent-Type: multipart/related; boundary="----{boundary}"\r\n\r\n'
+         '------{boundary}\r\nContent-ID: <frame-{boundary}@mhtml.blink>\r\n\r\n<html>{body}</html>\r\n')
+
+
+class FakeDriver:
+    current_window_handle = 'page'
+    capabilities = {}
+
+    def __init__(self):
+        self.page = 0
+        self.calls = 0
+
+    def execute_cdp_cmd(self, method, params):
+        self.calls += 1
+        if method == 'Page.captureSnapshot':
+            # 每次抓取的分隔符和日期都不同，页面内容由self.page决定
+            return {'data': MHTML.format(date=self.calls, boundary=f'b{self.calls}', body=os.urandom(2000).hex()
+                                         if self.page < 0 else 'page%d' % self.page * 200)}
+        return {'data': base64.b64encode(b'png%d' % self.page * 300).decode()}
+
+
+def disk_size(directory):
+    return sum(os.path.getsize(os.path.join(root, n)) for root, _, files in os.walk(directory) for n in files)
+
+
+_stamps = itertools.count()
+
+
+def capture(service, reason):
+    """同步执行一次后台线程中的抓取，时间戳按调用顺序递增"""
+    service._take(f'{next(_stamps):08d}', reason, {}, [])
+
+
+def test_unchanged_page_reuses_blobs():
+    with tempfile.TemporaryDirectory() as directory:
+        driver = FakeDriver()
+        service = SnapshotService(driver, directory)
+        for reason in ('a', 'b', 'c'):
+            capture(service, reason)
+        service.close()
+        assert len(os.listdir(service.blob_dir)) == 2 and service.captured == 3
+        assert service._total == disk_size(directory)
+
+
+def test_budget_evicts_oldest_and_tracks_size():
+    with tempfile.TemporaryDirectory() as directory:
+        driver = FakeDriver()
+        service = SnapshotService(driver, directory, budget_bytes=12000)
+        for page in range(8):
+            driver.page = -1 if page % 2 else page  # 奇数次为不可压缩的页面
+            capture(service, f'page{page}')
+            assert service._total == disk_size(directory), page
+            assert service._total <= 12000 or len(service._manifests) == 1
+        service.close()
+        manifests = sorted(n for n in os.listdir(directory) if n.startswith('snapshot-'))
+        assert 1 <= len(manifests) < 8
+        referenced = {b for _, _, blobs in service._manifests for b in blobs}
+        assert set(os.listdir(service.blob_dir)) == referenced
+
+        # 以前运行留下的快照计入预算，孤立的内容文件在首次写入时删除
+        with open(os.path.join(service.blob_dir, 'orphan.png.gz'), 'wb') as f:
+            f.write(b'x' * 100)
+        again = SnapshotService(FakeDriver(), directory, budget_bytes=12000)
+        capture(again, 'next run')
+        again.close()
+        assert 'orphan.png.gz' not in os.listdir(again.blob_dir)
+        assert again._total == disk_size(directory) <= 12000 or len(again._manifests) == 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='快照写入与预算检查耗时')
+    parser.add_argument('--captures', type=int, default=200, help='快照次数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        driver = FakeDriver()
+        service = SnapshotService(driver, directory, budget_bytes=20 * 1024, screenshot=False)
+        started = time.perf_counter()
+        for i in range(args.captures):
+            driver.page = i % 50
+            capture(service, f'page{i}')
+        elapsed = time.perf_counter() - started
+        service.close()
+        kept = len([n for n in os.listdir(directory) if n.startswith('snapshot-')])
+        size = disk_size(directory)
+    print(f"{args.captures}次快照: 写入和预算检查每次{elapsed / args.captures * 1000:.2f}ms，保留{kept}份，占用{size}字节")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+点击策略排序测试
+用模拟的策略级联检查StrategyStats：
+  - 快且常成功的策略排到最前，又慢又少成功的策略退到后面
+  - 统计写入文件后可以恢复，多个实例保存时合并而不是覆盖
+  - fixed策略保持原有顺序
+无需浏览器和网络。
+
+用法: python test_strategy_stats.py [--runs 200]
+也可以用 pytest test_strategy_stats.py 运行
+"""
+
+import os
+import sys
+import random
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from seckill.strategy_stats import StrategyStats, WON, MISSED, STALLED
+
+# 模拟策略: 名称 -> (成功率, 耗时秒)；原有顺序下排第一的策略又慢又很少成功
+ARMS = [('js_finder', 0.1, 3.0), ('page_analysis', 0.3, 1.5), ('deep_analysis', 0.9, 0.2), ('powerful_click', 0.5, 0.5)]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def simulate(stats, runs, seed=0):
+    """执行runs次级联，返回各次成功的策略"""
+    rng = random.Random(seed)
+    clock = stats.clock
+    winners = []
+
+    def arm(name, rate, seconds):
+        def strategy():
+            clock.now += seconds
+            if rng.random() < rate:
+                winners.append(name)
+                return WON
+            return MISSED
+        return strategy
+
+    for _ in range(runs):
+        stats.run('settle', [(name, arm(name, rate, seconds)) for name, rate, seconds in ARMS])
+    return winners
+
+
+def test_slow_rare_strategy_drops_to_end():
+    stats = StrategyStats(clock=FakeClock())
+    assert stats.order('settle', [a[0] for a in ARMS]) == [a[0] for a in ARMS]
+    simulate(stats, 200)
+    order = stats.order('settle', [a[0] for a in ARMS])
+    assert order[0] == 'deep_analysis', order
+    assert order.index('js_finder') >= 2, order
+
+
+def test_stalled_stops_cascade():
+    stats = StrategyStats()
+    calls = []
+    assert not stats.run('submit', [('a', lambda: calls.append('a') or STALLED),
+                                    ('b', lambda: calls.append('b') or WON)])
+    assert calls == ['a']
+    # 嵌套级联（备用选择器）中点击后未跳转，外层也不再尝试后面的策略
+    calls = []
+    nested = lambda: stats.run_outcome('submit.backup', [('x', lambda: calls.append('x') or MISSED),
+                                                         ('y', lambda: calls.append('y') or STALLED)])
+    assert not stats.run('submit', [('backup', nested), ('c', lambda: calls.append('c') or WON)])
+    assert calls == ['x', 'y']
+
+
+def test_persist_and_merge():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'stats.json')
+        first, second = StrategyStats(path, clock=FakeClock()), StrategyStats(path, clock=FakeClock())
+        first.record('settle', 'js_finder', True, 0.1)
+        second.record('settle', 'js_finder', False, 1.0)
+        second.record('settle', 'powerful_click', True, 0.5)
+        first.save()
+        second.save()
+        restored = StrategyStats(path)
+        arms = restored._stats['settle']
+        assert arms['js_finder']['tries'] == 2 and arms['js_finder']['wins'] == 1
+        assert arms['powerful_click']['wins'] == 1
+        assert not [f for f in os.listdir(directory) if f.endswith('.tmp')]
+
+
+def test_fixed_policy_keeps_order():
+    stats = StrategyStats(policy='fixed', clock=FakeClock())
+    simulate(stats, 50)
+    assert stats.order('settle', [a[0] for a in ARMS]) == [a[0] for a in ARMS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='点击策略排序模拟')
+    parser.add_argument('--runs', type=int, default=200, help='模拟执行级联的次数')
+    args = parser.parse_args()
+
+    for policy in ('fixed', 'ucb'):
+        clock = FakeClock()
+        stats = StrategyStats(policy=policy, clock=clock)
+        winners = simulate(stats, args.runs)
+        print(f"{policy}: 平均每次级联耗时{clock.now / args.runs:.2f}s，成功{len(winners)}/{args.runs}")
+        print(stats.format_summary())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
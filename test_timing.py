@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+抢购阶段计时测试
+用假时钟检查seckill/timing.py：
+  - PhaseTimer.span()记录区间，异常时也结束；start()重复调用保持原起点，stop()未开始的阶段返回None
+  - finish()把未结束的阶段标记为unfinished并按开始时间排序，durations()累加同名阶段
+  - save()追加JSONL，load_runs()跳过损坏的行并只取最近N次，summarize()按PHASES顺序汇总，histogram()按上界分桶
+  - to_chrome_trace()以每次运行最早的事件为零点输出微秒时间，阶段和脚本分两条线程
+无需浏览器和网络。
+
+用法: python test_timing.py [--spans 100000]
+也可以用 pytest test_timing.py 运行
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from seckill.script_runner import ScriptSpan
+from seckill.timing import (PhaseTimer, load_runs, summarize, histogram, to_chrome_trace,
+                            WAIT, CART_LOAD, SETTLE_CLICK, NAVIGATION, SUBMIT_CLICK)
+
+
+class FakeClock:
+    """每次读取前进step纳秒"""
+
+    def __init__(self, step=1000000):
+        self.now = 0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+def test_spans_and_durations():
+    closed = []
+    timer = PhaseTimer(clock=FakeClock(), listener=closed.append)
+    with timer.span(CART_LOAD, rows=3):
+        pass
+    try:
+        with timer.span(SETTLE_CLICK):
+            raise RuntimeError('点击失败')
+    except RuntimeError:
+        pass
+    timer.start(NAVIGATION)
+    timer.start(NAVIGATION)  # 保持原起点
+    with timer.span(SETTLE_CLICK):
+        pass
+    assert timer.stop(NAVIGATION, via='url').duration_ms == 3.0
+    assert timer.stop(NAVIGATION) is None
+    timer.start(SUBMIT_CLICK)
+
+    assert [s.name for s in closed] == [CART_LOAD, SETTLE_CLICK, SETTLE_CLICK, NAVIGATION]
+    assert closed[0].attrs == {'rows': 3} and closed[-1].attrs == {'via': 'url'}
+    assert timer.durations() == {CART_LOAD: 1.0, SETTLE_CLICK: 2.0, NAVIGATION: 3.0}
+
+    spans = timer.finish()
+    assert [s.name for s in spans] == [CART_LOAD, SETTLE_CLICK, NAVIGATION, SETTLE_CLICK, SUBMIT_CLICK]
+    assert spans[-1].attrs == {'unfinished': True} and spans[-1].duration_ms == 1.0
+
+
+def test_save_load_and_summarize():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'runs.jsonl')
+        for wait_ms in (10, 30, 20):
+            timer = PhaseTimer(clock=FakeClock(step=wait_ms * 1000000))
+            with timer.span(WAIT):
+                pass
+            with timer.span(CART_LOAD):
+                pass
+            timer.save(path, script_spans=[ScriptSpan('page_state', 5, 0.8, 0.3)], account='main')
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"run": \n\n')
+
+        runs = load_runs(path)
+        assert len(runs) == 3 and runs[0]['account'] == 'main'
+        assert runs[0]['scripts'] == [['page_state', 5, 0.8, 0.3]]
+        assert [r['spans'][0][2] - r['spans'][0][1] for r in load_runs(path, last=2)] == [30000000, 20000000]
+        assert load_runs(os.path.join(directory, 'missing.jsonl')) == []
+
+        rows = summarize(runs)
+        assert [r['phase'] for r in rows] == [WAIT, CART_LOAD]
+        assert (rows[0]['count'], rows[0]['mean_ms'], rows[0]['p50_ms'], rows[0]['max_ms']) == (3, 20.0, 20.0, 30.0)
+
+    counts = dict(histogram([0.5, 3, 3, 20000]))
+    assert (counts[1], counts[5], counts[float('inf')], sum(counts.values())) == (1, 2, 1, 4)
+
+
+def test_chrome_trace_events():
+    runs = [
+        {'run': 'r1', 'spans': [[WAIT, 2000000, 5000000, {}], [NAVIGATION, 6000000, None, {}]],
+         'scripts': [['page_state', 1000000, 0.5, 0.2]]},
+        {'run': 'empty', 'spans': [], 'scripts': []},
+        {'run': 'r3', 'spans': [[CART_LOAD, 7000, 9000, {'rows': 2}]]},
+    ]
+    events = to_chrome_trace(runs)['traceEvents']
+    meta = [e for e in events if e['ph'] == 'M']
+    assert [(e['pid'], e['args']['name']) for e in meta] == [
+        (1, 'run r1'), (1, 'phases'), (1, 'scripts'), (3, 'run r3'), (3, 'phases'), (3, 'scripts')]
+    complete = [(e['pid'], e['tid'], e['name'], e['ts'], e['dur']) for e in events if e['ph'] == 'X']
+    # 未结束的阶段不输出；时间以运行中最早的事件（这里是脚本）为零点，单位微秒
+    assert complete == [(1, 1, WAIT, 1000.0, 3000.0), (1, 2, 'page_state', 0.0, 500.0), (3, 1, CART_LOAD, 0.0, 2.0)]
+    assert events[-1]['args'] == {'rows': 2}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='阶段计时开销')
+    parser.add_argument('--spans', type=int, default=100000, help='记录的阶段数')
+    args = parser.parse_args()
+
+    timer = PhaseTimer()
+    started = time.perf_counter()
+    for _ in range(args.spans):
+        with timer.span(SETTLE_CLICK):
+            pass
+    per_span = (time.perf_counter() - started) / args.spans
+    started = time.perf_counter()
+    trace = to_chrome_trace([{'run': timer.run_id, 'spans': [s.to_list() for s in timer.finish()], 'scripts': []}])
+    export_ms = (time.perf_counter() - started) * 1000
+    print(f"span()每次{per_span * 1e6:.2f}µs，{len(trace['traceEvents'])}个trace事件转换耗时{export_ms:.0f}ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+调试轨迹记录测试
+检查TraceRecorder：
+  - 文件超过max_bytes时改名为.1，新文件开头重新写入锚点事件，多次运行不会无限追加
+  - 工作线程中未捕获的异常写入crash事件（带线程名）
+  - 环形缓冲区溢出时记录丢弃的事件数
+无需浏览器和网络。
+
+用法: python test_trace.py [--events 100000]
+也可以用 pytest test_trace.py 运行
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from seckill import trace
+from seckill.trace import TraceRecorder
+
+
+def read_events(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_file_is_rotated_at_max_bytes():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'trace.json')
+        for run in range(5):
+            recorder = TraceRecorder(path, flush_interval=60, max_bytes=2000)
+            for i in range(20):
+                recorder.record('step', run=run, i=i)
+            recorder.close()
+        assert os.path.getsize(path) < 2000 * 2 and os.path.getsize(path + '.1') < 2000 * 2
+        assert sorted(os.listdir(directory)) == ['trace.json', 'trace.json.1']
+        events = read_events(path)
+        assert events[0]['step'] == 'trace_start' and events[-1]['step'] == 'trace_end'
+        assert [e['run'] for e in events if e['step'] == 'step'][-1] == 4
+
+        # 同一次运行中途轮转，新文件开头仍有锚点
+        recorder = TraceRecorder(path, flush_interval=60, max_bytes=500)
+        for i in range(20):
+            recorder.record('step', i=i)
+            recorder.flush()
+        recorder.close()
+        assert read_events(path)[0]['step'] == 'trace_start'
+
+
+def test_thread_crash_is_dumped():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'trace.json')
+        recorder = TraceRecorder(path, flush_interval=60)
+        saved = sys.excepthook, threading.excepthook
+        reported = []
+        try:
+            # pytest会替换threading.excepthook，这里在一个安静的钩子之上重新安装
+            threading.excepthook = lambda args: reported.append(args.thread.name)
+            trace._install_excepthook()
+            worker = threading.Thread(target=lambda: 1 / 0, name='keep-alive-worker')
+            worker.start()
+            worker.join()
+        finally:
+            sys.excepthook, threading.excepthook = saved
+            recorder.close()
+        crashes = [e for e in read_events(path) if e['step'] == 'crash']
+        assert reported == ['keep-alive-worker']  # 原有钩子仍被调用
+        assert len(crashes) == 1 and crashes[0]['thread'] == 'keep-alive-worker'
+        assert crashes[0]['error'].startswith('ZeroDivisionError')
+
+
+def test_ring_buffer_overflow_is_counted():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'trace.json')
+        recorder = TraceRecorder(path, capacity=10, flush_interval=60)
+        for i in range(25):
+            recorder.record('step', i=i)
+        recorder.close()
+        events = read_events(path)
+        steps = [e for e in events if e['step'] == 'step']
+        # close()追加的trace_end也占一个位置
+        assert len(steps) == 9 and steps[0]['dropped_before'] == 16 and events[-1]['step'] == 'trace_end'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='轨迹记录热路径耗时')
+    parser.add_argument('--events', type=int, default=100000, help='记录的事件数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = TraceRecorder(os.path.join(directory, 'trace.json'), capacity=args.events)
+        started = time.perf_counter()
+        for i in range(args.events):
+            recorder.record('step', i=i)
+        per_call = (time.perf_counter() - started) / args.events
+        started = time.perf_counter()
+        recorder.close()
+        close_cost = time.perf_counter() - started
+    print(f"record()每次{per_call * 1e9:.0f}ns，close()写出{args.events}个事件耗时{close_cost * 1000:.0f}ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
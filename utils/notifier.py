@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# encoding=utf-8
+"""
+非阻塞通知分发
+notify()只把消息放入有界队列，由后台线程合并、超时重试并投递到各个通道
+"""
+import os
+import http
+import time
+import queue
+import atexit
+import threading
+
+import requests
+
+
+class PushSink:
+    """sre24推送通道"""
+
+    url = "https://sre24.com/api/v1/push"
+
+    def __init__(self, token: str):
+        self.token = token
+
+    def send(self, msg: str, timeout: float):
+        rs = requests.post(url=self.url, json=dict(token=self.token, msg=msg), timeout=timeout).json()
+        if rs.get("code") != http.HTTPStatus.ACCEPTED:
+            raise RuntimeError(f"push rejected: {rs}")
+
+
+class WebhookSink:
+    """通用webhook通道，POST {"msg": ...}，也可指向本地替身服务器"""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def send(self, msg: str, timeout: float):
+        res = requests.post(url=self.url, json=dict(msg=msg), timeout=timeout)
+        res.raise_for_status()
+
+
+class NotificationDispatcher:
+    """后台通知分发器
+
+    - 队列满时丢弃新消息并计数，调用方永不阻塞
+    - coalesce_window秒内的突发消息合并成一条（相同消息只计数）
+    - 每个通道独立超时和重试，某个通道失败不影响其它通道
+    - close()最多等待timeout秒，队列满且通道卡住时放弃未发送的消息，不会卡住退出
+    """
+
+    def __init__(self, sinks, maxsize: int = 64, timeout: float = 3.0, retries: int = 2,
+                 backoff: float = 0.5, coalesce_window: float = 0.5):
+        self.sinks = list(sinks)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.coalesce_window = coalesce_window
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._abandon = threading.Event()  # 停止信号无法入队时，发完当前一批即退出
+        self._thread = threading.Thread(target=self._run, name="notifier", daemon=True)
+        self._thread.start()
+
+    def notify(self, msg: str) -> bool:
+        """非阻塞投递，返回是否入队"""
+        try:
+            self._queue.put_nowait(msg)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self, timeout: float = 5.0):
+        """等待队列中的消息发送完（最多timeout秒）后停止后台线程"""
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            self._abandon.set()
+            self.dropped += self._queue.qsize()
+        self._thread.join(timeout=max(0.0, deadline - time.monotonic()))
+
+    def _run(self):
+        while True:
+            msg = self._queue.get()
+            if msg is None:
+                return
+            batch = [msg]
+            stop = self._collect(batch)
+            self._deliver(self._coalesce(batch))
+            if stop or self._abandon.is_set():
+                return
+
+    def _collect(self, batch) -> bool:
+        """在合并窗口内继续收集消息，返回是否收到了停止信号"""
+        deadline = time.monotonic() + self.coalesce_window
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                msg = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return False
+            if msg is None:
+                return True
+            batch.append(msg)
+
+    @staticmethod
+    def _coalesce(batch) -> str:
+        counts = {}
+        for msg in batch:
+            counts[msg] = counts.get(msg, 0) + 1
+        return "\n".join(msg if n == 1 else f"{msg} (x{n})" for msg, n in counts.items())
+
+    def _deliver(self, msg: str):
+        for sink in self.sinks:
+            for attempt in range(self.retries + 1):
+                try:
+                    sink.send(msg, self.timeout)
+                    self.sent += 1
+                    break
+                except Exception:
+                    if attempt == self.retries:
+                        self.failed += 1
+                    else:
+                        time.sleep(self.backoff * (2 ** attempt))
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> NotificationDispatcher:
+    """按环境变量构建默认分发器：TOKEN启用sre24推送，NOTIFY_WEBHOOK启用webhook"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            sinks = []
+            token = os.getenv("TOKEN")
+            if token:
+                sinks.append(PushSink(token))
+            webhook = os.getenv("NOTIFY_WEBHOOK")
+            if webhook:
+                sinks.append(WebhookSink(webhook))
+            _dispatcher = NotificationDispatcher(sinks)
+            atexit.register(_dispatcher.close)
+        return _dispatcher
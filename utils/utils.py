@@ -1,9 +1,8 @@
 #!/usr/bin/env python3
 # encoding=utf-8
-import http
 import os
 
-import requests
+from utils.notifier import get_dispatcher
 
 
 def get_useragent_data(filename: str="./useragents.txt") -> list:
@@ -19,14 +18,9 @@ def get_useragent_data(filename: str="./useragents.txt") -> list:
 
 
 def notify_user(msg: str):
+    """打印并异步推送通知，不阻塞调用方（见utils.notifier）"""
     print(msg)
 
-    token = os.getenv("TOKEN")
-    if not token:
-        return
-
-    rs = requests.post(url="https://sre24.com/api/v1/push", json=dict(
-        token=token,
-        msg=msg,
-    )).json()
-    assert rs["code"] == http.HTTPStatus.ACCEPTED, rs
+    dispatcher = get_dispatcher()
+    if dispatcher.sinks:
+        dispatcher.notify(msg)